@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PATTERN = "llm_eval_backup_*.db"
+MANIFEST_NAME = "llm_eval_backups.json"
+
+class BackupManager:
+    """Online backups of the SQLite database with a retention policy.
+
+    Copies go through SQLite's backup API on a worker thread, a few pages per
+    step, so they are consistent while evaluations keep writing and never
+    block the event loop. Each backup's duration and size are recorded in a
+    manifest next to the backup files, not in the database itself, so
+    restoring a backup doesn't roll back the record of the others.
+    """
+
+    def __init__(self, database_path: Path):
+        self.database_path = Path(database_path)
+        self.backup_dir = self.database_path.parent
+        self.keep_last = 10
+        self.max_age_days = 30
+        self.pages_per_step = 1024
+        self._lock = asyncio.Lock()
+
+    def configure(self, settings: dict):
+        self.keep_last = settings.get("keep_last", self.keep_last)
+        self.max_age_days = settings.get("max_age_days", self.max_age_days)
+        self.pages_per_step = max(1, settings.get("pages_per_step", self.pages_per_step))
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.backup_dir / MANIFEST_NAME
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path) as manifest:
+                return {entry["file"]: entry for entry in json.load(manifest)["backups"]}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable backup manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _write_manifest(self, entries: Dict[str, Dict[str, Any]]):
+        partial = self.manifest_path.with_suffix(".json.partial")
+        with open(partial, "w") as manifest:
+            json.dump({"backups": sorted(entries.values(), key=lambda entry: entry["created_at"])}, manifest, indent=2)
+        os.replace(partial, self.manifest_path)
+
+    def _copy(self, target: Path) -> int:
+        # Written under a temporary name so a failed or interrupted copy never looks like a backup
+        partial = target.with_name(target.name + ".partial")
+        source = sqlite3.connect(self.database_path)
+        destination = sqlite3.connect(partial)
+        try:
+            source.backup(destination, pages=self.pages_per_step)
+            pages = destination.execute("PRAGMA page_count").fetchone()[0]
+        except Exception:
+            destination.close()
+            partial.unlink(missing_ok=True)
+            raise
+        else:
+            destination.close()
+        finally:
+            source.close()
+        os.replace(partial, target)
+        return pages
+
+    async def create(self, reason: str = "manual") -> Optional[Dict[str, Any]]:
+        """Back up the database, then apply the retention policy. Returns the backup's manifest entry."""
+        if not self.database_path.exists():
+            logger.warning("No database file found to backup")
+            return None
+
+        async with self._lock:
+            created_at = datetime.now()
+            target = self.backup_dir / f"llm_eval_backup_{created_at.strftime('%Y%m%d_%H%M%S_%f')}.db"
+            start = time.perf_counter()
+            pages = await asyncio.to_thread(self._copy, target)
+            entry = {
+                "file": target.name,
+                "created_at": created_at.isoformat(),
+                "reason": reason,
+                "size_bytes": target.stat().st_size,
+                "pages": pages,
+                "duration_seconds": round(time.perf_counter() - start, 3)
+            }
+
+            entries = self._read_manifest()
+            entries[target.name] = entry
+            self._write_manifest(entries)
+            logger.info(
+                f"Created database backup {target} ({entry['size_bytes']} bytes in {entry['duration_seconds']}s)"
+            )
+
+            self._prune(entries)
+            return entry
+
+    def _expired(self, files: List[Path]) -> List[Path]:
+        # Backups beyond the newest keep_last, or older than max_age_days, expire;
+        # either limit can be turned off with null
+        cutoff = None
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).timestamp()
+
+        newest_first = sorted(files, key=lambda path: path.stat().st_mtime, reverse=True)
+        return [
+            path for index, path in enumerate(newest_first)
+            if (self.keep_last is not None and index >= self.keep_last)
+            or (cutoff is not None and path.stat().st_mtime < cutoff)
+        ]
+
+    def _prune(self, entries: Dict[str, Dict[str, Any]]):
+        files = list(self.backup_dir.glob(BACKUP_PATTERN))
+        expired = self._expired(files)
+        for path in expired:
+            path.unlink()
+
+        # Also forget entries whose file was deleted by hand
+        present = {path.name for path in files} - {path.name for path in expired}
+        forgotten = [name for name in entries if name not in present]
+        for name in forgotten:
+            del entries[name]
+
+        if forgotten:
+            self._write_manifest(entries)
+        if expired:
+            logger.info(f"Removed {len(expired)} database backups past retention")
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Every backup on disk, newest first. Backups made before the manifest existed have no duration."""
+        entries = self._read_manifest()
+        backups = []
+        for path in self.backup_dir.glob(BACKUP_PATTERN):
+            stat = path.stat()
+            backups.append(entries.get(path.name) or {
+                "file": path.name,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "reason": None,
+                "size_bytes": stat.st_size,
+                "pages": None,
+                "duration_seconds": None
+            })
+        return sorted(backups, key=lambda backup: backup["created_at"], reverse=True)
+
+    def stats(self) -> dict:
+        return {
+            "backup_dir": str(self.backup_dir),
+            "keep_last": self.keep_last,
+            "max_age_days": self.max_age_days,
+            "pages_per_step": self.pages_per_step,
+            "in_progress": self._lock.locked()
+        }
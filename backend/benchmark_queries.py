@@ -0,0 +1,214 @@
+"""Time the hot read queries on a large database with and without the storage profile.
+
+Seeds --results evaluation results (25 per evaluation, like the speech-to-text
+suite), then times each query on a plain engine without the lookup indexes
+("before") and on database.engine with its pragmas and indexes ("after").
+
+    python benchmark_queries.py --results 1000000 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+CASES_PER_EVALUATION = 25
+CRITERIA = 5
+INSERT_CHUNK_SIZE = 50_000
+
+def seed(db_path, count):
+    """Fill the schema with raw executemany inserts, which is much faster than the ORM at this size."""
+    evaluations = max(1, count // CASES_PER_EVALUATION)
+    db = sqlite3.connect(db_path)
+    db.execute("INSERT INTO evaluation_types (id, name) VALUES (1, 'benchmark')")
+    db.executemany(
+        "INSERT INTO criteria (id, evaluation_type_id, name) VALUES (?, 1, ?)",
+        [(criterion, f"criterion_{criterion}") for criterion in range(1, CRITERIA + 1)]
+    )
+    db.executemany(
+        "INSERT INTO test_cases (id, evaluation_type_id, criterion_id, input, description) VALUES (?, 1, ?, ?, ?)",
+        [
+            (case, (case - 1) % CRITERIA + 1, f"benchmark input {case}", f"description {case}")
+            for case in range(1, CASES_PER_EVALUATION + 1)
+        ]
+    )
+    db.executemany(
+        "INSERT INTO evaluations (id, evaluation_type_id, timestamp, system_prompt, model_name, scoring_model, "
+        "total_tokens, total_cost, status) VALUES (?, 1, '2024-10-01 00:00:00', 'benchmark', ?, 'benchmark', 0, 0.0, 'completed')",
+        [(evaluation, f"model_{evaluation % 4}") for evaluation in range(1, evaluations + 1)]
+    )
+
+    def results():
+        for index in range(evaluations * CASES_PER_EVALUATION):
+            yield (
+                index // CASES_PER_EVALUATION + 1,
+                index % CASES_PER_EVALUATION + 1,
+                f"output {index}",
+                "pass" if index % 3 else "fail",
+                "benchmark explanation",
+            )
+
+    rows = results()
+    while True:
+        chunk = [row for _, row in zip(range(INSERT_CHUNK_SIZE), rows)]
+        if not chunk:
+            break
+        db.executemany(
+            "INSERT INTO evaluation_results (evaluation_id, test_case_id, output, result, explanation, "
+            "prompt_tokens, response_tokens, evaluation_cost, scoring_cost) VALUES (?, ?, ?, ?, ?, 10, 20, 0.0001, 0.0002)",
+            chunk
+        )
+        db.commit()
+    db.close()
+    return evaluations
+
+def drop_lookup_indexes(db_path):
+    db = sqlite3.connect(db_path)
+    names = [row[0] for row in db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%' "
+        "AND tbl_name IN ('evaluation_results', 'test_cases', 'criteria', 'evaluations')"
+    )]
+    for name in names:
+        db.execute(f"DROP INDEX {name}")
+    db.execute("PRAGMA journal_mode = DELETE")
+    db.close()
+
+def queries(database, evaluations):
+    EvaluationResult, TestCase, Criterion = database.EvaluationResult, database.TestCase, database.Criterion
+
+    def test_case_detail():
+        # get_test_case_details
+        return (
+            select(EvaluationResult)
+            .where(
+                EvaluationResult.evaluation_id == random.randint(1, evaluations),
+                EvaluationResult.test_case_id == random.randint(1, CASES_PER_EVALUATION)
+            )
+        )
+
+    def results_page():
+        # load_test_case_results for one page of /evaluations
+        newest = random.randint(10, max(10, evaluations))
+        return (
+            select(EvaluationResult, TestCase.input, TestCase.description, Criterion.name)
+            .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+            .join(Criterion, TestCase.criterion_id == Criterion.id)
+            .where(EvaluationResult.evaluation_id.in_(range(newest - 9, newest + 1)))
+            .order_by(EvaluationResult.evaluation_id, EvaluationResult.test_case_id)
+        )
+
+    def criteria_counts():
+        # per-criterion progress of an evaluation being resumed
+        return (
+            select(Criterion.name, func.count(EvaluationResult.id))
+            .join(TestCase, TestCase.criterion_id == Criterion.id)
+            .join(EvaluationResult, EvaluationResult.test_case_id == TestCase.id)
+            .where(EvaluationResult.evaluation_id == random.randint(1, evaluations))
+            .group_by(Criterion.name)
+        )
+
+    def cases_by_criterion():
+        return select(TestCase).where(TestCase.criterion_id == random.randint(1, CRITERIA))
+
+    return {
+        "test case detail": test_case_detail,
+        "results page (10 evals)": results_page,
+        "criterion counts": criteria_counts,
+        "test cases by criterion": cases_by_criterion,
+    }
+
+async def time_queries(engine, query_builders, repeat):
+    timings = {}
+    async with engine.connect() as conn:
+        for name, build in query_builders.items():
+            samples = []
+            for _ in range(repeat):
+                stmt = build()
+                start = time.perf_counter()
+                (await conn.execute(stmt)).all()
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            timings[name] = (statistics.median(samples), samples[int(len(samples) * 0.95) - 1])
+    return timings
+
+async def time_commits(engine, database, first_evaluation_id, commits):
+    # One small committed batch per test case, the shape of ResultWriter's flushes.
+    # Each goes to an evaluation of its own, as a test case is stored once per evaluation.
+    evaluation_ids = range(first_evaluation_id, first_evaluation_id + commits)
+    async with engine.begin() as conn:
+        await conn.execute(database.Evaluation.__table__.insert(), [
+            {"id": evaluation_id, "evaluation_type_id": 1, "system_prompt": "benchmark", "model_name": "benchmark",
+             "scoring_model": "benchmark", "status": "running"}
+            for evaluation_id in evaluation_ids
+        ])
+
+    start = time.perf_counter()
+    for evaluation_id in evaluation_ids:
+        async with engine.begin() as conn:
+            await conn.execute(database.EvaluationResult.__table__.insert(), [
+                {
+                    "evaluation_id": evaluation_id, "test_case_id": case, "output": "commit", "result": "pass",
+                    "prompt_tokens": 0, "response_tokens": 0, "evaluation_cost": 0.0, "scoring_cost": 0.0
+                }
+                for case in range(1, 6)
+            ])
+    return (time.perf_counter() - start) * 1000 / commits
+
+async def main(count, repeat, commits):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "benchmark.db"
+        url = f"sqlite+aiosqlite:///{db_path}"
+        os.environ["LLM_EVAL_DATABASE_URL"] = url
+        import database
+
+        await database.init_db()
+        await database.engine.dispose()
+        drop_lookup_indexes(db_path)
+
+        start = time.perf_counter()
+        evaluations = seed(db_path, count)
+        print(f"Seeded {evaluations * CASES_PER_EVALUATION} results in {time.perf_counter() - start:.1f}s")
+        builders = queries(database, evaluations)
+
+        random.seed(0)
+        # How database.py created its engine before: default pool, no pragmas
+        plain_engine = create_async_engine(url, poolclass=NullPool)
+        before = await time_queries(plain_engine, builders, repeat)
+        before_commit = await time_commits(plain_engine, database, evaluations + 1, commits)
+        await plain_engine.dispose()
+
+        start = time.perf_counter()
+        async with database.engine.begin() as conn:
+            for table in database.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    await conn.run_sync(index.create, checkfirst=True)
+        async with database.engine.connect() as conn:
+            await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+
+        random.seed(0)
+        after = await time_queries(database.engine, builders, repeat)
+        after_commit = await time_commits(database.engine, database, evaluations + commits + 1, commits)
+        await database.engine.dispose()
+
+    print(f"\n{'query':<26}{'before p50/p95 (ms)':>22}{'after p50/p95 (ms)':>22}")
+    for name in builders:
+        (b50, b95), (a50, a95) = before[name], after[name]
+        print(f"{name:<26}{b50:>12.3f} /{b95:>8.3f}{a50:>12.3f} /{a95:>8.3f}")
+    print(f"{'small commit':<26}{before_commit:>12.3f}{'':>10}{after_commit:>12.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--commits", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.results, args.repeat, args.commits))
@@ -0,0 +1,103 @@
+"""Compare the per-row ORM write path with ResultWriter's bulk inserts.
+
+    python benchmark_result_writes.py --results 10000 --batch-size 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+async def seed(database, count):
+    # One test case per result, since an evaluation stores each test case once
+    await database.init_db()
+    async with database.async_session_maker() as session:
+        eval_type = database.EvaluationType(name="benchmark")
+        session.add(eval_type)
+        await session.flush()
+        criterion = database.Criterion(evaluation_type_id=eval_type.id, name="benchmark_criterion")
+        session.add(criterion)
+        await session.flush()
+        test_cases = [
+            database.TestCase(evaluation_type_id=eval_type.id, criterion_id=criterion.id, input=f"benchmark input {index}")
+            for index in range(count)
+        ]
+        session.add_all(test_cases)
+        await session.commit()
+        return eval_type.id, [test_case.id for test_case in test_cases], criterion.id
+
+async def new_evaluation(database, eval_type_id):
+    async with database.async_session_maker() as session:
+        evaluation = database.Evaluation(
+            evaluation_type_id=eval_type_id,
+            system_prompt="benchmark",
+            model_name="benchmark",
+            scoring_model="benchmark",
+            status="running"
+        )
+        session.add(evaluation)
+        await session.commit()
+        return evaluation.id
+
+def result_row(test_case_id, index):
+    return {
+        "test_case_id": test_case_id,
+        "output": f"output {index}",
+        "result": "pass" if index % 2 else "fail",
+        "explanation": "benchmark explanation",
+        "prompt_tokens": 10,
+        "response_tokens": 20,
+        "evaluation_cost": 0.0001,
+        "scoring_cost": 0.0002
+    }
+
+async def per_row_writes(database, evaluation_id, test_case_ids, count):
+    # The write path /evaluate used before ResultWriter: add, flush, update totals, flush
+    async with database.async_session_maker() as session:
+        evaluation = await session.get(database.Evaluation, evaluation_id)
+        for index in range(count):
+            session.add(database.EvaluationResult(evaluation_id=evaluation_id, **result_row(test_case_ids[index], index)))
+            await session.flush()
+            evaluation.total_tokens += 30
+            evaluation.total_cost += 0.0003
+            await session.flush()
+        await session.commit()
+
+async def buffered_writes(result_writer, evaluation_id, test_case_ids, criterion_id, count, batch_size):
+    writer = result_writer.ResultWriter(evaluation_id, batch_size=batch_size, flush_interval=0)
+    for index in range(count):
+        await writer.add(result_row(test_case_ids[index], index), tokens=30, cost=0.0003, criterion_id=criterion_id)
+    await writer.close()
+
+async def main(count, batch_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LLM_EVAL_DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tmp) / 'benchmark.db'}"
+        import database
+        import result_writer
+
+        eval_type_id, test_case_ids, criterion_id = await seed(database, count)
+
+        evaluation_id = await new_evaluation(database, eval_type_id)
+        start = time.perf_counter()
+        await per_row_writes(database, evaluation_id, test_case_ids, count)
+        per_row = time.perf_counter() - start
+
+        evaluation_id = await new_evaluation(database, eval_type_id)
+        start = time.perf_counter()
+        await buffered_writes(result_writer, evaluation_id, test_case_ids, criterion_id, count, batch_size)
+        buffered = time.perf_counter() - start
+
+        await database.engine.dispose()
+
+    print(f"{count} results")
+    print(f"  per-row flush:            {per_row:8.3f}s  ({count / per_row:10.0f} rows/s)")
+    print(f"  ResultWriter (batch {batch_size:>4}): {buffered:8.3f}s  ({count / buffered:10.0f} rows/s)")
+    print(f"  speedup: {per_row / buffered:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.results, args.batch_size))
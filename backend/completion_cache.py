@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects.sqlite import insert
+
+from database import chunked, get_async_session, CompletionCacheEntry
+
+logger = logging.getLogger(__name__)
+
+class CompletionCache:
+    """Content-addressed cache for deterministic (temperature 0) completions.
+
+    New entries and hit timestamps are buffered in memory and written in one
+    short transaction by flush(), so the cache never competes with an
+    evaluation's own writes. A run flushes when it finishes, and put()
+    flushes early once flush_threshold new entries are buffered.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.max_entries = 100_000
+        self.max_age_days = 30
+        self.flush_threshold = 200
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._pending: Dict[str, Dict[str, str]] = {}
+        self._touched: Set[str] = set()
+
+    def configure(self, settings: dict):
+        self.enabled = settings.get("enabled", self.enabled)
+        self.max_entries = settings.get("max_entries", self.max_entries)
+        self.max_age_days = settings.get("max_age_days", self.max_age_days)
+        self.flush_threshold = max(1, settings.get("flush_threshold", self.flush_threshold))
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: list, temperature: float, json_response: bool = False) -> str:
+        request = {"provider": provider, "model": model, "messages": messages, "temperature": temperature}
+        # Only added when set so keys for plain-text completions stay unchanged
+        if json_response:
+            request["response_format"] = "json"
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, temperature: float, bypass: bool = False) -> bool:
+        if bypass or not self.enabled or temperature != 0:
+            self.bypassed += 1
+            return False
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self._pending:
+            self.hits += 1
+            return self._pending[key]["response"]
+
+        try:
+            async with get_async_session() as session:
+                response = await session.scalar(
+                    select(CompletionCacheEntry.response).where(CompletionCacheEntry.key == key)
+                )
+        except Exception as e:
+            logger.error(f"Completion cache lookup failed: {e}")
+            response = None
+
+        if response is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touched.add(key)
+        return response
+
+    async def put(self, key: str, provider: str, model: str, response: str):
+        if response is None:
+            return
+        self._pending[key] = {"provider": provider, "model": model, "response": response}
+        if len(self._pending) >= self.flush_threshold:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending and not self._touched:
+            return
+
+        pending, self._pending = self._pending, {}
+        touched, self._touched = self._touched, set()
+        now = datetime.utcnow()
+
+        try:
+            async with get_async_session() as session:
+                rows = [
+                    {"key": key, "created_at": now, "last_used_at": now, **entry}
+                    for key, entry in pending.items()
+                ]
+                for chunk in chunked(rows):
+                    stmt = insert(CompletionCacheEntry).values(chunk)
+                    await session.execute(stmt.on_conflict_do_update(
+                        index_elements=[CompletionCacheEntry.key],
+                        set_={"response": stmt.excluded.response, "last_used_at": now}
+                    ))
+
+                for chunk in chunked(list(touched)):
+                    await session.execute(
+                        update(CompletionCacheEntry)
+                        .where(CompletionCacheEntry.key.in_(chunk))
+                        .values(
+                            last_used_at=now,
+                            hit_count=CompletionCacheEntry.hit_count + 1
+                        )
+                    )
+
+                await self._evict(session, now)
+        except Exception as e:
+            logger.error(f"Completion cache flush failed: {e}")
+
+    async def _evict(self, session, now: datetime):
+        cutoff = now - timedelta(days=self.max_age_days)
+        await session.execute(delete(CompletionCacheEntry).where(CompletionCacheEntry.created_at < cutoff))
+
+        count = await session.scalar(select(func.count()).select_from(CompletionCacheEntry))
+        if count > self.max_entries:
+            least_recent = (
+                select(CompletionCacheEntry.key)
+                .order_by(CompletionCacheEntry.last_used_at)
+                .limit(count - self.max_entries)
+            )
+            await session.execute(delete(CompletionCacheEntry).where(CompletionCacheEntry.key.in_(least_recent)))
+
+    async def stats(self) -> dict:
+        async with get_async_session() as session:
+            entries = await session.scalar(select(func.count()).select_from(CompletionCacheEntry))
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "pending_writes": len(self._pending),
+            "max_entries": self.max_entries,
+            "max_age_days": self.max_age_days
+        }
+
+completion_cache = CompletionCache()
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Subscribed by default: every message
+ALL_CHANNELS = "*"
+# Lifecycle events (completed, cancelled, errors) of every evaluation, without the per-case progress
+LIFECYCLE_CHANNEL = "evaluations"
+
+def is_progress(message: Dict[str, Any]) -> bool:
+    return message.get("stage") == "evaluation"
+
+def message_evaluation_id(message: Dict[str, Any]) -> Optional[int]:
+    return (message.get("current_result") or {}).get("evaluation_id", message.get("evaluation_id"))
+
+def progress_key(message: Dict[str, Any]) -> str:
+    # Progress is throttled and coalesced per evaluation; a sweep job runs several at once
+    evaluation_id = message_evaluation_id(message)
+    return f"evaluation:{evaluation_id}" if evaluation_id is not None else f"job:{message.get('job_id')}"
+
+def message_channels(message: Dict[str, Any]) -> Set[str]:
+    channels = set()
+    if message.get("job_id") is not None:
+        channels.add(f"job:{message['job_id']}")
+    evaluation_id = message_evaluation_id(message)
+    if evaluation_id is not None:
+        channels.add(f"evaluation:{evaluation_id}")
+    if message.get("sweep_id"):
+        channels.add(f"sweep:{message['sweep_id']}")
+    if not is_progress(message):
+        channels.add(LIFECYCLE_CHANNEL)
+    return channels
+
+def coalesce(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold two progress messages into one carrying the newer totals and both messages' results."""
+    merged = dict(newer)
+    merged["current_results"] = (
+        older.get("current_results", [older["current_result"]]) +
+        newer.get("current_results", [newer["current_result"]])
+    )
+    return merged
+
+class _EventLog:
+    """The latest events of one evaluation, numbered from 1 in the order they were broadcast."""
+
+    def __init__(self, size: int):
+        self.seq = 0
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.finished = False
+
+class _Client:
+    def __init__(self, websocket: WebSocket, channels: Iterable[str]):
+        self.websocket = websocket
+        self.channels: Set[str] = set(channels)
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.ready = asyncio.Event()
+        self.coalesced = 0
+        self.dropped = 0
+        self.tasks: List[asyncio.Task] = []
+
+    def wants(self, channels: Set[str]) -> bool:
+        return ALL_CHANNELS in self.channels or not self.channels.isdisjoint(channels)
+
+class ConnectionManager:
+    """Fans messages out to WebSocket clients by channel.
+
+    broadcast() never waits on a socket: messages go into a bounded queue per
+    client, drained by that client's own writer task, so a slow client only
+    falls behind itself. A send that exceeds send_timeout disconnects the
+    client. Channels are "job:<id>", "evaluation:<id>", "sweep:<id>" and
+    "evaluations" (lifecycle events only); clients get everything ("*")
+    unless they subscribe to something narrower.
+
+    Progress messages are sent at most max_progress_rate times a second per
+    evaluation. Progress arriving in between, or hitting a full client queue,
+    is coalesced: the latest message plus every result since the last send,
+    in "current_results".
+
+    Every event of an evaluation gets a "seq", increasing by one per event,
+    and the last replay_buffer_size events of the latest replay_evaluations
+    evaluations are kept, so a client that missed some (after a reconnect,
+    or a dropped message) can ask for just the events after the last seq it
+    saw.
+    """
+
+    def __init__(self):
+        self._clients: Dict[WebSocket, _Client] = {}
+        self.heartbeat_interval = 30
+        self.send_timeout = 5.0
+        self.queue_size = 256
+        self.max_progress_rate = 10.0
+        self.replay_buffer_size = 1000
+        self.replay_evaluations = 64
+        self._logs: "OrderedDict[int, _EventLog]" = OrderedDict()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+
+    def configure(self, settings: dict):
+        self.heartbeat_interval = settings.get("heartbeat_interval", self.heartbeat_interval)
+        self.send_timeout = settings.get("send_timeout", self.send_timeout)
+        self.queue_size = max(1, settings.get("queue_size", self.queue_size))
+        self.max_progress_rate = settings.get("max_progress_rate", self.max_progress_rate)
+        # Applies to logs started from now on
+        self.replay_buffer_size = max(1, settings.get("replay_buffer_size", self.replay_buffer_size))
+        self.replay_evaluations = max(1, settings.get("replay_evaluations", self.replay_evaluations))
+
+    async def connect(self, websocket: WebSocket, channels: Optional[Iterable[str]] = None):
+        await websocket.accept()
+        client = _Client(websocket, channels or [ALL_CHANNELS])
+        self._clients[websocket] = client
+        client.tasks = [
+            asyncio.create_task(self._writer(client)),
+            asyncio.create_task(self._heartbeat(client))
+        ]
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client is not None:
+            for task in client.tasks:
+                task.cancel()
+
+    def subscribe(self, websocket: WebSocket, channels: Iterable[str]) -> List[str]:
+        client = self._clients.get(websocket)
+        if client is None:
+            return []
+        client.channels.update(channels)
+        return sorted(client.channels)
+
+    def unsubscribe(self, websocket: WebSocket, channels: Iterable[str]) -> List[str]:
+        client = self._clients.get(websocket)
+        if client is None:
+            return []
+        client.channels.difference_update(channels)
+        return sorted(client.channels)
+
+    async def _heartbeat(self, client: _Client):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self._enqueue(client, {"type": "ping"})
+
+    async def _writer(self, client: _Client):
+        websocket = client.websocket
+        try:
+            while True:
+                while not client.queue:
+                    client.ready.clear()
+                    await client.ready.wait()
+                message = client.queue.popleft()
+                await asyncio.wait_for(websocket.send_json(message), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            reason = "send timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.warning(f"Disconnecting websocket client: {reason}")
+            self._clients.pop(websocket, None)
+            client.tasks[1].cancel()
+            try:
+                await asyncio.wait_for(websocket.close(code=1013), self.send_timeout)
+            except Exception:
+                pass
+
+    def _enqueue(self, client: _Client, message: Dict[str, Any]):
+        queue = client.queue
+        if len(queue) < self.queue_size:
+            queue.append(message)
+        elif is_progress(message):
+            key = progress_key(message)
+            for index in range(len(queue) - 1, -1, -1):
+                if is_progress(queue[index]) and progress_key(queue[index]) == key:
+                    queue[index] = coalesce(queue[index], message)
+                    client.coalesced += 1
+                    break
+            else:
+                client.dropped += 1
+                return
+        elif self._make_room(client):
+            queue.append(message)
+        else:
+            client.dropped += 1
+            logger.warning("Websocket client queue is full, dropping message")
+            return
+        client.ready.set()
+
+    def _make_room(self, client: _Client) -> bool:
+        # Lifecycle events get a slot by folding the oldest progress into a later one for the
+        # same evaluation, or failing that, by dropping it
+        queue = client.queue
+        progress = [index for index, queued in enumerate(queue) if is_progress(queued)]
+        if not progress:
+            return False
+        oldest = queue[progress[0]]
+        key = progress_key(oldest)
+        for index in progress[1:]:
+            if progress_key(queue[index]) == key:
+                queue[index] = coalesce(oldest, queue[index])
+                client.coalesced += 1
+                break
+        else:
+            client.dropped += 1
+        del queue[progress[0]]
+        return True
+
+    def _deliver(self, message: Dict[str, Any]):
+        channels = message_channels(message)
+        for client in list(self._clients.values()):
+            if client.wants(channels):
+                self._enqueue(client, message)
+
+    def _flush(self, key: str):
+        handle = self._flush_handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        message = self._pending.pop(key, None)
+        if message is not None:
+            self._last_sent[key] = asyncio.get_running_loop().time()
+            self._deliver(message)
+
+    def _record(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        evaluation_id = message_evaluation_id(message)
+        if evaluation_id is None:
+            return message
+
+        log = self._logs.get(evaluation_id)
+        if log is None:
+            log = self._logs[evaluation_id] = _EventLog(self.replay_buffer_size)
+            if len(self._logs) > self.replay_evaluations:
+                # Forget finished evaluations first; a running one would restart its numbering
+                evicted = next((key for key, kept in self._logs.items() if kept.finished), next(iter(self._logs)))
+                del self._logs[evicted]
+        else:
+            self._logs.move_to_end(evaluation_id)
+
+        log.seq += 1
+        message = {**message, "seq": log.seq}
+        if message.get("current_result"):
+            message["current_result"] = {**message["current_result"], "seq": log.seq}
+        log.events.append(message)
+        if message.get("stage") in ("completed", "cancelled") or message.get("status") == "error":
+            log.finished = True
+        return message
+
+    def replay(self, websocket: WebSocket, evaluation_id: int, since: int):
+        """Queue the evaluation's events after seq since for one client, then a "replay" marker.
+
+        The marker's "complete" is false when some of those events are no longer
+        kept, in which case the client has to reload the evaluation's results.
+        """
+        client = self._clients.get(websocket)
+        if client is None:
+            return
+        log = self._logs.get(evaluation_id)
+        if log is None or since > log.seq or (log.events and log.events[0]["seq"] > since + 1):
+            self._enqueue(client, {"type": "replay", "evaluation_id": evaluation_id, "complete": False})
+            return
+
+        progress = None
+        for event in log.events:
+            if event["seq"] <= since:
+                continue
+            if is_progress(event):
+                progress = coalesce(progress, event) if progress else event
+                continue
+            if progress:
+                self._enqueue(client, progress)
+                progress = None
+            self._enqueue(client, event)
+        if progress:
+            self._enqueue(client, progress)
+        self._enqueue(client, {"type": "replay", "evaluation_id": evaluation_id, "complete": True, "seq": log.seq})
+
+    async def broadcast(self, message: Dict[str, Any]):
+        message = self._record(message)
+        if not is_progress(message):
+            # Throttled progress goes out first, so it never arrives after a completion
+            channels = message_channels(message)
+            for key, pending in list(self._pending.items()):
+                if message_channels(pending) & channels:
+                    self._flush(key)
+            for channel in channels:
+                self._last_sent.pop(channel, None)
+            self._deliver(message)
+            return
+
+        if not self.max_progress_rate:
+            self._deliver(message)
+            return
+
+        key = progress_key(message)
+        if key in self._pending:
+            self._pending[key] = coalesce(self._pending[key], message)
+            return
+        loop = asyncio.get_running_loop()
+        next_send = self._last_sent.get(key, float("-inf")) + 1 / self.max_progress_rate
+        if loop.time() < next_send:
+            self._pending[key] = message
+            self._flush_handles[key] = loop.call_at(next_send, self._flush, key)
+            return
+        if len(self._last_sent) > 1000:
+            # Runs that failed as a whole never sent a completion for their evaluation
+            self._last_sent = {k: t for k, t in self._last_sent.items() if loop.time() - t < 60}
+        self._last_sent[key] = loop.time()
+        self._deliver(message)
+
+    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._enqueue(client, message)
+
+    def stats(self) -> dict:
+        return {
+            "clients": [
+                {
+                    "channels": sorted(client.channels),
+                    "queued": len(client.queue),
+                    "coalesced": client.coalesced,
+                    "dropped": client.dropped
+                }
+                for client in self._clients.values()
+            ],
+            "throttled_channels": len(self._pending),
+            "replay_logs": len(self._logs),
+            "send_timeout": self.send_timeout,
+            "queue_size": self.queue_size,
+            "max_progress_rate": self.max_progress_rate
+        }
+
+manager = ConnectionManager()
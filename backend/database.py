@@ -1,120 +1,47 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, String, Text, text, CheckConstraint, select, event, Float
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import ForeignKey, String, Text, text, CheckConstraint, select, event, Float, Index, inspect
 from datetime import datetime
 import os
-from typing import List, AsyncGenerator
-import shutil
+from typing import List, AsyncGenerator, Iterator, Optional, Sequence
 from pathlib import Path
-import json
 import logging
+import asyncio
 from contextlib import asynccontextmanager
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from backup import BackupManager
+from update_test_cases import file_format, read_test_cases, sync_test_cases
 
 logger = logging.getLogger(__name__)
 
-# START MIGATION SCRIPT
-async def migrate_database():
-    """Recreate tables with new schema while preserving data"""
-    logger.info("Starting database migration")
-    
-    async with engine.begin() as conn:
-        try:
-            # First backup existing data
-            eval_data = await conn.execute(text("SELECT * FROM evaluations"))
-            evaluations = eval_data.fetchall()
-            
-            result_data = await conn.execute(text("SELECT * FROM evaluation_results"))
-            eval_results = result_data.fetchall()
-            
-            # Drop existing tables
-            await conn.execute(text("DROP TABLE IF EXISTS evaluation_results"))
-            await conn.execute(text("DROP TABLE IF EXISTS evaluations"))
-            
-            # Create new tables with updated schema
-            await conn.execute(text("""
-                CREATE TABLE evaluations (
-                    id INTEGER NOT NULL PRIMARY KEY,
-                    evaluation_type_id INTEGER NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    system_prompt TEXT NOT NULL,
-                    model_name VARCHAR NOT NULL,
-                    scoring_model VARCHAR NOT NULL,
-                    total_tokens INTEGER NOT NULL DEFAULT 0,
-                    total_cost FLOAT NOT NULL DEFAULT 0.0,
-                    FOREIGN KEY(evaluation_type_id) REFERENCES evaluation_types (id)
-                )
-            """))
-            
-            await conn.execute(text("""
-                CREATE TABLE evaluation_results (
-                    id INTEGER NOT NULL PRIMARY KEY,
-                    evaluation_id INTEGER NOT NULL,
-                    test_case_id INTEGER NOT NULL,
-                    output TEXT NOT NULL,
-                    result VARCHAR NOT NULL,
-                    explanation TEXT,
-                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
-                    response_tokens INTEGER NOT NULL DEFAULT 0,
-                    evaluation_cost FLOAT NOT NULL DEFAULT 0.0,
-                    scoring_cost FLOAT NOT NULL DEFAULT 0.0,
-                    FOREIGN KEY(evaluation_id) REFERENCES evaluations (id),
-                    FOREIGN KEY(test_case_id) REFERENCES test_cases (id),
-                    CONSTRAINT valid_result CHECK (result IN ('pass', 'fail'))
-                )
-            """))
-            
-            # Restore evaluations data with default values for new fields
-            for eval in evaluations:
-                await conn.execute(
-                    text("""
-                        INSERT INTO evaluations 
-                        (id, evaluation_type_id, timestamp, system_prompt, model_name, scoring_model, total_tokens, total_cost)
-                        VALUES (:id, :type_id, :timestamp, :prompt, :model, :scoring_model, :tokens, :cost)
-                    """),
-                    {
-                        "id": eval[0],
-                        "type_id": eval[1],
-                        "timestamp": eval[2],
-                        "prompt": eval[3],
-                        "model": eval[4],
-                        "scoring_model": "gpt-4o-mini",  # Default value for existing records
-                        "tokens": eval[5] if len(eval) > 5 else 0,
-                        "cost": 0.0
-                    }
-                )
-            
-            # Restore evaluation results data with default values for new fields
-            for result in eval_results:
-                await conn.execute(
-                    text("""
-                        INSERT INTO evaluation_results 
-                        (id, evaluation_id, test_case_id, output, result, explanation, 
-                         prompt_tokens, response_tokens, evaluation_cost, scoring_cost)
-                        VALUES (:id, :eval_id, :case_id, :output, :result, :explanation,
-                                :prompt_tokens, :response_tokens, :eval_cost, :score_cost)
-                    """),
-                    {
-                        "id": result[0],
-                        "eval_id": result[1],
-                        "case_id": result[2],
-                        "output": result[3],
-                        "result": result[4],
-                        "explanation": result[5],
-                        "prompt_tokens": result[6] if len(result) > 6 else 0,
-                        "response_tokens": result[7] if len(result) > 7 else 0,
-                        "eval_cost": 0.0,
-                        "score_cost": 0.0
-                    }
-                )
-            
-            logger.info("Database migration completed successfully")
-            
-        except Exception as e:
-            logger.error(f"Migration failed: {e}")
-            raise DatabaseConnectionError(f"Migration failed: {str(e)}") from e
-# END MIGRATION SCRIPT
-
-DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(os.path.dirname(__file__), '..', 'data', 'llm_eval.db')}"
+DATABASE_URL = os.getenv(
+    "LLM_EVAL_DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(os.path.dirname(__file__), '..', 'data', 'llm_eval.db')}"
+)
+DATABASE_PATH = Path(DATABASE_URL.replace('sqlite+aiosqlite:///', ''))
+
+# Applied to every connection the engine opens. WAL lets readers run alongside the
+# result writer, and synchronous=NORMAL is durable across application crashes in WAL
+# mode (only an OS crash can lose the last commits).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -64000,  # KiB, i.e. 64 MB of page cache per connection
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY"
+}
+
+# Keeps each statement well under SQLite's bound-parameter limit
+WRITE_CHUNK_SIZE = 500
+
+def chunked(items: Sequence, size: int = WRITE_CHUNK_SIZE) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class DatabaseConnectionError(Exception):
     pass
@@ -137,7 +64,7 @@ class EvaluationType(Base):
 class Criterion(Base):
     __tablename__ = "criteria"
     id: Mapped[int] = mapped_column(primary_key=True)
-    evaluation_type_id: Mapped[int] = mapped_column(ForeignKey("evaluation_types.id"))
+    evaluation_type_id: Mapped[int] = mapped_column(ForeignKey("evaluation_types.id"), index=True)
     name: Mapped[str] = mapped_column(String)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     evaluation_type: Mapped[EvaluationType] = relationship(back_populates="criteria")
@@ -148,12 +75,41 @@ class TestCase(Base):
     __tablename__ = "test_cases"
     id: Mapped[int] = mapped_column(primary_key=True)
     evaluation_type_id: Mapped[int] = mapped_column(ForeignKey("evaluation_types.id"))
-    criterion_id: Mapped[int] = mapped_column(ForeignKey("criteria.id"))
+    criterion_id: Mapped[int] = mapped_column(ForeignKey("criteria.id"), index=True)
     input: Mapped[str] = mapped_column(Text)
     description: Mapped[str] = mapped_column(Text, nullable=True)
+    # Current revision of the content; update_test_cases.py bumps it when the hash changes
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Set when the case is removed from the suite; retired cases keep their results but aren't run
+    retired_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     evaluation_type: Mapped[EvaluationType] = relationship(back_populates="test_cases")
     criterion: Mapped[Criterion] = relationship(back_populates="test_cases")
     evaluation_results: Mapped[List["EvaluationResult"]] = relationship(back_populates="test_case")
+    token_counts: Mapped[List["TestCaseTokenCount"]] = relationship(back_populates="test_case", cascade="all, delete-orphan")
+    versions: Mapped[List["TestCaseVersion"]] = relationship(back_populates="test_case", cascade="all, delete-orphan")
+
+class TestCaseVersion(Base):
+    """The content of a test case as of one version, kept so results show the text they were scored on."""
+    __tablename__ = "test_case_versions"
+    test_case_id: Mapped[int] = mapped_column(ForeignKey("test_cases.id"), primary_key=True)
+    version: Mapped[int] = mapped_column(primary_key=True)
+    criterion_id: Mapped[int] = mapped_column(ForeignKey("criteria.id"))
+    input: Mapped[str] = mapped_column(Text)
+    description: Mapped[str] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[str] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    test_case: Mapped[TestCase] = relationship(back_populates="versions")
+
+class TestCaseTokenCount(Base):
+    """Input token count of a test case for one tokenizer encoding."""
+    __tablename__ = "test_case_token_counts"
+    test_case_id: Mapped[int] = mapped_column(ForeignKey("test_cases.id"), primary_key=True)
+    encoding: Mapped[str] = mapped_column(String, primary_key=True)
+    # Hash of the input the count was computed from, so edited test cases get recounted
+    input_hash: Mapped[str] = mapped_column(String)
+    token_count: Mapped[int] = mapped_column()
+    test_case: Mapped[TestCase] = relationship(back_populates="token_counts")
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
@@ -165,14 +121,33 @@ class Evaluation(Base):
     scoring_model: Mapped[str] = mapped_column(String)
     total_tokens: Mapped[int] = mapped_column(default=0)
     total_cost: Mapped[float] = mapped_column(Float, default=0.0)
+    status: Mapped[str] = mapped_column(String, default="completed")
+    parent_evaluation_id: Mapped[Optional[int]] = mapped_column(ForeignKey("evaluations.id"), nullable=True)
+    scoring_prompt_template: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    sweep_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # Bumped by every ORM or Core update, so clients can fetch only what changed
+    updated_at: Mapped[Optional[datetime]] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     evaluation_type: Mapped[EvaluationType] = relationship(back_populates="evaluations")
     results: Mapped[List["EvaluationResult"]] = relationship(back_populates="evaluation", cascade="all, delete-orphan")
 
+class EvaluationSummary(Base):
+    """Per-criterion pass count, result count and cost of an evaluation.
+
+    Kept up to date by ResultWriter in the same transaction as the results.
+    """
+    __tablename__ = "evaluation_summaries"
+    evaluation_id: Mapped[int] = mapped_column(ForeignKey("evaluations.id"), primary_key=True)
+    criterion_id: Mapped[int] = mapped_column(ForeignKey("criteria.id"), primary_key=True)
+    pass_count: Mapped[int] = mapped_column(default=0)
+    total_count: Mapped[int] = mapped_column(default=0)
+    total_cost: Mapped[float] = mapped_column(Float, default=0.0)
+
 class EvaluationResult(Base):
     __tablename__ = "evaluation_results"
     id: Mapped[int] = mapped_column(primary_key=True)
     evaluation_id: Mapped[int] = mapped_column(ForeignKey("evaluations.id"))
     test_case_id: Mapped[int] = mapped_column(ForeignKey("test_cases.id"))
+    test_case_version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
     output: Mapped[str] = mapped_column(Text)
     result: Mapped[str] = mapped_column(String)
     explanation: Mapped[str] = mapped_column(Text, nullable=True)
@@ -182,9 +157,54 @@ class EvaluationResult(Base):
     scoring_cost: Mapped[float] = mapped_column(Float, default=0.0)
     evaluation: Mapped[Evaluation] = relationship(back_populates="results")
     test_case: Mapped[TestCase] = relationship(back_populates="evaluation_results")
-    __table_args__ = (CheckConstraint("result IN ('pass', 'fail')", name="valid_result"),)
+    __table_args__ = (
+        CheckConstraint("result IN ('pass', 'fail')", name="valid_result"),
+        # Serves lookups by evaluation alone as well as by (evaluation, test case),
+        # and keeps concurrent runs from storing a test case twice
+        Index("ix_evaluation_results_evaluation_id_test_case_id", "evaluation_id", "test_case_id", unique=True)
+    )
+
+class CompletionCacheEntry(Base):
+    __tablename__ = "completion_cache"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    provider: Mapped[str] = mapped_column(String)
+    model: Mapped[str] = mapped_column(String)
+    response: Mapped[str] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
+    last_used_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
+    hit_count: Mapped[int] = mapped_column(default=0)
+
+class EvaluationJob(Base):
+    __tablename__ = "evaluation_jobs"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String, default="evaluate")
+    status: Mapped[str] = mapped_column(String, default="queued", index=True)
+    payload: Mapped[str] = mapped_column(Text)
+    evaluation_id: Mapped[Optional[int]] = mapped_column(ForeignKey("evaluations.id"), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # JSON outcome of jobs that don't produce an evaluation
+    result: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')",
+            name="valid_job_status"
+        ),
+    )
+
+# aiosqlite engines default to NullPool, which would reopen the file (and rerun the
+# pragmas) for every session; keeping connections open is what makes WAL commits cheap
+engine = create_async_engine(DATABASE_URL, poolclass=AsyncAdaptedQueuePool, pool_size=5, max_overflow=15)
+
+@event.listens_for(engine.sync_engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
 
-engine = create_async_engine(DATABASE_URL)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 @asynccontextmanager
@@ -206,78 +226,75 @@ async def init_db():
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created successfully")
 
-async def backup_database():
-    db_path = Path(DATABASE_URL.replace('sqlite+aiosqlite:///', ''))
-    if db_path.exists():
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = db_path.parent / f"llm_eval_backup_{timestamp}.db"
-        shutil.copy2(db_path, backup_path)
-        logger.info(f"Created database backup: {backup_path}")
-        return backup_path
-    logger.warning("No database file found to backup")
-    return None
+backup_manager = BackupManager(DATABASE_PATH)
+
+async def backup_database(reason: str = "manual"):
+    return await backup_manager.create(reason)
 
 async def init_speech_to_text_eval():
     logger.info("Initializing speech-to-text evaluation")
     async with async_session_maker() as session:
-        eval_type = EvaluationType(
+        session.add(EvaluationType(
             name="speech_to_text",
             description="Evaluation of speech-to-text transcription optimization"
-        )
-        session.add(eval_type)
-        await session.flush()
-        
-        test_cases_path = Path(__file__).parent / "evaluation_test_cases.json"
-        with open(test_cases_path) as f:
-            test_data = json.load(f)
-        
-        criteria_map = {}
-        unique_criteria = {case["criterion"] for case in test_data["test_cases"]}
-        
-        for criterion_name in unique_criteria:
-            criterion = Criterion(
-                evaluation_type_id=eval_type.id,
-                name=criterion_name,
-                description=snake_to_title_case(criterion_name)
-            )
-            session.add(criterion)
-            await session.flush()
-            criteria_map[criterion_name] = criterion
-            logger.info(f"Created criterion: {criterion_name}")
-        
-        for case in test_data["test_cases"]:
-            test_case = TestCase(
-                evaluation_type_id=eval_type.id,
-                criterion_id=criteria_map[case["criterion"]].id,
-                input=case["input"],
-                description=case["description"]
-            )
-            session.add(test_case)
-        
+        ))
         await session.commit()
-        logger.info("Speech-to-text evaluation initialized successfully")
+
+    # Seeded by the same streaming sync as later updates, so every case starts at version 1 with its hash
+    test_cases_path = Path(__file__).parent / "evaluation_test_cases.json"
+
+    def seed():
+        with open(test_cases_path, "r", encoding="utf-8") as f:
+            return sync_test_cases(DATABASE_PATH, read_test_cases(f, file_format(test_cases_path)))
+
+    counts = await asyncio.to_thread(seed)
+    for message in counts["errors"]:
+        logger.warning(f"Skipped while seeding: {message}")
+    logger.info(f"Speech-to-text evaluation initialized with {counts['added']} test cases")
+
+# Every database created before versioned migrations has this schema
+BASELINE_REVISION = "0001"
+
+def alembic_config(connection=None) -> AlembicConfig:
+    backend_dir = Path(__file__).parent
+    config = AlembicConfig(str(backend_dir / "alembic.ini"))
+    config.set_main_option("script_location", str(backend_dir / "migrations"))
+    config.attributes["connection"] = connection
+    return config
+
+def _schema_state(connection):
+    current = MigrationContext.configure(connection).get_current_revision()
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    return current, head, inspect(connection).has_table("evaluations")
+
+def _upgrade_schema(connection, stamp_baseline: bool):
+    config = alembic_config(connection)
+    if stamp_baseline:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
 
 async def verify_database():
+    """Bring the schema up to the latest migration and seed an empty database.
+
+    A database that is already at the latest revision only costs a version check.
+    """
     logger.info("Verifying database")
-    db_path = Path(DATABASE_URL.replace('sqlite+aiosqlite:///', ''))
-    needs_migration = False
-
-    if not db_path.exists():
-        logger.info("Database file not found, creating new database")
-        await init_db()
-        await init_speech_to_text_eval()
-        logger.info("Initialized new database with speech-to-text evaluation")
-    else:
-        logger.info("Existing database found, creating backup")
-        await backup_database()
-        needs_migration = True
-        
     try:
-        if needs_migration:
-            logger.info("Starting database migration...")
-            await migrate_database()
+        async with engine.connect() as conn:
+            current, head, has_tables = await conn.run_sync(_schema_state)
+
+        if current == head:
+            logger.info(f"Database schema is up to date (revision {head})")
+        else:
+            unversioned = current is None and has_tables
+            if has_tables:
+                logger.info("Database schema is out of date, creating backup before migrating")
+                await backup_database("migration")
+            logger.info(f"Migrating database schema from {current or ('baseline' if unversioned else 'empty')} to {head}")
+            async with engine.begin() as conn:
+                await conn.run_sync(_upgrade_schema, unversioned)
             logger.info("Database migration completed")
-        
+
         async with async_session_maker() as session:
             result = await session.execute(select(EvaluationType))
             if not result.scalars().first():
@@ -287,4 +304,4 @@ async def verify_database():
                 logger.info("Database verification completed successfully")
     except Exception as e:
         logger.error(f"Database verification failed: {e}")
-        raise DatabaseConnectionError(f"Database verification failed: {str(e)}") from e
\ No newline at end of file
+        raise DatabaseConnectionError(f"Database verification failed: {str(e)}") from e
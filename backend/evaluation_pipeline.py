@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+Outcome = Dict[str, Any]
+
+_DONE = object()
+
+async def _run_stage(
+    name: str,
+    workers: int,
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue,
+    downstream_workers: int,
+    handler: Callable[[Outcome], Awaitable[Dict[str, Any]]]
+):
+    async def worker():
+        while True:
+            outcome = await inbox.get()
+            if outcome is _DONE:
+                return
+            # Failed outcomes skip the remaining stages but still reach persistence
+            if "error" not in outcome:
+                try:
+                    outcome.update(await handler(outcome))
+                except Exception as e:
+                    logger.error(f"Error in {name} stage for item {outcome['item']!r}: {e}")
+                    outcome["error"] = str(e)
+            await outbox.put(outcome)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    for _ in range(downstream_workers):
+        await outbox.put(_DONE)
+
+async def _run_persistence(
+    inbox: asyncio.Queue,
+    persist: Callable[[Outcome], Awaitable[None]],
+    report: Optional[Callable[[Outcome], Awaitable[None]]]
+):
+    # A single consumer, so persist() never runs concurrently with itself
+    while True:
+        outcome = await inbox.get()
+        if outcome is _DONE:
+            return
+        if report:
+            await report(outcome)
+        await persist(outcome)
+
+async def run_pipeline(
+    items: Iterable[Any],
+    generate: Callable[[Outcome], Awaitable[Dict[str, Any]]],
+    score: Callable[[Outcome], Awaitable[Dict[str, Any]]],
+    persist: Callable[[Outcome], Awaitable[None]],
+    generation_workers: int = 4,
+    scoring_workers: int = 4,
+    report: Optional[Callable[[Outcome], Awaitable[None]]] = None
+):
+    """Run items through generate -> score -> persist stages connected by queues.
+
+    Each item travels as an outcome dict ({"item": item, ...}) that every stage
+    extends with its own fields; a stage failure sets outcome["error"].
+    Batching writes is up to persist(), e.g. by handing rows to a ResultWriter.
+    """
+    generation_workers = max(1, generation_workers)
+    scoring_workers = max(1, scoring_workers)
+
+    generation_queue: asyncio.Queue = asyncio.Queue()
+    scoring_queue: asyncio.Queue = asyncio.Queue(maxsize=scoring_workers * 2)
+    persistence_queue: asyncio.Queue = asyncio.Queue(maxsize=scoring_workers * 2)
+
+    for item in items:
+        generation_queue.put_nowait({"item": item})
+    for _ in range(generation_workers):
+        generation_queue.put_nowait(_DONE)
+
+    tasks = [
+        asyncio.create_task(_run_stage(
+            "generation", generation_workers, generation_queue, scoring_queue, scoring_workers, generate
+        )),
+        asyncio.create_task(_run_stage(
+            "scoring", scoring_workers, scoring_queue, persistence_queue, 1, score
+        )),
+        asyncio.create_task(_run_persistence(persistence_queue, persist, report))
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
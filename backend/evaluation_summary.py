@@ -0,0 +1,106 @@
+"""Maintain evaluation_summaries, the per-criterion totals read by trend queries.
+
+Backfill summaries for evaluations written before the table existed (or
+rebuild all of them from evaluation_results):
+
+    python evaluation_summary.py [--rebuild]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict
+
+from sqlalchemy import select, delete, exists, func, and_
+from sqlalchemy.dialects.sqlite import insert
+
+from database import chunked, get_async_session, Evaluation, EvaluationResult, EvaluationSummary, TestCase, TestCaseVersion
+
+logger = logging.getLogger(__name__)
+
+SummaryDeltas = Dict[int, Dict[str, float]]
+
+def add_summary_delta(deltas: SummaryDeltas, criterion_id: int, result: str, cost: float):
+    delta = deltas.setdefault(criterion_id, {"pass_count": 0, "total_count": 0, "total_cost": 0.0})
+    delta["total_count"] += 1
+    delta["total_cost"] += cost
+    if result == "pass":
+        delta["pass_count"] += 1
+
+def merge_summary_deltas(target: SummaryDeltas, source: SummaryDeltas):
+    for criterion_id, delta in source.items():
+        existing = target.setdefault(criterion_id, {"pass_count": 0, "total_count": 0, "total_cost": 0.0})
+        for key, value in delta.items():
+            existing[key] += value
+
+async def apply_summary_deltas(session, evaluation_id: int, deltas: SummaryDeltas):
+    """Add a batch's counts to the evaluation's summary rows, inside the caller's transaction."""
+    if not deltas:
+        return
+    stmt = insert(EvaluationSummary).values([
+        {"evaluation_id": evaluation_id, "criterion_id": criterion_id, **delta}
+        for criterion_id, delta in deltas.items()
+    ])
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[EvaluationSummary.evaluation_id, EvaluationSummary.criterion_id],
+        set_={
+            "pass_count": EvaluationSummary.pass_count + stmt.excluded.pass_count,
+            "total_count": EvaluationSummary.total_count + stmt.excluded.total_count,
+            "total_cost": EvaluationSummary.total_cost + stmt.excluded.total_cost
+        }
+    ))
+
+async def backfill_evaluation_summaries(rebuild: bool = False) -> int:
+    """Compute summaries from evaluation_results for evaluations that have none.
+
+    With rebuild, every summary is dropped and recomputed. Returns the number
+    of summary rows written.
+    """
+    # Results count towards the criterion of the test case version they were scored on
+    criterion_id = func.coalesce(TestCaseVersion.criterion_id, TestCase.criterion_id)
+    aggregates = (
+        select(
+            EvaluationResult.evaluation_id,
+            criterion_id,
+            func.count(EvaluationResult.id).filter(EvaluationResult.result == "pass"),
+            func.count(EvaluationResult.id),
+            func.coalesce(func.sum(EvaluationResult.evaluation_cost + EvaluationResult.scoring_cost), 0.0)
+        )
+        .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+        .outerjoin(TestCaseVersion, and_(
+            TestCaseVersion.test_case_id == EvaluationResult.test_case_id,
+            TestCaseVersion.version == EvaluationResult.test_case_version
+        ))
+        .group_by(EvaluationResult.evaluation_id, criterion_id)
+    )
+
+    async with get_async_session() as session:
+        if rebuild:
+            await session.execute(delete(EvaluationSummary))
+        # Summaries are written together with their results, so a summarized evaluation is complete
+        evaluation_ids = (await session.scalars(
+            select(Evaluation.id).where(
+                ~exists().where(EvaluationSummary.evaluation_id == Evaluation.id)
+            )
+        )).all()
+
+        written = 0
+        for chunk in chunked(evaluation_ids):
+            result = await session.execute(
+                insert(EvaluationSummary).from_select(
+                    ["evaluation_id", "criterion_id", "pass_count", "total_count", "total_cost"],
+                    aggregates.where(EvaluationResult.evaluation_id.in_(chunk))
+                )
+            )
+            written += result.rowcount
+
+    if written:
+        logger.info(f"Backfilled {written} evaluation summary rows")
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="recompute every summary, not just missing ones")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    rows = asyncio.run(backfill_evaluation_summaries(args.rebuild))
+    print(f"Wrote {rows} summary rows")
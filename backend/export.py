@@ -0,0 +1,235 @@
+"""Export evaluation results as NDJSON, CSV or Parquet.
+
+Rows are read through a server-side cursor a batch at a time and encoded
+as they arrive, so memory stays flat however many results are exported.
+
+Write the results history to Parquet for analysis, either as one file or
+as a directory that each run appends only newer results to:
+
+    python export.py results.parquet [--model NAME] [--criterion NAME] [--result pass|fail]
+    python export.py results/ --append
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, and_, func, select
+
+from database import engine, Criterion, Evaluation, EvaluationResult, TestCase, TestCaseVersion
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+BATCH_SIZE = 1000
+# Each batch becomes one Parquet row group
+PARQUET_BATCH_SIZE = 20000
+# Columns with few distinct values, stored once per row group and referenced by index
+PARQUET_LABEL_COLUMNS = {"model_name", "scoring_model", "sweep_id", "criterion", "result"}
+
+def results_query(
+    evaluation_ids: Optional[Sequence[int]] = None,
+    after_result_id: Optional[int] = None,
+    sweep_id: Optional[str] = None,
+    model_name: Optional[str] = None,
+    criterion: Optional[str] = None,
+    result: Optional[str] = None
+) -> Select:
+    """One row per result, with its evaluation, test case version and criterion, in evaluation order.
+
+    Result ids only grow, so after_result_id picks up every result written
+    since an earlier export, including ones added to evaluations it already saw.
+    """
+    # Each result is exported with the test case version it was scored on
+    stmt = (
+        select(
+            EvaluationResult.id.label("result_id"),
+            EvaluationResult.evaluation_id,
+            Evaluation.timestamp.label("evaluation_timestamp"),
+            Evaluation.model_name,
+            Evaluation.scoring_model,
+            Evaluation.sweep_id,
+            EvaluationResult.test_case_id,
+            EvaluationResult.test_case_version,
+            Criterion.name.label("criterion"),
+            func.coalesce(TestCaseVersion.input, TestCase.input).label("input"),
+            func.coalesce(TestCaseVersion.description, TestCase.description).label("description"),
+            EvaluationResult.output,
+            EvaluationResult.result,
+            EvaluationResult.explanation,
+            EvaluationResult.prompt_tokens,
+            EvaluationResult.response_tokens,
+            EvaluationResult.evaluation_cost,
+            EvaluationResult.scoring_cost
+        )
+        .join(Evaluation, Evaluation.id == EvaluationResult.evaluation_id)
+        .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+        .outerjoin(TestCaseVersion, and_(
+            TestCaseVersion.test_case_id == EvaluationResult.test_case_id,
+            TestCaseVersion.version == EvaluationResult.test_case_version
+        ))
+        .join(Criterion, Criterion.id == func.coalesce(TestCaseVersion.criterion_id, TestCase.criterion_id))
+        .order_by(EvaluationResult.evaluation_id, EvaluationResult.test_case_id)
+    )
+    if evaluation_ids is not None:
+        stmt = stmt.where(EvaluationResult.evaluation_id.in_(evaluation_ids))
+    if after_result_id is not None:
+        stmt = stmt.where(EvaluationResult.id > after_result_id)
+    if sweep_id:
+        stmt = stmt.where(Evaluation.sweep_id == sweep_id)
+    if model_name:
+        stmt = stmt.where(Evaluation.model_name == model_name)
+    if criterion:
+        stmt = stmt.where(Criterion.name == criterion)
+    if result:
+        stmt = stmt.where(EvaluationResult.result == result)
+    return stmt
+
+EXPORT_COLUMNS: List[str] = [column.name for column in results_query().selected_columns]
+
+async def stream_result_batches(stmt: Select, batch_size: int = BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions(batch_size):
+            yield rows
+
+def _plain_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+async def encode_ndjson(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        yield "".join(json.dumps(_plain_row(row)) + "\n" for row in rows).encode("utf-8")
+
+async def encode_csv(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_plain_row(row) for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+def export_results(stmt: Select, export_format: str) -> AsyncIterator[bytes]:
+    encode = encode_csv if export_format == "csv" else encode_ndjson
+    return encode(stream_result_batches(stmt))
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+def parquet_schema(pa):
+    types = {
+        "result_id": pa.int64(),
+        "evaluation_id": pa.int64(),
+        "evaluation_timestamp": pa.timestamp("us"),
+        "test_case_id": pa.int64(),
+        "test_case_version": pa.int32(),
+        "prompt_tokens": pa.int64(),
+        "response_tokens": pa.int64(),
+        "evaluation_cost": pa.float64(),
+        "scoring_cost": pa.float64()
+    }
+    return pa.schema([
+        (name, pa.dictionary(pa.int32(), pa.string()) if name in PARQUET_LABEL_COLUMNS else types.get(name, pa.string()))
+        for name in EXPORT_COLUMNS
+    ])
+
+async def write_parquet(stmt: Select, path: Path, batch_size: int = PARQUET_BATCH_SIZE) -> Dict[str, Any]:
+    """Write the query's rows to a Parquet file, one record batch at a time.
+
+    Returns the number of rows and the lowest and highest result ids written,
+    which are also stored in the file's metadata.
+    """
+    pa, pq = _import_pyarrow()
+    schema = parquet_schema(pa)
+    written = {"rows": 0, "first_result_id": None, "last_result_id": None}
+
+    writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+
+    def write(rows):
+        columns = {name: [row[name] for row in rows] for name in EXPORT_COLUMNS}
+        writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+
+    try:
+        async for rows in stream_result_batches(stmt, batch_size):
+            # Encoding and compression run off the event loop while the next batch is read
+            await asyncio.to_thread(write, rows)
+            written["rows"] += len(rows)
+            # Rows are in evaluation order, not result id order
+            low, high = min(row["result_id"] for row in rows), max(row["result_id"] for row in rows)
+            written["first_result_id"] = low if written["first_result_id"] is None else min(written["first_result_id"], low)
+            written["last_result_id"] = max(written["last_result_id"] or 0, high)
+        writer.add_key_value_metadata({
+            key: str(value) for key, value in written.items() if key.endswith("result_id") and value is not None
+        })
+    finally:
+        writer.close()
+    return written
+
+def last_exported_result_id(directory: Path) -> int:
+    _, pq = _import_pyarrow()
+    last = 0
+    for part in directory.glob("part-*.parquet"):
+        metadata = pq.read_metadata(part).metadata or {}
+        last = max(last, int(metadata.get(b"last_result_id", 0)))
+    return last
+
+async def append_parquet(directory: Path, **filters) -> Dict[str, Any]:
+    """Add the results written since the directory's last export as a new part file."""
+    directory.mkdir(parents=True, exist_ok=True)
+    after_result_id = last_exported_result_id(directory)
+
+    # Dot files are skipped by Parquet readers, so a half-written part is never read
+    pending = directory / f".part-{uuid.uuid4().hex}.tmp"
+    try:
+        written = await write_parquet(results_query(after_result_id=after_result_id, **filters), pending)
+        if written["rows"]:
+            part = directory / f"part-{written['first_result_id']:010d}-{written['last_result_id']:010d}.parquet"
+            pending.rename(part)
+            written["path"] = str(part)
+    finally:
+        pending.unlink(missing_ok=True)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", type=Path, help="Parquet file to write, or directory with --append")
+    parser.add_argument("--append", action="store_true", help="add results newer than the last export as a new file in the directory")
+    parser.add_argument("--evaluation-ids", help="comma-separated evaluation ids")
+    parser.add_argument("--after-result-id", type=int, help="only results with a higher id")
+    parser.add_argument("--sweep-id")
+    parser.add_argument("--model", help="evaluated model name")
+    parser.add_argument("--criterion", help="criterion name")
+    parser.add_argument("--result", choices=["pass", "fail"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    filters = {
+        "evaluation_ids": [int(evaluation_id) for evaluation_id in args.evaluation_ids.split(",")] if args.evaluation_ids else None,
+        "sweep_id": args.sweep_id,
+        "model_name": args.model,
+        "criterion": args.criterion,
+        "result": args.result
+    }
+    if args.append:
+        if args.after_result_id is not None:
+            parser.error("--after-result-id is taken from the existing export with --append")
+        written = asyncio.run(append_parquet(args.output, **filters))
+    else:
+        written = asyncio.run(write_parquet(results_query(after_result_id=args.after_result_id, **filters), args.output))
+    if written["rows"]:
+        print(f"Wrote {written['rows']} results to {written.get('path', args.output)}")
+    else:
+        print("No results to export")
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_session, EvaluationJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobRunner:
+    def __init__(self, max_concurrent_jobs: int = 2):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self._slots = asyncio.Semaphore(max_concurrent_jobs)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.progress: Dict[int, Dict[str, Any]] = {}
+
+    def configure(self, settings: dict):
+        max_concurrent_jobs = max(1, settings.get("max_concurrent_jobs", 2))
+        # Jobs already holding a slot release it on the old semaphore
+        if max_concurrent_jobs != self.max_concurrent_jobs:
+            self.max_concurrent_jobs = max_concurrent_jobs
+            self._slots = asyncio.Semaphore(max_concurrent_jobs)
+
+    async def create_job(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        session: Optional[AsyncSession] = None,
+        evaluation_id: Optional[int] = None
+    ) -> int:
+        """Record a queued job, in the caller's transaction when a session is given."""
+        if session is None:
+            async with get_async_session() as session:
+                return await self.create_job(kind, payload, session, evaluation_id)
+        job = EvaluationJob(kind=kind, payload=json.dumps(payload), evaluation_id=evaluation_id)
+        session.add(job)
+        await session.flush()
+        return job.id
+
+    def submit(self, job_id: int, run: Callable[[int], Awaitable[Optional[int]]]):
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, run))
+
+    async def _update(self, job_id: int, **values):
+        async with get_async_session() as session:
+            await session.execute(
+                update(EvaluationJob).where(EvaluationJob.id == job_id).values(**values)
+            )
+
+    async def attach_evaluation(self, job_id: Optional[int], evaluation_id: int):
+        if job_id is not None:
+            await self._update(job_id, evaluation_id=evaluation_id)
+
+    async def set_result(self, job_id: Optional[int], result: Dict[str, Any]):
+        if job_id is not None:
+            await self._update(job_id, result=json.dumps(result))
+
+    async def _run(self, job_id: int, run: Callable[[int], Awaitable[Optional[int]]]):
+        try:
+            async with self._slots:
+                await self._update(job_id, status="running", started_at=datetime.utcnow())
+                evaluation_id = await run(job_id)
+            values = {"status": "completed", "finished_at": datetime.utcnow()}
+            if evaluation_id is not None:
+                values["evaluation_id"] = evaluation_id
+            await self._update(job_id, **values)
+        except asyncio.CancelledError:
+            logger.info(f"Job {job_id} cancelled")
+            await self._update(job_id, status="cancelled", finished_at=datetime.utcnow())
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Job {job_id} failed: {error}")
+            await self._update(job_id, status="failed", error=error, finished_at=datetime.utcnow())
+        finally:
+            self._tasks.pop(job_id, None)
+            self.progress.pop(job_id, None)
+
+    async def cancel(self, job_id: int) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    def _serialize(self, job: EvaluationJob) -> Dict[str, Any]:
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "request": json.loads(job.payload),
+            "evaluation_id": job.evaluation_id,
+            "error": job.error,
+            "result": json.loads(job.result) if job.result else None,
+            "created_at": job.created_at.isoformat(),
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "progress": self.progress.get(job.id)
+        }
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        async with get_async_session() as session:
+            job = await session.get(EvaluationJob, job_id)
+            return self._serialize(job) if job else None
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        async with get_async_session() as session:
+            stmt = select(EvaluationJob).order_by(EvaluationJob.id.desc()).limit(limit)
+            if status:
+                stmt = stmt.where(EvaluationJob.status == status)
+            result = await session.execute(stmt)
+            return [self._serialize(job) for job in result.scalars().all()]
+
+    async def recover_interrupted(self):
+        # Jobs that were queued or running when the server stopped have no task anymore
+        async with get_async_session() as session:
+            result = await session.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.status.in_(ACTIVE_STATUSES))
+                .values(status="failed", error="Interrupted by server restart", finished_at=datetime.utcnow())
+            )
+            if result.rowcount:
+                logger.warning(f"Marked {result.rowcount} interrupted jobs as failed")
+
+job_runner = JobRunner()
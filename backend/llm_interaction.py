@@ -1,40 +1,162 @@
 from fastapi import HTTPException
 from openai import AsyncOpenAI
-from anthropic import Anthropic
+import openai
+from anthropic import AsyncAnthropic
+import anthropic
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+import asyncio
+import logging
 import os
-import tiktoken
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
+from tokenizer import count_tokens
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 google_api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=google_api_key)
 
-def get_encoding(model: str):
+class RateLimitError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RateLimitExhausted(Exception):
+    """A call was still rate limited after every retry; callers shouldn't retry it again."""
+
+def _retry_after_from_headers(headers) -> Optional[float]:
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
     try:
-        return tiktoken.encoding_for_model(model)
-    except KeyError:
-        return tiktoken.get_encoding("cl100k_base")
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1):
+        # Requests larger than the bucket would never fit, so cap them at a full bucket
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.per_second)
+
+    def consume(self, amount: float):
+        # Charge usage learned after the fact; the bucket may go into debt
+        self._refill()
+        self._tokens -= amount
+
+    def block_for(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
 
-def count_tokens(text: str, model: str) -> int:
-    encoding = get_encoding(model)
-    return len(encoding.encode(text))
+class ModelRateLimiter:
+    def __init__(self, rpm: Optional[int], tpm: Optional[int]):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, rpm / 60) if rpm else None
+        self.tokens = TokenBucket(tpm, tpm / 60) if tpm else None
 
-async def openai_completion(model: str, messages: list, temperature: float):
+    async def acquire(self, prompt_tokens: int):
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens:
+            await self.tokens.acquire(prompt_tokens)
+
+    def record_response(self, response_tokens: int):
+        if self.tokens:
+            self.tokens.consume(response_tokens)
+
+    def block_for(self, seconds: float):
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.block_for(seconds)
+
+rate_limiters: Dict[str, ModelRateLimiter] = {}
+rate_limit_settings = {"max_retries": 5, "base_delay": 1.0, "max_delay": 60.0}
+
+def configure_rate_limits(config: dict):
+    limiters = {}
+    for models in config["models"].values():
+        for model, limits in models.items():
+            rpm, tpm = limits.get("rpm"), limits.get("tpm")
+            if not (rpm or tpm):
+                continue
+            # Keep the existing buckets on a config reload unless this model's limits changed
+            limiter = rate_limiters.get(model)
+            if limiter is None or (limiter.rpm, limiter.tpm) != (rpm, tpm):
+                limiter = ModelRateLimiter(rpm, tpm)
+            limiters[model] = limiter
+    rate_limiters.clear()
+    rate_limiters.update(limiters)
+    rate_limit_settings.update(config.get("rate_limit_settings", {}))
+
+def backoff_delay(attempt: int, base_delay: Optional[float] = None, max_delay: Optional[float] = None) -> float:
+    base_delay = rate_limit_settings["base_delay"] if base_delay is None else base_delay
+    max_delay = rate_limit_settings["max_delay"] if max_delay is None else max_delay
+    # Exponential backoff with "equal jitter": at least half the ceiling, at most all of it
+    ceiling = min(max_delay, base_delay * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+async def openai_completion(model: str, messages: list, temperature: float, json_response: bool = False):
     try:
+        extra_args = {"response_format": {"type": "json_object"}} if json_response else {}
         response = await openai_client.chat.completions.create(
             model=model,
             messages=messages,
-            temperature=temperature
+            temperature=temperature,
+            **extra_args
         )
         return response.choices[0].message.content
+    except openai.RateLimitError as e:
+        raise RateLimitError(f"OpenAI rate limit: {str(e)}", _retry_after_from_headers(e.response.headers)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
 
-async def anthropic_completion(model: str, messages: list, temperature: float):
+async def anthropic_completion(model: str, messages: list, temperature: float, json_response: bool = False):
+    # Anthropic has no JSON response mode; callers ask for JSON in the prompt
     formatted_messages = []
     system_content = ""
     
@@ -59,47 +181,73 @@ async def anthropic_completion(model: str, messages: list, temperature: float):
         formatted_messages.insert(0, {"role": "user", "content": system_content})
     
     try:
-        response = anthropic_client.messages.create(
+        response = await anthropic_client.messages.create(
             model=model,
             messages=formatted_messages,
             temperature=temperature,
             max_tokens=4096
         )
         return response.content[0].text
+    except anthropic.RateLimitError as e:
+        raise RateLimitError(f"Anthropic rate limit: {str(e)}", _retry_after_from_headers(e.response.headers)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Anthropic API error: {str(e)}")
 
-async def google_completion(model: str, messages: list, temperature: float):
+async def google_completion(model: str, messages: list, temperature: float, json_response: bool = False):
     try:
         model_instance = genai.GenerativeModel(model_name=model)
         prompt = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in messages])
+        extra_args = {"response_mime_type": "application/json"} if json_response else {}
         response = await model_instance.generate_content_async(
             prompt,
             generation_config=genai.GenerationConfig(
-                temperature=temperature
+                temperature=temperature,
+                **extra_args
             )
         )
         return response.text
+    except google_exceptions.ResourceExhausted as e:
+        raise RateLimitError(f"Google rate limit: {str(e)}") from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Google API error: {str(e)}")
 
-async def get_completion_for_provider(provider: str, model: str, messages: list, temperature: float):
+async def _provider_completion(provider: str, model: str, messages: list, temperature: float, json_response: bool = False):
     if provider == "OpenAI":
-        return await openai_completion(model, messages, temperature)
+        return await openai_completion(model, messages, temperature, json_response)
     elif provider == "Anthropic":
-        return await anthropic_completion(model, messages, temperature)
+        return await anthropic_completion(model, messages, temperature, json_response)
     elif provider == "Google":
-        return await google_completion(model, messages, temperature)
+        return await google_completion(model, messages, temperature, json_response)
     else:
         raise ValueError(f"Unsupported provider: {provider}")
 
-async def get_model_provider(model: str, config: dict) -> str:
-    for provider, models in config["models"].items():
-        if model in models:
-            return provider
-    raise ValueError(f"Model {model} not found in configuration")
+async def get_completion_for_provider(provider: str, model: str, messages: list, temperature: float, json_response: bool = False):
+    limiter = rate_limiters.get(model)
+    # System prompts repeat on every call, so their counts are memoized
+    prompt_tokens = sum(
+        count_tokens(msg["content"], model, memoize=msg["role"] == "system") for msg in messages
+    ) if limiter else 0
+    max_retries = rate_limit_settings["max_retries"]
+
+    for attempt in range(max_retries + 1):
+        if limiter:
+            await limiter.acquire(prompt_tokens)
+        try:
+            response = await _provider_completion(provider, model, messages, temperature, json_response)
+        except RateLimitError as e:
+            if attempt == max_retries:
+                raise RateLimitExhausted(f"Still rate limited on {model} after {max_retries} retries: {e}") from e
+            delay = backoff_delay(attempt)
+            if e.retry_after is not None:
+                delay = max(delay, e.retry_after)
+            logger.warning(f"Rate limited on {model}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            if limiter:
+                # Hold back every caller of this model, not just this one
+                limiter.block_for(delay)
+            else:
+                await asyncio.sleep(delay)
+            continue
 
-async def calculate_cost(tokens: int, model: str, token_type: str, config: dict) -> float:
-    provider = await get_model_provider(model, config)
-    cost_per_million = config["models"][provider][model][token_type]
-    return (tokens / 1_000_000) * cost_per_million
\ No newline at end of file
+        if limiter:
+            limiter.record_response(count_tokens(response or "", model))
+        return response
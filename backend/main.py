@@ -1,15 +1,22 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from sqlalchemy import select
+from sqlalchemy import select, update, func, and_, or_
 from sqlalchemy.orm import selectinload
 import os
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 import asyncio
-from typing import List, Dict, Any, Set, Optional
+import re
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 import tiktoken
 
 from database import (
@@ -17,20 +24,37 @@ from database import (
     EvaluationType, 
     Criterion, 
     TestCase, 
+    TestCaseVersion,
     Evaluation, 
     EvaluationResult,
+    EvaluationSummary,
     verify_database,
+    backup_database,
+    backup_manager,
     snake_to_title_case,
-    DatabaseConnectionError
+    DatabaseConnectionError,
+    DATABASE_PATH
 )
 
 from llm_interaction import (
     get_completion_for_provider,
-    get_model_provider,
-    calculate_cost,
-    count_tokens
+    count_tokens,
+    configure_rate_limits,
+    backoff_delay,
+    RateLimitExhausted
 )
 
+from evaluation_pipeline import run_pipeline
+from completion_cache import completion_cache
+from job_runner import job_runner
+from connection_manager import manager
+from result_writer import ResultWriter
+from tokenizer import tokenizer, load_input_token_counts
+from model_registry import model_registry
+from evaluation_summary import backfill_evaluation_summaries
+from update_test_cases import DEFAULT_EVALUATION_TYPE, read_test_cases, sync_test_cases
+from export import EXPORT_FORMATS, export_results, results_query, write_parquet
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -57,16 +81,56 @@ app.add_middleware(
 load_dotenv()
 
 config_path = os.path.join(os.path.dirname(__file__), "backend_config.json")
-with open(config_path, "r") as config_file:
-    config = json.load(config_file)
+config = model_registry.load_file(config_path)
 
 EVALUATION_MODEL = config.get("default_evaluation_model")
 SCORING_MODEL = config.get("default_scoring_model")
 
+provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def apply_config(new_config: dict):
+    """Apply a (re)loaded backend_config.json to every component that reads it."""
+    global EVALUATION_MODEL, SCORING_MODEL
+
+    if new_config.get("provider_concurrency") != config.get("provider_concurrency"):
+        # Requests already holding a slot finish on the old semaphore
+        provider_semaphores.clear()
+
+    # Update in place so code holding a reference to config sees the new values
+    config.clear()
+    config.update(new_config)
+
+    configure_rate_limits(config)
+    completion_cache.configure(config.get("completion_cache", {}))
+    job_runner.configure(config.get("jobs", {}))
+    tokenizer.configure(config.get("tokenizer", {}))
+    backup_manager.configure(config.get("backups", {}))
+    manager.configure(config.get("websocket", {}))
+
+    # Keep the current selection unless its model was removed
+    if EVALUATION_MODEL not in model_registry.models:
+        EVALUATION_MODEL = config.get("default_evaluation_model")
+    if SCORING_MODEL not in model_registry.models:
+        SCORING_MODEL = config.get("default_scoring_model")
+
+apply_config(dict(config))
+
 class SystemPrompt(BaseModel):
     prompt: str
     evaluation_model: Optional[str] = None
     scoring_model: Optional[str] = None
+    bypass_cache: bool = False
+
+class RescoreRequest(BaseModel):
+    scoring_model: str
+    evaluation_prompt_template: Optional[str] = None
+    bypass_cache: bool = False
+
+class SweepRequest(BaseModel):
+    prompts: List[str]
+    evaluation_models: List[str]
+    scoring_model: Optional[str] = None
+    bypass_cache: bool = False
 
 class TestCaseQuery(BaseModel):
     evaluation_id: int
@@ -77,55 +141,42 @@ class ModelSelection(BaseModel):
     evaluation_model: str
     scoring_model: str
 
-class ConnectionManager:
-    def __init__(self):
-        self._active_connections: Set[WebSocket] = set()
-        self._connection_tasks: Dict[WebSocket, asyncio.Task] = {}
-        self._heartbeat_interval = 30
-        
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self._active_connections.add(websocket)
-        self._connection_tasks[websocket] = asyncio.create_task(self._heartbeat(websocket))
-        
-    def disconnect(self, websocket: WebSocket):
-        self._active_connections.discard(websocket)
-        if websocket in self._connection_tasks:
-            self._connection_tasks[websocket].cancel()
-            del self._connection_tasks[websocket]
-        
-    async def _heartbeat(self, websocket: WebSocket):
-        try:
-            while True:
-                await asyncio.sleep(self._heartbeat_interval)
-                try:
-                    await websocket.send_json({"type": "ping"})
-                except Exception:
-                    self.disconnect(websocket)
-                    break
-        except asyncio.CancelledError:
-            pass
-            
-    async def broadcast(self, message: Dict[str, Any]):
-        disconnect_ws = set()
-        for websocket in self._active_connections:
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to websocket: {e}")
-                disconnect_ws.add(websocket)
-        
-        for ws in disconnect_ws:
-            self.disconnect(ws)
-            
-    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+def get_provider_semaphore(provider: str) -> asyncio.Semaphore:
+    if provider not in provider_semaphores:
+        limit = config.get("provider_concurrency", {}).get(provider, 1)
+        provider_semaphores[provider] = asyncio.Semaphore(max(1, limit))
+    return provider_semaphores[provider]
+
+async def limited_completion(
+    provider: str,
+    model: str,
+    messages: list,
+    temperature: float,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    json_response: bool = False
+) -> str:
+    cacheable = completion_cache.is_cacheable(temperature, bypass=not use_cache)
+    if cacheable:
+        cache_key = completion_cache.make_key(provider, model, messages, temperature, json_response)
+        # A refresh skips the lookup but still stores the new response
+        cached = None if refresh_cache else await completion_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Every evaluation shares the same per-provider cap
+    async with get_provider_semaphore(provider):
+        response = await get_completion_for_provider(
+            provider=provider,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            json_response=json_response
+        )
 
-manager = ConnectionManager()
+    if cacheable:
+        await completion_cache.put(cache_key, provider, model, response)
+    return response
 
 async def analyze_test_cases(session: Any) -> dict:
     for _ in range(3):
@@ -135,7 +186,7 @@ async def analyze_test_cases(session: Any) -> dict:
                 .options(selectinload(TestCase.criterion))
                 .join(Criterion)
                 .join(EvaluationType)
-                .where(EvaluationType.name == "speech_to_text")
+                .where(EvaluationType.name == "speech_to_text", TestCase.retired_at.is_(None))
             )
             
             result = await session.execute(stmt)
@@ -160,7 +211,7 @@ async def analyze_test_cases(session: Any) -> dict:
             logger.error(f"Error analyzing test cases: {e}", exc_info=True)
             if _ == 2:
                 raise HTTPException(status_code=500, detail=str(e))
-            await asyncio.sleep(1)
+            await asyncio.sleep(backoff_delay(_))
 
 @app.get("/test-case-details/{evaluation_id}/{test_case_id}")
 async def get_test_case_details(evaluation_id: int, test_case_id: int):
@@ -189,12 +240,27 @@ async def get_test_case_details(evaluation_id: int, test_case_id: int):
             
             if not eval_result:
                 raise HTTPException(status_code=404, detail="Evaluation result not found")
-            
+
+            # Show the content the result was scored on, which may differ from the current case
+            scored = await session.execute(
+                select(TestCaseVersion.input, TestCaseVersion.description, Criterion.name)
+                .join(Criterion, TestCaseVersion.criterion_id == Criterion.id)
+                .where(
+                    TestCaseVersion.test_case_id == test_case_id,
+                    TestCaseVersion.version == eval_result.test_case_version
+                )
+            )
+            scored = scored.one_or_none()
+            case_input, description, criterion_name = scored or (
+                test_case.input, test_case.description, test_case.criterion.name
+            )
+
             return {
                 "id": test_case_id,
-                "criterion": test_case.criterion.name,
-                "input": test_case.input,
-                "description": test_case.description,
+                "criterion": criterion_name,
+                "input": case_input,
+                "description": description,
+                "version": eval_result.test_case_version,
                 "output": eval_result.output,
                 "result": eval_result.result,
                 "explanation": eval_result.explanation,
@@ -211,19 +277,36 @@ async def get_test_case_details(evaluation_id: int, test_case_id: int):
             raise HTTPException(status_code=500, detail=str(e))
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, channels: Optional[str] = None):
+    await manager.connect(websocket, channels.split(",") if channels else None)
     try:
         while True:
             try:
                 data = await websocket.receive_text()
-                await manager.send_personal_message({"message": f"Received: {data}"}, websocket)
             except WebSocketDisconnect:
-                manager.disconnect(websocket)
                 break
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
                 break
+
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await manager.send_personal_message({"message": f"Received: {data}"}, websocket)
+            elif message.get("type") in ("subscribe", "unsubscribe"):
+                change = manager.subscribe if message["type"] == "subscribe" else manager.unsubscribe
+                subscribed = change(websocket, [str(channel) for channel in message.get("channels", [])])
+                await manager.send_personal_message({"type": "subscribed", "channels": subscribed}, websocket)
+            elif message.get("type") == "replay":
+                # {"type": "replay", "evaluation_id": 7, "since": 42}: the events after seq 42
+                try:
+                    manager.replay(websocket, int(message["evaluation_id"]), int(message.get("since", 0)))
+                except (KeyError, TypeError, ValueError):
+                    await manager.send_personal_message({"message": "replay needs an evaluation_id and since"}, websocket)
+            elif message.get("type") != "pong":
+                await manager.send_personal_message({"message": f"Received: {data}"}, websocket)
     finally:
         manager.disconnect(websocket)
 
@@ -242,10 +325,10 @@ async def get_config():
 async def select_models(selection: ModelSelection):
     global EVALUATION_MODEL, SCORING_MODEL
     
-    if selection.evaluation_model not in [model for provider in config["models"].values() for model in provider]:
+    if selection.evaluation_model not in model_registry.models:
         raise HTTPException(status_code=400, detail=f"Invalid evaluation model: {selection.evaluation_model}")
     
-    if selection.scoring_model not in [model for provider in config["models"].values() for model in provider]:
+    if selection.scoring_model not in model_registry.models:
         raise HTTPException(status_code=400, detail=f"Invalid scoring model: {selection.scoring_model}")
     
     EVALUATION_MODEL = selection.evaluation_model
@@ -266,11 +349,202 @@ async def get_test_case_analysis():
             logger.error(f"Error in test case analysis: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
         
-async def evaluate_output(input_text: str, output_text: str, criterion: str, description: str, model: str = None):
+TEST_CASE_CONTENT_TYPES = {"application/x-ndjson": "jsonl", "application/jsonl": "jsonl", "application/json": "json"}
+
+@app.post("/test-cases/import")
+async def import_test_cases(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(json|jsonl)$"),
+    evaluation_type: str = DEFAULT_EVALUATION_TYPE,
+    retire_missing: bool = False
+):
+    """Sync test cases from a file sent as the raw request body, as a background job.
+
+    The body is streamed to a temporary file rather than held in memory. Its
+    format is taken from ?format= or the Content-Type, and defaults to JSON.
+    Cases missing from the file are only retired with ?retire_missing=true,
+    so uploading part of a suite adds to it.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    file_format = file_format or TEST_CASE_CONTENT_TYPES.get(content_type, "json")
+
+    upload = tempfile.NamedTemporaryFile(prefix="llm_eval_import_", suffix=f".{file_format}", delete=False)
+    path = Path(upload.name)
+    size = 0
+    try:
+        with upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+                size += len(chunk)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    if not size:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="No test case file in the request body")
+
+    payload = {"format": file_format, "evaluation_type": evaluation_type, "retire_missing": retire_missing, "size_bytes": size}
+    job_id = await job_runner.create_job("import_test_cases", payload)
+    job_runner.submit(job_id, lambda job_id: run_test_case_import(path, file_format, evaluation_type, retire_missing, job_id))
+    logger.info(f"Queued import of {size} bytes of test cases as job {job_id}")
+
+    return {"message": "Test case import queued", "job_id": job_id, "status": "queued"}
+
+async def run_test_case_import(
+    path: Path,
+    file_format: str,
+    evaluation_type: str,
+    retire_missing: bool = False,
+    job_id: Optional[int] = None
+) -> None:
+    stop = threading.Event()
+
+    def report(counts):
+        # Runs on the import thread; each update swaps in a new dict
+        if job_id is not None:
+            job_runner.progress[job_id] = {**counts, "errors": list(counts["errors"])}
+
+    def sync():
+        with open(path, "r", encoding="utf-8") as f:
+            return sync_test_cases(
+                DATABASE_PATH, read_test_cases(f, file_format), evaluation_type,
+                progress=report, should_stop=stop.is_set, retire_missing=retire_missing
+            )
+
+    try:
+        counts = await asyncio.to_thread(sync)
+    except asyncio.CancelledError:
+        # The thread can't be interrupted, so it stops at the next chunk boundary
+        stop.set()
+        raise
+    finally:
+        path.unlink(missing_ok=True)
+
+    await job_runner.set_result(job_id, counts)
+    logger.info(
+        f"Imported test cases: {counts['added']} added, {counts['updated']} updated, "
+        f"{counts['reactivated']} reactivated, {counts['retired']} retired, {counts['invalid']} invalid"
+    )
+
+# The verdict is the first token of its line, after an optional short label like "Verdict:" or "Pass/Fail:"
+VERDICT_PATTERN = re.compile(r"(?:[^:]{1,30}:)?[\W\d_]*(pass|fail)\b", re.IGNORECASE)
+
+def parse_text_verdict(response_text: str) -> Dict[str, str]:
+    lines = [line.strip() for line in response_text.strip().split('\n') if line.strip()]
+    for index, line in enumerate(lines):
+        match = VERDICT_PATTERN.match(line)
+        if match:
+            explanation = '\n'.join(lines[:index] + lines[index + 1:])
+            return {"result": match.group(1).lower(), "explanation": explanation.strip()}
+    raise ValueError(f"No pass/fail verdict in scoring response: {response_text[:200]}")
+
+def parse_json_verdicts(response_text: str, criteria: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    text = response_text.strip()
+    # Tolerate a markdown code fence around the JSON
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("{"):] if "{" in text else text
+
+    data = json.loads(text)
+    verdicts = {}
+    for verdict in data.get("verdicts", []):
+        criterion = verdict.get("criterion")
+        result = str(verdict.get("result", "")).strip().lower()
+        if criterion in criteria and result in ("pass", "fail"):
+            verdicts[criterion] = {"result": result, "explanation": str(verdict.get("explanation", "")).strip()}
+
+    missing = set(criteria) - set(verdicts)
+    if missing:
+        raise ValueError(f"Scoring response is missing verdicts for: {', '.join(sorted(missing))}")
+    return verdicts
+
+async def judge_output(
+    input_text: str,
+    output_text: str,
+    criteria: Dict[str, str],
+    model: str = None,
+    use_cache: bool = True,
+    prompt_template: Optional[str] = None
+):
+    """Score one output against several criteria in a single structured-output call.
+
+    criteria maps criterion name to the goal it is judged on. Returns a verdict per
+    criterion plus the scoring call's token counts.
+    """
     for _ in range(3):
         try:
             settings = config["evaluation_settings"]
-            evaluation_prompt = settings["evaluation_prompt_template"].format(
+            criteria_text = '\n'.join(
+                f"- {name} ({snake_to_title_case(name)}): {description}"
+                for name, description in criteria.items()
+            )
+            evaluation_prompt = (prompt_template or settings["json_evaluation_prompt_template"]).format(
+                input=input_text,
+                output=output_text,
+                criteria=criteria_text
+            )
+
+            scoring_model = model or SCORING_MODEL
+            provider = model_registry.provider(scoring_model)
+
+            messages = [
+                {"role": "system", "content": settings["system_prompt"]},
+                {"role": "user", "content": evaluation_prompt}
+            ]
+
+            response_text = await limited_completion(
+                provider=provider,
+                model=scoring_model,
+                messages=messages,
+                temperature=settings["temperature"],
+                use_cache=use_cache,
+                # Don't let a cached unparseable reply fail every retry
+                refresh_cache=_ > 0,
+                json_response=True
+            )
+
+            return {
+                "verdicts": parse_json_verdicts(response_text, criteria),
+                "prompt_tokens": count_tokens(evaluation_prompt, scoring_model),
+                "response_tokens": count_tokens(response_text, scoring_model)
+            }
+
+        except RateLimitExhausted:
+            # get_completion_for_provider already retried with backoff
+            raise
+        except Exception as e:
+            logger.error(f"Error in structured evaluation: {str(e)}")
+            if _ == 2:
+                raise
+            await asyncio.sleep(backoff_delay(_))
+
+async def evaluate_output(
+    input_text: str,
+    output_text: str,
+    criterion: str,
+    description: str,
+    model: str = None,
+    use_cache: bool = True,
+    prompt_template: Optional[str] = None
+):
+    # prompt_template overrides the configured template for the active judging mode
+    settings = config["evaluation_settings"]
+    if settings.get("judging_mode") == "json":
+        try:
+            judgement = await judge_output(input_text, output_text, {criterion: description}, model, use_cache, prompt_template)
+        except RateLimitExhausted:
+            raise
+        except Exception as e:
+            return {"result": "error", "explanation": str(e)}
+        return {
+            **judgement["verdicts"][criterion],
+            "prompt_tokens": judgement["prompt_tokens"],
+            "response_tokens": judgement["response_tokens"]
+        }
+
+    for _ in range(3):
+        try:
+            evaluation_prompt = (prompt_template or settings["evaluation_prompt_template"]).format(
                 input=input_text,
                 output=output_text,
                 criterion=criterion,
@@ -278,302 +552,1131 @@ async def evaluate_output(input_text: str, output_text: str, criterion: str, des
             )
 
             scoring_model = model or SCORING_MODEL
-            provider = await get_model_provider(scoring_model, config)
+            provider = model_registry.provider(scoring_model)
             
             messages = [
                 {"role": "system", "content": settings["system_prompt"]},
                 {"role": "user", "content": evaluation_prompt}
             ]
 
-            response_text = await get_completion_for_provider(
+            response_text = await limited_completion(
                 provider=provider,
                 model=scoring_model,
                 messages=messages,
-                temperature=settings["temperature"]
+                temperature=settings["temperature"],
+                use_cache=use_cache,
+                refresh_cache=_ > 0
             )
 
             # Extract pass/fail and explanation from the response
-            lines = response_text.strip().split('\n')
-            passed = any('pass' in line.lower() for line in lines)
-            explanation = '\n'.join(line for line in lines if 'pass' not in line.lower() and 'fail' not in line.lower())
+            verdict = parse_text_verdict(response_text)
 
             return {
-                "result": "pass" if passed else "fail",
-                "explanation": explanation.strip(),
+                **verdict,
                 "prompt_tokens": count_tokens(evaluation_prompt, scoring_model),
                 "response_tokens": count_tokens(response_text, scoring_model)
             }
                 
+        except RateLimitExhausted:
+            raise
         except Exception as e:
             logger.error(f"Error in evaluation: {str(e)}")
             if _ == 2:
                 return {"result": "error", "explanation": str(e)}
-            await asyncio.sleep(1)
+            await asyncio.sleep(backoff_delay(_))
 
 @app.post("/evaluate")
 async def evaluate(system_prompt: SystemPrompt):
-    logger.info(f"Starting evaluation with prompt: {system_prompt.prompt}")
-    
-    eval_model = system_prompt.evaluation_model or EVALUATION_MODEL
-    scoring_model = system_prompt.scoring_model or SCORING_MODEL
+    # Pin the models now so a later /models/select doesn't change a queued job
+    system_prompt = system_prompt.model_copy(update={
+        "evaluation_model": system_prompt.evaluation_model or EVALUATION_MODEL,
+        "scoring_model": system_prompt.scoring_model or SCORING_MODEL
+    })
 
     # Validate models
     try:
-        eval_provider = await get_model_provider(eval_model, config)
-        scoring_provider = await get_model_provider(scoring_model, config)
+        model_registry.provider(system_prompt.evaluation_model)
+        model_registry.provider(system_prompt.scoring_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job_id = await job_runner.create_job("evaluate", system_prompt.model_dump())
+    job_runner.submit(job_id, lambda job_id: run_evaluation(system_prompt, job_id))
+    logger.info(f"Queued evaluation job {job_id}")
+
+    return {"message": "Evaluation queued", "job_id": job_id, "status": "queued"}
+
+@app.post("/sweeps")
+async def create_sweep(request: SweepRequest):
+    if not request.prompts or not request.evaluation_models:
+        raise HTTPException(status_code=400, detail="A sweep needs at least one prompt and one evaluation model")
+
+    # Drop duplicates so every cell is a distinct (model, prompt) pair
+    request = request.model_copy(update={
+        "prompts": list(dict.fromkeys(request.prompts)),
+        "evaluation_models": list(dict.fromkeys(request.evaluation_models)),
+        "scoring_model": request.scoring_model or SCORING_MODEL
+    })
+
+    # Validate models
+    try:
+        for model in [*request.evaluation_models, request.scoring_model]:
+            model_registry.provider(model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sweep_id = uuid.uuid4().hex
+    job_id = await job_runner.create_job("sweep", {"sweep_id": sweep_id, **request.model_dump()})
+    job_runner.submit(job_id, lambda job_id: run_sweep(sweep_id, request, job_id))
+    cells = len(request.evaluation_models) * len(request.prompts)
+    logger.info(f"Queued sweep {sweep_id} ({cells} evaluations) as job {job_id}")
+
+    return {"message": "Sweep queued", "job_id": job_id, "sweep_id": sweep_id, "evaluations": cells, "status": "queued"}
+
+@app.post("/evaluations/{evaluation_id}/resume")
+async def resume_evaluation(evaluation_id: int, bypass_cache: bool = False):
+    conflict = None
+    async with get_async_session() as session:
+        # Claiming the evaluation first takes the write lock, so a concurrent resume sees it queued
+        claimed = await session.execute(
+            update(Evaluation)
+            .where(Evaluation.id == evaluation_id, Evaluation.status.not_in(("running", "queued")))
+            .values(status="queued")
+        )
+        evaluation = await session.get(Evaluation, evaluation_id)
+        if not claimed.rowcount:
+            conflict = evaluation and f"Evaluation is already {evaluation.status}"
+        else:
+            remaining = await session.scalar(
+                select(func.count(TestCase.id)).join(Criterion).where(*remaining_case_filters(evaluation))
+            )
+            if remaining:
+                job_id = await job_runner.create_job(
+                    "resume", {"evaluation_id": evaluation_id, "bypass_cache": bypass_cache},
+                    session=session, evaluation_id=evaluation_id
+                )
+            else:
+                conflict = "Evaluation has no remaining test cases"
+                await session.rollback()
+
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    if conflict:
+        raise HTTPException(status_code=409, detail=conflict)
+
+    job_runner.submit(job_id, lambda job_id: execute_evaluation(evaluation_id, job_id, use_cache=not bypass_cache))
+    logger.info(f"Queued resume of evaluation {evaluation_id} ({remaining} test cases) as job {job_id}")
+
+    return {"message": "Evaluation resume queued", "job_id": job_id, "remaining_test_cases": remaining}
+
+@app.post("/evaluations/{evaluation_id}/rescore")
+async def rescore_evaluation(evaluation_id: int, request: RescoreRequest):
+    try:
+        model_registry.provider(request.scoring_model)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    if request.evaluation_prompt_template is not None:
+        # Catch unknown placeholders now rather than on every test case. The override
+        # replaces the active mode's template, so it gets that template's placeholders.
+        json_mode = config["evaluation_settings"].get("judging_mode") == "json"
+        placeholders = {"input": "", "output": ""}
+        placeholders.update({"criteria": ""} if json_mode else {"criterion": "", "description": ""})
+        try:
+            rendered = request.evaluation_prompt_template.format(**placeholders)
+        except (KeyError, IndexError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid evaluation prompt template: {e}")
+        if json_mode and ("{criteria}" not in request.evaluation_prompt_template or '"verdicts"' not in rendered):
+            raise HTTPException(
+                status_code=400,
+                detail='In json judging mode the evaluation prompt template must list {criteria} and ask for a {"verdicts": [...]} object'
+            )
+
+    async with get_async_session() as session:
+        source = await session.get(Evaluation, evaluation_id)
+        stored_results = 0
+        if source:
+            stored_results = await session.scalar(
+                select(func.count(EvaluationResult.id)).where(EvaluationResult.evaluation_id == evaluation_id)
+            )
+
+    if not source:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    if not stored_results:
+        raise HTTPException(status_code=409, detail="Evaluation has no stored outputs to re-score")
+
+    job_id = await job_runner.create_job("rescore", {"evaluation_id": evaluation_id, **request.model_dump()})
+    job_runner.submit(job_id, lambda job_id: run_rescore(evaluation_id, request, job_id))
+    logger.info(f"Queued re-score of evaluation {evaluation_id} with {request.scoring_model} as job {job_id}")
+
+    return {"message": "Re-score queued", "job_id": job_id, "status": "queued"}
+
+async def run_rescore(source_id: int, request: RescoreRequest, job_id: Optional[int] = None) -> int:
+    async with get_async_session() as session:
+        source = await session.get(Evaluation, source_id)
+        # Outputs are reused, so only scoring tokens and cost accrue on the new evaluation
+        evaluation = Evaluation(
+            evaluation_type_id=source.evaluation_type_id,
+            system_prompt=source.system_prompt,
+            model_name=source.model_name,
+            scoring_model=request.scoring_model,
+            scoring_prompt_template=request.evaluation_prompt_template,
+            parent_evaluation_id=source.id,
+            total_tokens=0,
+            total_cost=0.0,
+            status="running"
+        )
+        session.add(evaluation)
+
+    await job_runner.attach_evaluation(job_id, evaluation.id)
+    return await execute_evaluation(evaluation.id, job_id, use_cache=not request.bypass_cache)
+
+def create_evaluation(
+    evaluation_type_id: int,
+    prompt: str,
+    eval_model: str,
+    scoring_model: str,
+    sweep_id: Optional[str] = None
+) -> Evaluation:
+    """A new running evaluation, not yet added to a session."""
+    # Count initial system prompt tokens and calculate cost
+    system_prompt_tokens = count_tokens(prompt, eval_model, memoize=True)
+    input_cost = model_registry.cost(system_prompt_tokens, eval_model, "input")
+
+    return Evaluation(
+        evaluation_type_id=evaluation_type_id,
+        system_prompt=prompt,
+        model_name=eval_model,
+        scoring_model=scoring_model,
+        total_tokens=system_prompt_tokens,
+        total_cost=input_cost,
+        status="running",
+        sweep_id=sweep_id
+    )
+
+async def run_evaluation(system_prompt: SystemPrompt, job_id: Optional[int] = None) -> int:
+    logger.info(f"Starting evaluation with prompt: {system_prompt.prompt}")
     
+    eval_model = system_prompt.evaluation_model or EVALUATION_MODEL
+    scoring_model = system_prompt.scoring_model or SCORING_MODEL
+
+    async with get_async_session() as session:
+        eval_type = await session.execute(
+            select(EvaluationType).where(EvaluationType.name == "speech_to_text")
+        )
+        eval_type = eval_type.scalar_one()
+
+        evaluation = create_evaluation(eval_type.id, system_prompt.prompt, eval_model, scoring_model)
+        session.add(evaluation)
+
+    await job_runner.attach_evaluation(job_id, evaluation.id)
+    return await execute_evaluation(evaluation.id, job_id, use_cache=not system_prompt.bypass_cache)
+
+async def set_evaluation_status(evaluation_id: int, status: str):
+    try:
+        async with get_async_session() as session:
+            await session.execute(
+                update(Evaluation).where(Evaluation.id == evaluation_id).values(status=status)
+            )
+    except Exception as e:
+        logger.error(f"Error setting evaluation {evaluation_id} status to {status}: {e}")
+
+async def close_writer(writer: Optional[ResultWriter]):
+    # Keep whatever results were already paid for when a run stops early
+    if writer is None:
+        return
+    try:
+        await writer.close()
+    except Exception as e:
+        logger.error(f"Error flushing buffered results for evaluation {writer.evaluation_id}: {e}")
+
+class EvaluationRun:
+    """Generation, scoring and persistence for one evaluation's pending test cases.
+
+    Runs are driven by run_evaluations(), which schedules one or more of them
+    (e.g. every cell of a sweep) on a single pipeline. Re-score runs (with
+    stored_outputs) reuse the parent evaluation's outputs and only score.
+    """
+
+    def __init__(
+        self,
+        evaluation: Evaluation,
+        test_cases: List[TestCase],
+        criteria_counts: Dict[str, Dict[str, int]],
+        eval_provider: Optional[str] = None,
+        input_tokens: Optional[Dict[int, int]] = None,
+        stored_outputs: Optional[Dict[int, Any]] = None,
+        job_id: Optional[int] = None,
+        use_cache: bool = True,
+        job_progress: Optional[Dict[str, int]] = None
+    ):
+        self.evaluation = evaluation
+        self.test_cases = test_cases
+        self.criteria_counts = criteria_counts
+        self.eval_provider = eval_provider
+        self.input_tokens = input_tokens
+        # Input prices are known up front, so the whole suite is priced in one pass
+        self.input_costs: Dict[int, float] = {}
+        if input_tokens:
+            self.input_costs = dict(zip(
+                input_tokens.keys(),
+                model_registry.costs(list(input_tokens.values()), evaluation.model_name, "input")
+            ))
+        self.stored_outputs = stored_outputs
+        self.job_id = job_id
+        self.use_cache = use_cache
+        self.total_cases = sum(counts['total'] for counts in criteria_counts.values())
+        self.processed_cases = sum(counts['processed'] for counts in criteria_counts.values())
+        self.failed_cases = 0
+        # Sweeps share one progress dict across their cells so the job reports overall progress
+        self.job_progress = job_progress if job_progress is not None else {
+            "processed": self.processed_cases,
+            "total": self.total_cases
+        }
+
+        # Resumed runs continue from the totals already checkpointed
+        pipeline_settings = config.get("pipeline", {})
+        self.writer = ResultWriter(
+            evaluation.id,
+            total_tokens=evaluation.total_tokens,
+            total_cost=evaluation.total_cost,
+            batch_size=pipeline_settings.get("persistence_batch_size", 25),
+            flush_interval=pipeline_settings.get("persistence_flush_interval", 2.0)
+        )
+
+    def case_groups(self) -> List[List[TestCase]]:
+        """The pipeline items: lists of test cases that share one generation and one scoring call.
+
+        In json judging mode, cases with the same input (and for a re-score, the
+        same stored output) are judged on all their criteria at once; otherwise
+        every case is its own item.
+        """
+        if config["evaluation_settings"].get("judging_mode") != "json":
+            return [[case] for case in self.test_cases]
+
+        groups: Dict[Tuple[str, ...], List[TestCase]] = {}
+        for case in self.test_cases:
+            if self.stored_outputs is not None:
+                stored = self.stored_outputs[case.id]
+                key = (stored.input, stored.output)
+            else:
+                key = (case.input,)
+            groups.setdefault(key, []).append(case)
+        return list(groups.values())
+
+    async def generate(self, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        cases = outcome["item"][1]
+        if self.stored_outputs is not None:
+            # Judged on the test case as it was when the parent generated the output
+            stored = [self.stored_outputs[case.id] for case in cases]
+            return {
+                "input": stored[0].input,
+                "output": stored[0].output,
+                "cases": [
+                    {
+                        "test_case_id": row.test_case_id,
+                        "test_case_version": row.test_case_version,
+                        "criterion": row.criterion,
+                        "criterion_id": row.criterion_id,
+                        "description": row.description,
+                        "prompt_tokens": row.prompt_tokens,
+                        "response_tokens": row.response_tokens,
+                        "eval_cost": 0.0
+                    }
+                    for row in stored
+                ]
+            }
+
+        eval_model = self.evaluation.model_name
+        messages = [
+            {"role": "system", "content": self.evaluation.system_prompt},
+            {"role": "user", "content": cases[0].input}
+        ]
+
+        # Get completion from selected provider
+        assistant_response = await limited_completion(
+            provider=self.eval_provider,
+            model=eval_model,
+            messages=messages,
+            temperature=config["evaluation_settings"]["temperature"],
+            use_cache=self.use_cache
+        )
+
+        # Calculate tokens and costs
+        prompt_tokens = self.input_tokens[cases[0].id]
+        response_tokens = count_tokens(assistant_response, eval_model)
+
+        input_cost = self.input_costs[cases[0].id]
+        output_cost = model_registry.cost(response_tokens, eval_model, "output")
+
+        # The shared generation is charged to the group's first result
+        return {
+            "input": cases[0].input,
+            "output": assistant_response,
+            "cases": [
+                {
+                    "test_case_id": case.id,
+                    "test_case_version": case.version,
+                    "criterion": case.criterion.name,
+                    "criterion_id": case.criterion_id,
+                    "description": case.description,
+                    "prompt_tokens": prompt_tokens if index == 0 else 0,
+                    "response_tokens": response_tokens if index == 0 else 0,
+                    "eval_cost": input_cost + output_cost if index == 0 else 0.0
+                }
+                for index, case in enumerate(cases)
+            ]
+        }
+
+    async def score(self, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        cases = outcome["cases"]
+        scoring_model = self.evaluation.scoring_model
+        if len(cases) == 1:
+            evaluation_result = await evaluate_output(
+                outcome["input"],
+                outcome["output"],
+                cases[0]["criterion"],
+                cases[0]["description"],
+                scoring_model,
+                use_cache=self.use_cache,
+                prompt_template=self.evaluation.scoring_prompt_template
+            )
+            if evaluation_result["result"] == "error":
+                raise RuntimeError(f"Scoring failed: {evaluation_result['explanation']}")
+            verdicts = [evaluation_result]
+        else:
+            evaluation_result = await judge_output(
+                outcome["input"],
+                outcome["output"],
+                {case["criterion"]: case["description"] for case in cases},
+                scoring_model,
+                use_cache=self.use_cache,
+                prompt_template=self.evaluation.scoring_prompt_template
+            )
+            verdicts = [evaluation_result["verdicts"][case["criterion"]] for case in cases]
+
+        # Calculate scoring costs
+        scoring_input_cost = model_registry.cost(
+            evaluation_result["prompt_tokens"],
+            scoring_model,
+            "input"
+        )
+        scoring_output_cost = model_registry.cost(
+            evaluation_result["response_tokens"],
+            scoring_model,
+            "output"
+        )
+
+        # Like generation, the shared scoring call is charged to the group's first result
+        return {"cases": [
+            {
+                **case,
+                "result": verdict["result"],
+                "explanation": verdict["explanation"],
+                "scoring_cost": scoring_input_cost + scoring_output_cost if index == 0 else 0.0
+            }
+            for index, (case, verdict) in enumerate(zip(cases, verdicts))
+        ]}
+
+    def criteria_snapshot(self) -> Dict[str, Dict[str, int]]:
+        # Broadcast events are queued and kept for replay, so they can't share the live counts
+        return {criterion: dict(counts) for criterion, counts in self.criteria_counts.items()}
+
+    async def start(self):
+        await manager.broadcast({
+            "stage": "started",
+            "job_id": self.job_id,
+            "evaluation_id": self.evaluation.id,
+            "total_progress": f"{self.processed_cases}/{self.total_cases}",
+            "criteria_progress": self.criteria_snapshot()
+        })
+
+    async def report(self, outcome: Dict[str, Any]):
+        cases = outcome["item"][1]
+        self.processed_cases += len(cases)
+        self.job_progress["processed"] += len(cases)
+        if self.job_id is not None:
+            job_runner.progress[self.job_id] = self.job_progress
+
+        # Per-case events carry only what changed; "started" and "completed" carry the totals
+        if "error" in outcome:
+            self.failed_cases += len(cases)
+            for case in cases:
+                await manager.broadcast({
+                    "stage": "error",
+                    "error": outcome["error"],
+                    "job_id": self.job_id,
+                    "evaluation_id": self.evaluation.id,
+                    "test_case_id": case.id
+                })
+            return
+
+        for case in outcome["cases"]:
+            self.criteria_counts[case["criterion"]]['processed'] += 1
+            progress = {
+                "stage": "evaluation",
+                "job_id": self.job_id,
+                "evaluation_id": self.evaluation.id,
+                "current_result": {
+                    "id": case["test_case_id"],
+                    "criterion": case["criterion"],
+                    "result": case["result"],
+                    "evaluation_id": self.evaluation.id,
+                    "cost": case["eval_cost"] + case["scoring_cost"]
+                }
+            }
+            await manager.broadcast(progress)
+
+    async def persist(self, outcome: Dict[str, Any]):
+        if "error" in outcome:
+            return
+
+        for case in outcome["cases"]:
+            await self.writer.add(
+                {
+                    "test_case_id": case["test_case_id"],
+                    "test_case_version": case["test_case_version"],
+                    "output": outcome["output"],
+                    "result": case["result"],
+                    "explanation": case["explanation"],
+                    "prompt_tokens": case["prompt_tokens"],
+                    "response_tokens": case["response_tokens"],
+                    "evaluation_cost": case["eval_cost"],
+                    "scoring_cost": case["scoring_cost"]
+                },
+                tokens=case["prompt_tokens"] + case["response_tokens"],
+                cost=case["eval_cost"] + case["scoring_cost"],
+                criterion_id=case["criterion_id"]
+            )
+
+    async def finish(self, session: Any):
+        await self.writer.close()
+
+        self.evaluation.status = "partial" if self.failed_cases else "completed"
+        await session.commit()
+
+        final_progress = {
+            "total_progress": f"{self.total_cases}/{self.total_cases}",
+            "criteria_progress": self.criteria_snapshot(),
+            "stage": "completed",
+            "job_id": self.job_id,
+            "evaluation_id": self.evaluation.id,
+            "total_cost": self.writer.total_cost
+        }
+        if self.evaluation.sweep_id:
+            final_progress["sweep_id"] = self.evaluation.sweep_id
+        # The finished evaluation's list entry, so clients don't have to reload the list
+        await session.refresh(self.evaluation)
+        scores = await load_criteria_scores(session, [self.evaluation.id])
+        final_progress["evaluation"] = serialize_evaluation(self.evaluation, scores[self.evaluation.id])
+        await manager.broadcast(final_progress)
+
+def remaining_case_filters(evaluation: Evaluation) -> List[Any]:
+    """Filters on TestCase joined to Criterion for the cases an evaluation still has to run.
+
+    Those are the active cases of its type without a result, limited to the
+    parent's cases for a re-score.
+    """
+    completed_cases = select(EvaluationResult.test_case_id).where(
+        EvaluationResult.evaluation_id == evaluation.id
+    )
+    case_filters = [
+        Criterion.evaluation_type_id == evaluation.evaluation_type_id,
+        TestCase.retired_at.is_(None),
+        TestCase.id.not_in(completed_cases)
+    ]
+    if evaluation.parent_evaluation_id is not None:
+        case_filters.append(TestCase.id.in_(
+            select(EvaluationResult.test_case_id).where(
+                EvaluationResult.evaluation_id == evaluation.parent_evaluation_id
+            )
+        ))
+    return case_filters
+
+async def load_evaluation_run(
+    session: Any,
+    evaluation: Evaluation,
+    job_id: Optional[int] = None,
+    use_cache: bool = True
+) -> EvaluationRun:
+    """Build the run for every test case that has no result yet for the evaluation."""
+    # Re-scoring judges the parent evaluation's stored outputs instead of generating new ones
+    stored_outputs = None
+    eval_provider = None
+    if evaluation.parent_evaluation_id is not None:
+        stored = await session.execute(
+            select(
+                EvaluationResult.test_case_id,
+                EvaluationResult.test_case_version,
+                EvaluationResult.output,
+                EvaluationResult.prompt_tokens,
+                EvaluationResult.response_tokens,
+                func.coalesce(TestCaseVersion.input, TestCase.input).label("input"),
+                func.coalesce(TestCaseVersion.description, TestCase.description).label("description"),
+                Criterion.id.label("criterion_id"),
+                Criterion.name.label("criterion")
+            )
+            .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+            .outerjoin(TestCaseVersion, and_(
+                TestCaseVersion.test_case_id == EvaluationResult.test_case_id,
+                TestCaseVersion.version == EvaluationResult.test_case_version
+            ))
+            .join(Criterion, Criterion.id == func.coalesce(TestCaseVersion.criterion_id, TestCase.criterion_id))
+            .where(EvaluationResult.evaluation_id == evaluation.parent_evaluation_id)
+        )
+        stored_outputs = {row.test_case_id: row for row in stored}
+    else:
+        eval_provider = model_registry.provider(evaluation.model_name)
+
+    test_cases = await session.execute(
+        select(TestCase)
+        .options(selectinload(TestCase.criterion))
+        .join(Criterion)
+        .where(*remaining_case_filters(evaluation))
+        .order_by(TestCase.id)
+    )
+    test_cases = test_cases.scalars().all()
+
+    # Results count towards the criterion of the test case version they were scored on
+    completed_counts = await session.execute(
+        select(Criterion.name, func.count(EvaluationResult.id))
+        .select_from(EvaluationResult)
+        .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+        .outerjoin(TestCaseVersion, and_(
+            TestCaseVersion.test_case_id == EvaluationResult.test_case_id,
+            TestCaseVersion.version == EvaluationResult.test_case_version
+        ))
+        .join(Criterion, Criterion.id == func.coalesce(TestCaseVersion.criterion_id, TestCase.criterion_id))
+        .where(EvaluationResult.evaluation_id == evaluation.id)
+        .group_by(Criterion.name)
+    )
+    criteria_counts = {criterion: {'total': count, 'processed': count}
+                     for criterion, count in completed_counts.all()}
+    for case in test_cases:
+        criterion = stored_outputs[case.id].criterion if stored_outputs is not None else case.criterion.name
+        criteria_counts.setdefault(criterion, {'total': 0, 'processed': 0})['total'] += 1
+
+    input_tokens = None
+    if stored_outputs is None:
+        input_tokens = await load_input_token_counts(session, test_cases, evaluation.model_name)
+
+    return EvaluationRun(
+        evaluation,
+        test_cases,
+        criteria_counts,
+        eval_provider=eval_provider,
+        input_tokens=input_tokens,
+        stored_outputs=stored_outputs,
+        job_id=job_id,
+        use_cache=use_cache
+    )
+
+async def run_evaluations(runs: List[EvaluationRun]):
+    # Interleave the runs so every model has work queued from the start
+    groups = {run: run.case_groups() for run in runs}
+    longest = max((len(run_groups) for run_groups in groups.values()), default=0)
+    items = [
+        (run, groups[run][index])
+        for index in range(longest)
+        for run in runs
+        if index < len(groups[run])
+    ]
+
+    for run in runs:
+        await run.start()
+
+    pipeline_settings = config.get("pipeline", {})
+    await run_pipeline(
+        items,
+        generate=lambda outcome: outcome["item"][0].generate(outcome),
+        score=lambda outcome: outcome["item"][0].score(outcome),
+        persist=lambda outcome: outcome["item"][0].persist(outcome),
+        generation_workers=pipeline_settings.get("generation_workers", 4),
+        scoring_workers=pipeline_settings.get("scoring_workers", 4),
+        report=lambda outcome: outcome["item"][0].report(outcome)
+    )
+
+async def stop_runs(evaluation_ids: List[int], runs: List[EvaluationRun], status: str):
+    for run in runs:
+        await close_writer(run.writer)
+    for evaluation_id in evaluation_ids:
+        await set_evaluation_status(evaluation_id, status)
+
+async def execute_evaluation(evaluation_id: int, job_id: Optional[int] = None, use_cache: bool = True) -> int:
+    """Run every test case that has no result yet for the evaluation.
+
+    Used for new evaluations, re-scores and for resuming interrupted runs.
+    """
+    runs: List[EvaluationRun] = []
+    async with get_async_session() as session:
+        try:
+            evaluation = await session.get(Evaluation, evaluation_id)
+            evaluation.status = "running"
+            await session.commit()
+
+            runs.append(await load_evaluation_run(session, evaluation, job_id, use_cache))
+            await run_evaluations(runs)
+            await runs[0].finish(session)
+            await completion_cache.flush()
+
+            return evaluation.id
+
+        except asyncio.CancelledError:
+            logger.info(f"Evaluation job {job_id} cancelled")
+            await session.rollback()
+            await stop_runs([evaluation_id], runs, "partial")
+            await manager.broadcast({"stage": "cancelled", "job_id": job_id, "evaluation_id": evaluation_id})
+            raise
+        except Exception as e:
+            logger.error(f"Evaluation error: {str(e)}", exc_info=True)
+            await session.rollback()
+            await stop_runs([evaluation_id], runs, "failed")
+            await manager.broadcast({"status": "error", "message": str(e), "job_id": job_id, "evaluation_id": evaluation_id})
+            raise HTTPException(status_code=500, detail=str(e))
+
+async def run_sweep(sweep_id: str, request: SweepRequest, job_id: Optional[int] = None) -> None:
+    """Evaluate every (model, prompt) cell of a sweep on one shared pipeline.
+
+    Test cases are loaded once and every cell gets its own Evaluation tagged
+    with sweep_id.
+    """
+    logger.info(
+        f"Starting sweep {sweep_id}: {len(request.evaluation_models)} models x {len(request.prompts)} prompts"
+    )
+    evaluation_ids: List[int] = []
+    runs: List[EvaluationRun] = []
     async with get_async_session() as session:
         try:
             eval_type = await session.execute(
                 select(EvaluationType).where(EvaluationType.name == "speech_to_text")
             )
             eval_type = eval_type.scalar_one()
-            
+
             test_cases = await session.execute(
                 select(TestCase)
+                .options(selectinload(TestCase.criterion))
                 .join(Criterion)
-                .where(Criterion.evaluation_type_id == eval_type.id)
+                .where(Criterion.evaluation_type_id == eval_type.id, TestCase.retired_at.is_(None))
                 .order_by(TestCase.id)
             )
             test_cases = test_cases.scalars().all()
-            
-            analysis = await analyze_test_cases(session)
-            
-            # Count initial system prompt tokens and calculate cost
-            system_prompt_tokens = count_tokens(system_prompt.prompt, eval_model)
-            input_cost = await calculate_cost(system_prompt_tokens, eval_model, "input", config)
-            
-            evaluation = Evaluation(
-                evaluation_type_id=eval_type.id,
-                system_prompt=system_prompt.prompt,
-                model_name=eval_model,
-                scoring_model=scoring_model,
-                total_tokens=system_prompt_tokens,
-                total_cost=input_cost
-            )
-            session.add(evaluation)
-            await session.flush()
-
-            total_cases = analysis["total_test_cases"]
-            criteria_counts = {criterion: {'total': count, 'processed': 0} 
-                             for criterion, count in analysis["counts_per_criterion"].items()}
-            
-            total_tokens = system_prompt_tokens
-            total_cost = input_cost
-            
-            for index, case in enumerate(test_cases, start=1):
-                try:
-                    criterion = case.criterion.name
-                    messages = [
-                        {"role": "system", "content": system_prompt.prompt},
-                        {"role": "user", "content": case.input}
-                    ]
-
-                    # Get completion from selected provider
-                    assistant_response = await get_completion_for_provider(
-                        provider=eval_provider,
-                        model=eval_model,
-                        messages=messages,
-                        temperature=config["evaluation_settings"]["temperature"]
-                    )
-
-                    evaluation_result = await evaluate_output(
-                        case.input, 
-                        assistant_response,
-                        criterion,
-                        case.description,
-                        scoring_model
-                    )
-
-                    # Calculate tokens and costs
-                    prompt_tokens = count_tokens(case.input, eval_model)
-                    response_tokens = count_tokens(assistant_response, eval_model)
-                    
-                    input_cost = await calculate_cost(prompt_tokens, eval_model, "input", config)
-                    output_cost = await calculate_cost(response_tokens, eval_model, "output", config)
-                    
-                    eval_cost = input_cost + output_cost
-                    
-                    # Calculate scoring costs
-                    scoring_input_cost = await calculate_cost(
-                        evaluation_result["prompt_tokens"], 
-                        scoring_model, 
-                        "input", 
-                        config
-                    )
-                    scoring_output_cost = await calculate_cost(
-                        evaluation_result["response_tokens"], 
-                        scoring_model, 
-                        "output", 
-                        config
-                    )
-                    
-                    scoring_cost = scoring_input_cost + scoring_output_cost
-                    
-                    total_tokens += prompt_tokens + response_tokens
-                    total_cost += eval_cost + scoring_cost
-
-                    result = EvaluationResult(
-                        evaluation_id=evaluation.id,
-                        test_case_id=case.id,
-                        output=assistant_response,
-                        result=evaluation_result["result"],
-                        explanation=evaluation_result["explanation"],
-                        prompt_tokens=prompt_tokens,
-                        response_tokens=response_tokens,
-                        evaluation_cost=eval_cost,
-                        scoring_cost=scoring_cost
-                    )
-                    session.add(result)
-                    await session.flush()
-
-                    # Update evaluation totals
-                    evaluation.total_tokens = total_tokens
-                    evaluation.total_cost = total_cost
-                    await session.flush()
-
-                    criteria_counts[criterion]['processed'] += 1
-                    progress = {
-                        "total_progress": f"{index}/{total_cases}",
-                        "criteria_progress": criteria_counts,
-                        "stage": "evaluation",
-                        "current_result": {
-                            "id": case.id,
-                            "criterion": criterion,
-                            "result": evaluation_result["result"],
-                            "evaluation_id": evaluation.id,
-                            "cost": eval_cost + scoring_cost
-                        }
-                    }
-                    await manager.broadcast(progress)
-
-                except Exception as e:
-                    logger.error(f"Error processing case {case.id}: {str(e)}")
-                    progress = {
-                        "total_progress": f"{index}/{total_cases}",
-                        "criteria_progress": criteria_counts,
-                        "stage": "error",
-                        "error": str(e)
-                    }
-                    await manager.broadcast(progress)
-
-                await asyncio.sleep(0.5)
+            criteria_totals: Dict[str, int] = {}
+            for case in test_cases:
+                criteria_totals[case.criterion.name] = criteria_totals.get(case.criterion.name, 0) + 1
 
+            evaluations = [
+                create_evaluation(eval_type.id, prompt, eval_model, request.scoring_model, sweep_id)
+                for eval_model in request.evaluation_models
+                for prompt in request.prompts
+            ]
+            session.add_all(evaluations)
             await session.commit()
-            
-            final_progress = {
-                "total_progress": f"{total_cases}/{total_cases}",
-                "criteria_progress": criteria_counts,
-                "stage": "completed",
-                "total_cost": total_cost
+            evaluation_ids = [evaluation.id for evaluation in evaluations]
+
+            # Input token counts depend only on the model, not the prompt
+            input_tokens = {
+                eval_model: await load_input_token_counts(session, test_cases, eval_model)
+                for eval_model in request.evaluation_models
             }
-            await manager.broadcast(final_progress)
-            
-            return {"message": "Evaluation completed", "evaluation_id": evaluation.id}
 
+            job_progress = {"processed": 0, "total": len(test_cases) * len(evaluations)}
+            for evaluation in evaluations:
+                runs.append(EvaluationRun(
+                    evaluation,
+                    test_cases,
+                    {name: {'total': count, 'processed': 0} for name, count in criteria_totals.items()},
+                    eval_provider=model_registry.provider(evaluation.model_name),
+                    input_tokens=input_tokens[evaluation.model_name],
+                    job_id=job_id,
+                    use_cache=not request.bypass_cache,
+                    job_progress=job_progress
+                ))
+
+            await run_evaluations(runs)
+            for run in runs:
+                await run.finish(session)
+            await completion_cache.flush()
+
+        except asyncio.CancelledError:
+            logger.info(f"Sweep {sweep_id} cancelled")
+            await session.rollback()
+            await stop_runs(evaluation_ids, runs, "partial")
+            await manager.broadcast({"stage": "cancelled", "job_id": job_id, "sweep_id": sweep_id})
+            raise
         except Exception as e:
-            logger.error(f"Evaluation error: {str(e)}", exc_info=True)
-            await manager.broadcast({"status": "error", "message": str(e)})
+            logger.error(f"Sweep error: {str(e)}", exc_info=True)
+            await session.rollback()
+            await stop_runs(evaluation_ids, runs, "failed")
+            await manager.broadcast({"status": "error", "message": str(e), "job_id": job_id})
             raise HTTPException(status_code=500, detail=str(e))
-        
+
+@app.get("/sweeps/{sweep_id}")
+async def get_sweep(sweep_id: str):
+    async with get_async_session() as session:
+        evaluations = await session.execute(
+            select(Evaluation).where(Evaluation.sweep_id == sweep_id).order_by(Evaluation.id)
+        )
+        evaluations = evaluations.scalars().all()
+
+        counts = await session.execute(
+            select(
+                EvaluationResult.evaluation_id,
+                func.count(EvaluationResult.id),
+                func.count(EvaluationResult.id).filter(EvaluationResult.result == "pass")
+            )
+            .join(Evaluation)
+            .where(Evaluation.sweep_id == sweep_id)
+            .group_by(EvaluationResult.evaluation_id)
+        )
+        counts = {evaluation_id: (total, passed) for evaluation_id, total, passed in counts.all()}
+
+    if not evaluations:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+
+    cells = []
+    for evaluation in evaluations:
+        total_count, pass_count = counts.get(evaluation.id, (0, 0))
+        cells.append({
+            "evaluation_id": evaluation.id,
+            "model_name": evaluation.model_name,
+            "system_prompt": evaluation.system_prompt,
+            "status": evaluation.status,
+            "total_score": pass_count,
+            "total_count": total_count,
+            "total_tokens": evaluation.total_tokens,
+            "total_cost": evaluation.total_cost
+        })
+
+    return {
+        "sweep_id": sweep_id,
+        "scoring_model": evaluations[0].scoring_model,
+        "models": list(dict.fromkeys(cell["model_name"] for cell in cells)),
+        "prompts": list(dict.fromkeys(cell["system_prompt"] for cell in cells)),
+        "cells": cells
+    }
+
+def serialize_evaluation(evaluation: Evaluation, scores_by_criteria: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """An evaluation's settings and summary scores, as listed by /evaluations."""
+    return {
+        "id": evaluation.id,
+        "timestamp": evaluation.timestamp.isoformat(),
+        "updated_at": evaluation.updated_at.isoformat() if evaluation.updated_at else None,
+        "system_prompt": evaluation.system_prompt,
+        "model_name": evaluation.model_name,
+        "scoring_model": evaluation.scoring_model,
+        "status": evaluation.status,
+        "parent_evaluation_id": evaluation.parent_evaluation_id,
+        "sweep_id": evaluation.sweep_id,
+        "total_score": sum(criteria["pass_count"] for criteria in scores_by_criteria.values()),
+        "total_count": sum(criteria["total_count"] for criteria in scores_by_criteria.values()),
+        "total_tokens": evaluation.total_tokens,
+        "total_cost": sum(criteria["cost"] for criteria in scores_by_criteria.values()),
+        "scores_by_criteria": scores_by_criteria
+    }
+
+async def load_criteria_scores(session: Any, evaluation_ids: List[int]) -> Dict[int, Dict[str, Dict[str, Any]]]:
+    """Per-criterion pass counts, totals and cost for each evaluation, read from evaluation_summaries."""
+    scores: Dict[int, Dict[str, Dict[str, Any]]] = {evaluation_id: {} for evaluation_id in evaluation_ids}
+    if not evaluation_ids:
+        return scores
+
+    rows = await session.execute(
+        select(
+            EvaluationSummary.evaluation_id,
+            Criterion.name,
+            EvaluationSummary.pass_count,
+            EvaluationSummary.total_count,
+            EvaluationSummary.total_cost
+        )
+        .join(Criterion, EvaluationSummary.criterion_id == Criterion.id)
+        .where(EvaluationSummary.evaluation_id.in_(evaluation_ids))
+    )
+    for evaluation_id, criterion_name, pass_count, total_count, cost in rows.all():
+        scores[evaluation_id][criterion_name] = {
+            "pass_count": pass_count,
+            "total_count": total_count,
+            "cost": cost
+        }
+    return scores
+
+async def load_test_case_results(session: Any, evaluations: List[Evaluation]) -> Dict[int, Dict[int, Dict[str, Any]]]:
+    """Full per-case detail (inputs, outputs, explanations) for each evaluation."""
+    models = {evaluation.id: (evaluation.model_name, evaluation.scoring_model) for evaluation in evaluations}
+    details: Dict[int, Dict[int, Dict[str, Any]]] = {evaluation_id: {} for evaluation_id in models}
+    if not models:
+        return details
+
+    # Each result is shown with the test case version it was scored on
+    rows = await session.execute(
+        select(
+            EvaluationResult,
+            func.coalesce(TestCaseVersion.input, TestCase.input),
+            func.coalesce(TestCaseVersion.description, TestCase.description),
+            Criterion.name
+        )
+        .join(TestCase, EvaluationResult.test_case_id == TestCase.id)
+        .outerjoin(TestCaseVersion, and_(
+            TestCaseVersion.test_case_id == EvaluationResult.test_case_id,
+            TestCaseVersion.version == EvaluationResult.test_case_version
+        ))
+        .join(Criterion, Criterion.id == func.coalesce(TestCaseVersion.criterion_id, TestCase.criterion_id))
+        .where(EvaluationResult.evaluation_id.in_(models.keys()))
+        .order_by(EvaluationResult.evaluation_id, EvaluationResult.test_case_id)
+    )
+    for result, case_input, description, criterion_name in rows.all():
+        input_model, output_model = models[result.evaluation_id]
+        details[result.evaluation_id][result.test_case_id] = {
+            "id": result.test_case_id,
+            "criterion": criterion_name,
+            "input": case_input,
+            "description": description,
+            "version": result.test_case_version,
+            "output": result.output,
+            "result": result.result,
+            "explanation": result.explanation,
+            "input_model": input_model,
+            "output_model": output_model,
+            "prompt_tokens": result.prompt_tokens,
+            "response_tokens": result.response_tokens,
+            "evaluation_cost": result.evaluation_cost,
+            "scoring_cost": result.scoring_cost
+        }
+    return details
+
 @app.get("/evaluations")
-async def get_evaluations(page: int = 1, limit: int = 5):
+async def get_evaluations(
+    page: int = 1,
+    limit: int = 5,
+    before_id: Optional[int] = None,
+    include_results: bool = False
+):
+    """List evaluations newest first.
+
+    Pass the previous response's next_before_id as before_id to page by id
+    cursor instead of offset. Per-case detail is only included with
+    include_results=true; otherwise use /evaluations/{id}/results.
+    """
     async with get_async_session() as session:
         try:
-            count_stmt = select(Evaluation).join(EvaluationType).where(EvaluationType.name == "speech_to_text")
-            result = await session.execute(count_stmt)
-            total_count = len(result.scalars().all())
+            total_count = await session.scalar(
+                select(func.count(Evaluation.id))
+                .join(EvaluationType)
+                .where(EvaluationType.name == "speech_to_text")
+            )
             
-            offset = (page - 1) * limit
             stmt = (
                 select(Evaluation)
-                .options(
-                    selectinload(Evaluation.results)
-                    .selectinload(EvaluationResult.test_case)
-                    .selectinload(TestCase.criterion)
-                )
                 .join(EvaluationType)
                 .where(EvaluationType.name == "speech_to_text")
                 .order_by(Evaluation.id.desc())
-                .offset(offset)
                 .limit(limit)
             )
+            if before_id is not None:
+                stmt = stmt.where(Evaluation.id < before_id)
+            else:
+                stmt = stmt.offset((page - 1) * limit)
             
             result = await session.execute(stmt)
             evaluations = result.scalars().all()
+
+            evaluation_ids = [eval.id for eval in evaluations]
+            scores = await load_criteria_scores(session, evaluation_ids)
+            details = await load_test_case_results(session, evaluations) if include_results else {}
             
             evaluation_data = []
             for eval in evaluations:
-                test_case_results = {}
-                scores_by_criteria = {}
-
-                for result in eval.results:
-                    criterion_name = result.test_case.criterion.name
-                    
-                    if criterion_name not in scores_by_criteria:
-                        scores_by_criteria[criterion_name] = {
-                            "pass_count": 0,
-                            "total_count": 0,
-                            "cost": 0
-                        }
-                    scores_by_criteria[criterion_name]["total_count"] += 1
-                    scores_by_criteria[criterion_name]["cost"] += (result.evaluation_cost + result.scoring_cost)
-                    
-                    if result.result == "pass":
-                        scores_by_criteria[criterion_name]["pass_count"] += 1
-                    
-                    test_case_results[result.test_case.id] = {
-                        "id": result.test_case.id,
-                        "criterion": criterion_name,
-                        "input": result.test_case.input,
-                        "description": result.test_case.description,
-                        "output": result.output,
-                        "result": result.result,
-                        "explanation": result.explanation,
-                        "input_model": eval.model_name,
-                        "output_model": eval.scoring_model,
-                        "prompt_tokens": result.prompt_tokens,
-                        "response_tokens": result.response_tokens,
-                        "evaluation_cost": result.evaluation_cost,
-                        "scoring_cost": result.scoring_cost
-                    }
-                
-                total_score = sum(
-                    criteria["pass_count"] 
-                    for criteria in scores_by_criteria.values()
-                )
-                
-                total_cost = sum(
-                    criteria["cost"]
-                    for criteria in scores_by_criteria.values()
-                )
-                
-                evaluation_data.append({
-                    "id": eval.id,
-                    "timestamp": eval.timestamp.isoformat(),
-                    "system_prompt": eval.system_prompt,
-                    "model_name": eval.model_name,
-                    "scoring_model": eval.scoring_model,
-                    "total_score": total_score,
-                    "total_tokens": eval.total_tokens,
-                    "total_cost": total_cost,
-                    "scores_by_criteria": scores_by_criteria,
-                    "test_case_results": test_case_results
-                })
+                evaluation = serialize_evaluation(eval, scores[eval.id])
+                if include_results:
+                    evaluation["test_case_results"] = details[eval.id]
+                evaluation_data.append(evaluation)
             
             return {
                 "evaluations": evaluation_data,
                 "total_count": total_count,
                 "page": page,
-                "pages": (total_count + limit - 1) // limit
+                "pages": (total_count + limit - 1) // limit,
+                "next_before_id": evaluation_ids[-1] if len(evaluation_ids) == limit else None
             }
             
         except Exception as e:
             logger.error(f"Error fetching evaluations: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/evaluations/changes")
+async def get_evaluation_changes(
+    after_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    cursor_updated_at: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
+    limit: int = 100
+):
+    """Evaluations created after after_id or changed at or after since, in the order they changed.
+
+    While has_more is true, keep after_id and since as they are and pass
+    next_cursor's updated_at and id as cursor_updated_at and cursor_id.
+    After the last page, pass the newest id and updated_at seen across all
+    pages as the next after_id and since. The evaluation(s) changed exactly
+    at since come back again, so apply them by id.
+    """
+    if after_id is None and since is None:
+        raise HTTPException(status_code=400, detail="Pass after_id, since or both")
+    if (cursor_updated_at is None) != (cursor_id is None):
+        raise HTTPException(status_code=400, detail="Pass cursor_updated_at and cursor_id together")
+    # Stored timestamps are naive UTC
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    if cursor_updated_at is not None and cursor_updated_at.tzinfo is not None:
+        cursor_updated_at = cursor_updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    changed = []
+    if after_id is not None:
+        changed.append(Evaluation.id > after_id)
+    if since is not None:
+        changed.append(Evaluation.updated_at >= since)
+    conditions = [EvaluationType.name == "speech_to_text", or_(*changed)]
+    if cursor_id is not None:
+        # Pages follow the (updated_at, id) order, so rows changed mid-sync are not skipped
+        conditions.append(or_(
+            Evaluation.updated_at > cursor_updated_at,
+            and_(Evaluation.updated_at == cursor_updated_at, Evaluation.id > cursor_id)
+        ))
+
+    async with get_async_session() as session:
+        stmt = (
+            select(Evaluation)
+            .join(EvaluationType)
+            .where(*conditions)
+            .order_by(Evaluation.updated_at, Evaluation.id)
+            .limit(limit)
+        )
+        evaluations = (await session.execute(stmt)).scalars().all()
+        scores = await load_criteria_scores(session, [eval.id for eval in evaluations])
+
+    latest_id = max([eval.id for eval in evaluations] + ([after_id] if after_id is not None else []), default=None)
+    as_of = evaluations[-1].updated_at if evaluations else since
+    has_more = len(evaluations) == limit
+    return {
+        "evaluations": [serialize_evaluation(eval, scores[eval.id]) for eval in evaluations],
+        "latest_id": latest_id,
+        "as_of": as_of.isoformat() if as_of else None,
+        "has_more": has_more,
+        "next_cursor": {"updated_at": evaluations[-1].updated_at.isoformat(), "id": evaluations[-1].id} if has_more else None
+    }
+
+async def export_response(stmt: Any, export_format: str, filename: str):
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    if export_format != "parquet":
+        return StreamingResponse(export_results(stmt, export_format), media_type=EXPORT_FORMATS[export_format], headers=headers)
+
+    # Parquet's footer comes last, so the file is built on disk before it is sent
+    with tempfile.NamedTemporaryFile(prefix="llm_eval_export_", suffix=".parquet", delete=False) as f:
+        path = Path(f.name)
+    try:
+        written = await write_parquet(stmt, path)
+    except ImportError as e:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+
+    if written["last_result_id"] is not None:
+        headers["X-Last-Result-Id"] = str(written["last_result_id"])
+    return FileResponse(
+        path, media_type=EXPORT_FORMATS[export_format], headers=headers,
+        background=BackgroundTask(path.unlink, missing_ok=True)
+    )
+
+@app.get("/evaluations/export")
+async def export_evaluations(
+    ids: Optional[str] = None,
+    after_result_id: Optional[int] = None,
+    sweep_id: Optional[str] = None,
+    model: Optional[str] = None,
+    criterion: Optional[str] = None,
+    result: Optional[str] = Query(None, pattern="^(pass|fail)$"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$")
+):
+    """Export the results of many evaluations as NDJSON, CSV or Parquet, ordered by evaluation.
+
+    ids is a comma-separated list of evaluation ids. Without ids, after_result_id
+    or sweep_id, every evaluation's results are exported. after_result_id exports
+    are incremental: passing the highest result_id already exported returns
+    every result written since, including those of evaluations that were still
+    running or were resumed.
+    """
+    try:
+        evaluation_ids = [int(evaluation_id) for evaluation_id in ids.split(",")] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated evaluation ids")
+
+    stmt = results_query(evaluation_ids, after_result_id, sweep_id, model, criterion, result)
+    return await export_response(stmt, export_format, "evaluations")
+
+@app.get("/evaluations/trend")
+async def get_evaluation_trend(limit: int = 1000, before_id: Optional[int] = None, model_name: Optional[str] = None):
+    """Per-evaluation scores for trend charts, oldest first.
+
+    Scores come from evaluation_summaries only, so the cost per evaluation
+    doesn't grow with its number of results.
+    """
+    async with get_async_session() as session:
+        stmt = (
+            select(Evaluation)
+            .join(EvaluationType)
+            .where(EvaluationType.name == "speech_to_text")
+            .order_by(Evaluation.id.desc())
+            .limit(limit)
+        )
+        if before_id is not None:
+            stmt = stmt.where(Evaluation.id < before_id)
+        if model_name:
+            stmt = stmt.where(Evaluation.model_name == model_name)
+        evaluations = (await session.execute(stmt)).scalars().all()
+        scores = await load_criteria_scores(session, [eval.id for eval in evaluations])
+
+    trend = []
+    for eval in reversed(evaluations):
+        scores_by_criteria = scores[eval.id]
+        trend.append({
+            "id": eval.id,
+            "timestamp": eval.timestamp.isoformat(),
+            "model_name": eval.model_name,
+            "scoring_model": eval.scoring_model,
+            "status": eval.status,
+            "total_score": sum(criteria["pass_count"] for criteria in scores_by_criteria.values()),
+            "total_count": sum(criteria["total_count"] for criteria in scores_by_criteria.values()),
+            "total_cost": sum(criteria["cost"] for criteria in scores_by_criteria.values()),
+            "scores_by_criteria": scores_by_criteria
+        })
+    return {"evaluations": trend}
+
+@app.get("/evaluations/{evaluation_id}/results")
+async def get_evaluation_results(evaluation_id: int):
+    async with get_async_session() as session:
+        evaluation = await session.get(Evaluation, evaluation_id)
+        details = await load_test_case_results(session, [evaluation]) if evaluation else {}
+
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    return {"evaluation_id": evaluation_id, "test_case_results": details[evaluation_id]}
+
+@app.get("/evaluations/{evaluation_id}/export")
+async def export_evaluation(
+    evaluation_id: int,
+    criterion: Optional[str] = None,
+    result: Optional[str] = Query(None, pattern="^(pass|fail)$"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$")
+):
+    """Export one evaluation's results as NDJSON, CSV or Parquet, one row per test case."""
+    async with get_async_session() as session:
+        evaluation = await session.get(Evaluation, evaluation_id)
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+
+    stmt = results_query([evaluation_id], criterion=criterion, result=result)
+    return await export_response(stmt, export_format, f"evaluation_{evaluation_id}")
+
 @app.get("/models")
 async def get_available_models():
     return {
@@ -591,7 +1694,7 @@ async def get_available_models():
 @app.get("/models/cost/{model_name}")
 async def get_model_cost(model_name: str):
     try:
-        provider = await get_model_provider(model_name, config)
+        provider = model_registry.provider(model_name)
         return {
             "model": model_name,
             "provider": provider,
@@ -600,9 +1703,94 @@ async def get_model_cost(model_name: str):
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 20):
+    try:
+        return {"jobs": await job_runner.list_jobs(status, limit)}
+    except Exception as e:
+        logger.error(f"Error listing jobs: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int):
+    job = await job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int):
+    job = await job_runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not await job_runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    if job["evaluation_id"] is not None:
+        # A resume cancelled before it started leaves its evaluation queued
+        async with get_async_session() as session:
+            await session.execute(
+                update(Evaluation)
+                .where(Evaluation.id == job["evaluation_id"], Evaluation.status == "queued")
+                .values(status="partial")
+            )
+    return await job_runner.get_job(job_id)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    try:
+        return await completion_cache.stats()
+    except Exception as e:
+        logger.error(f"Error fetching cache stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/admin/websockets")
+async def get_websocket_stats():
+    return manager.stats()
+
+@app.post("/admin/backup")
+async def create_backup():
+    try:
+        backup = await backup_database()
+    except Exception as e:
+        logger.error(f"Error creating database backup: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    if backup is None:
+        raise HTTPException(status_code=404, detail="Database file not found")
+    return backup
+
+@app.get("/admin/backups")
+async def list_backups():
+    return {"backups": backup_manager.list_backups(), **backup_manager.stats()}
+
+async def recover_interrupted_evaluations():
+    # Evaluations still marked running or queued lost their worker; their checkpoints can be resumed
+    async with get_async_session() as session:
+        result = await session.execute(
+            update(Evaluation).where(Evaluation.status.in_(("running", "queued"))).values(status="partial")
+        )
+        if result.rowcount:
+            logger.warning(f"Marked {result.rowcount} interrupted evaluations as partial")
+
+config_watcher: Optional[asyncio.Task] = None
+
 @app.on_event("startup")
 async def startup_event():
+    global config_watcher
     await verify_database()
+    await job_runner.recover_interrupted()
+    await recover_interrupted_evaluations()
+    await backfill_evaluation_summaries()
+
+    reload_settings = config.get("config_reload", {})
+    if reload_settings.get("enabled", True):
+        config_watcher = asyncio.create_task(
+            model_registry.watch(apply_config, reload_settings.get("poll_interval", 2.0))
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if config_watcher is not None:
+        config_watcher.cancel()
 
 def get_port():
     return repo_config["backend"]["port"]
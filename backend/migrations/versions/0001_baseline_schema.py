@@ -0,0 +1,91 @@
+"""Baseline schema
+
+The schema every database had before versioned migrations. verify_database()
+stamps unversioned databases at this revision before upgrading them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-10-01 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evaluation_types",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name")
+    )
+    op.create_table(
+        "criteria",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("evaluation_type_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.CheckConstraint('name != ""', name="name_not_empty"),
+        sa.ForeignKeyConstraint(["evaluation_type_id"], ["evaluation_types.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_table(
+        "test_cases",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("evaluation_type_id", sa.Integer(), nullable=False),
+        sa.Column("criterion_id", sa.Integer(), nullable=False),
+        sa.Column("input", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["criterion_id"], ["criteria.id"]),
+        sa.ForeignKeyConstraint(["evaluation_type_id"], ["evaluation_types.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_table(
+        "evaluations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("evaluation_type_id", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("system_prompt", sa.Text(), nullable=False),
+        sa.Column("model_name", sa.String(), nullable=False),
+        sa.Column("scoring_model", sa.String(), nullable=False),
+        sa.Column("total_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_cost", sa.Float(), nullable=False, server_default="0.0"),
+        sa.ForeignKeyConstraint(["evaluation_type_id"], ["evaluation_types.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_table(
+        "evaluation_results",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("evaluation_id", sa.Integer(), nullable=False),
+        sa.Column("test_case_id", sa.Integer(), nullable=False),
+        sa.Column("output", sa.Text(), nullable=False),
+        sa.Column("result", sa.String(), nullable=False),
+        sa.Column("explanation", sa.Text(), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("response_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("evaluation_cost", sa.Float(), nullable=False, server_default="0.0"),
+        sa.Column("scoring_cost", sa.Float(), nullable=False, server_default="0.0"),
+        sa.CheckConstraint("result IN ('pass', 'fail')", name="valid_result"),
+        sa.ForeignKeyConstraint(["evaluation_id"], ["evaluations.id"]),
+        sa.ForeignKeyConstraint(["test_case_id"], ["test_cases.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("evaluation_results")
+    op.drop_table("evaluations")
+    op.drop_table("test_cases")
+    op.drop_table("criteria")
+    op.drop_table("evaluation_types")
@@ -0,0 +1,114 @@
+"""Evaluation jobs, completion cache, re-scores, sweeps, token counts and summaries
+
+Databases started by builds between the baseline and versioned migrations
+already have some of these tables and columns, so each one is only added
+when missing.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ADD COLUMN is a schema-only change in SQLite, so existing rows aren't rewritten.
+# Alembic can't emit an inline REFERENCES clause for it, hence the raw DDL.
+EVALUATION_COLUMNS = (
+    ("status", "VARCHAR NOT NULL DEFAULT 'completed'"),
+    ("parent_evaluation_id", "INTEGER REFERENCES evaluations (id)"),
+    ("scoring_prompt_template", "TEXT"),
+    ("sweep_id", "VARCHAR"),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    existing = {column["name"] for column in inspector.get_columns("evaluations")}
+    for name, definition in EVALUATION_COLUMNS:
+        if name not in existing:
+            op.execute(f"ALTER TABLE evaluations ADD COLUMN {name} {definition}")
+
+    if "completion_cache" not in tables:
+        op.create_table(
+            "completion_cache",
+            sa.Column("key", sa.String(length=64), nullable=False),
+            sa.Column("provider", sa.String(), nullable=False),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("response", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("last_used_at", sa.DateTime(), nullable=False),
+            sa.Column("hit_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("key")
+        )
+        op.create_index("ix_completion_cache_created_at", "completion_cache", ["created_at"])
+        op.create_index("ix_completion_cache_last_used_at", "completion_cache", ["last_used_at"])
+
+    if "evaluation_jobs" not in tables:
+        op.create_table(
+            "evaluation_jobs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=False),
+            sa.Column("evaluation_id", sa.Integer(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.CheckConstraint(
+                "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')",
+                name="valid_job_status"
+            ),
+            sa.ForeignKeyConstraint(["evaluation_id"], ["evaluations.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_evaluation_jobs_status", "evaluation_jobs", ["status"])
+
+    if "test_case_token_counts" not in tables:
+        op.create_table(
+            "test_case_token_counts",
+            sa.Column("test_case_id", sa.Integer(), nullable=False),
+            sa.Column("encoding", sa.String(), nullable=False),
+            sa.Column("input_hash", sa.String(), nullable=False),
+            sa.Column("token_count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["test_case_id"], ["test_cases.id"]),
+            sa.PrimaryKeyConstraint("test_case_id", "encoding")
+        )
+
+    if "evaluation_summaries" not in tables:
+        op.create_table(
+            "evaluation_summaries",
+            sa.Column("evaluation_id", sa.Integer(), nullable=False),
+            sa.Column("criterion_id", sa.Integer(), nullable=False),
+            sa.Column("pass_count", sa.Integer(), nullable=False),
+            sa.Column("total_count", sa.Integer(), nullable=False),
+            sa.Column("total_cost", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["criterion_id"], ["criteria.id"]),
+            sa.ForeignKeyConstraint(["evaluation_id"], ["evaluations.id"]),
+            sa.PrimaryKeyConstraint("evaluation_id", "criterion_id")
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("evaluation_summaries")
+    op.drop_table("test_case_token_counts")
+    op.drop_index("ix_evaluation_jobs_status", table_name="evaluation_jobs")
+    op.drop_table("evaluation_jobs")
+    op.drop_index("ix_completion_cache_last_used_at", table_name="completion_cache")
+    op.drop_index("ix_completion_cache_created_at", table_name="completion_cache")
+    op.drop_table("completion_cache")
+    with op.batch_alter_table("evaluations") as batch_op:
+        for name, _ in reversed(EVALUATION_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,38 @@
+"""Indexes on the foreign-key paths of the hot read queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_evaluation_results_evaluation_id_test_case_id", "evaluation_results", ["evaluation_id", "test_case_id"]),
+    ("ix_test_cases_criterion_id", "test_cases", ["criterion_id"]),
+    ("ix_criteria_evaluation_type_id", "criteria", ["evaluation_type_id"]),
+    ("ix_evaluations_sweep_id", "evaluations", ["sweep_id"]),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        # Databases created with metadata.create_all already have them
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
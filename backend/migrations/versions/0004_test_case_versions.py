@@ -0,0 +1,83 @@
+"""Versioned test case content
+
+Existing cases get version 1 with their current content, and existing
+results are attributed to it.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-10-18 00:00:00
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def content_hash(criterion: str, input: str, description: str) -> str:
+    # Frozen copy of update_test_cases.content_hash as of this revision
+    payload = "\x1f".join((criterion, input, description or ""))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    # NOT NULL with a default is still a schema-only ADD COLUMN in SQLite,
+    # so existing results read as version 1 without being rewritten
+    op.execute("ALTER TABLE test_cases ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    op.execute("ALTER TABLE test_cases ADD COLUMN content_hash VARCHAR")
+    op.execute("ALTER TABLE test_cases ADD COLUMN retired_at DATETIME")
+    op.execute("ALTER TABLE evaluation_results ADD COLUMN test_case_version INTEGER NOT NULL DEFAULT 1")
+
+    op.create_table(
+        "test_case_versions",
+        sa.Column("test_case_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("criterion_id", sa.Integer(), nullable=False),
+        sa.Column("input", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("content_hash", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["criterion_id"], ["criteria.id"]),
+        sa.ForeignKeyConstraint(["test_case_id"], ["test_cases.id"]),
+        sa.PrimaryKeyConstraint("test_case_id", "version")
+    )
+
+    connection = op.get_bind()
+    cases = connection.execute(sa.text(
+        "SELECT test_cases.id, test_cases.criterion_id, criteria.name, test_cases.input, test_cases.description "
+        "FROM test_cases JOIN criteria ON criteria.id = test_cases.criterion_id"
+    )).all()
+    rows = [
+        {
+            "id": case_id,
+            "criterion_id": criterion_id,
+            "input": case_input,
+            "description": description,
+            "content_hash": content_hash(criterion, case_input, description)
+        }
+        for case_id, criterion_id, criterion, case_input, description in cases
+    ]
+    if rows:
+        connection.execute(sa.text("UPDATE test_cases SET content_hash = :content_hash WHERE id = :id"), rows)
+        connection.execute(sa.text(
+            "INSERT INTO test_case_versions (test_case_id, version, criterion_id, input, description, content_hash, created_at) "
+            "VALUES (:id, 1, :criterion_id, :input, :description, :content_hash, CURRENT_TIMESTAMP)"
+        ), rows)
+
+
+def downgrade() -> None:
+    op.drop_table("test_case_versions")
+    with op.batch_alter_table("evaluation_results") as batch_op:
+        batch_op.drop_column("test_case_version")
+    with op.batch_alter_table("test_cases") as batch_op:
+        batch_op.drop_column("retired_at")
+        batch_op.drop_column("content_hash")
+        batch_op.drop_column("version")
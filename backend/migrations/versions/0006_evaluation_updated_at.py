@@ -0,0 +1,32 @@
+"""Evaluation change timestamps
+
+Existing evaluations are treated as last changed when they were created.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-10-20 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("evaluations", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE evaluations SET updated_at = timestamp")
+    op.create_index("ix_evaluations_updated_at", "evaluations", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_evaluations_updated_at", table_name="evaluations")
+    with op.batch_alter_table("evaluations") as batch_op:
+        batch_op.drop_column("updated_at")
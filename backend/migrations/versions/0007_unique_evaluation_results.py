@@ -0,0 +1,58 @@
+"""One result per test case per evaluation
+
+Two resumes of the same evaluation could both write a result for a test
+case. The earliest result of each pair is kept. The tokens and cost of the
+removed rows come off their evaluation's totals (which also hold the system
+prompt's, so they can't be summed from the results alone), and the affected
+evaluations' summaries are dropped so the startup backfill recomputes them.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-10-21 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_evaluation_results_evaluation_id_test_case_id"
+DUPLICATES = """
+    SELECT id FROM evaluation_results
+    WHERE id NOT IN (SELECT min(id) FROM evaluation_results GROUP BY evaluation_id, test_case_id)
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        UPDATE evaluations SET
+            total_tokens = total_tokens - (
+                SELECT coalesce(sum(prompt_tokens + response_tokens), 0) FROM evaluation_results
+                WHERE evaluation_id = evaluations.id AND id IN ({DUPLICATES})
+            ),
+            total_cost = total_cost - (
+                SELECT coalesce(sum(evaluation_cost + scoring_cost), 0.0) FROM evaluation_results
+                WHERE evaluation_id = evaluations.id AND id IN ({DUPLICATES})
+            )
+        WHERE id IN (SELECT evaluation_id FROM evaluation_results WHERE id IN ({DUPLICATES}))
+    """)
+    op.execute(f"""
+        DELETE FROM evaluation_summaries
+        WHERE evaluation_id IN (SELECT evaluation_id FROM evaluation_results WHERE id IN ({DUPLICATES}))
+    """)
+    op.execute(f"DELETE FROM evaluation_results WHERE id IN ({DUPLICATES})")
+    if INDEX in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("evaluation_results")}:
+        op.drop_index(INDEX, table_name="evaluation_results")
+    op.create_index(INDEX, "evaluation_results", ["evaluation_id", "test_case_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="evaluation_results")
+    op.create_index(INDEX, "evaluation_results", ["evaluation_id", "test_case_id"])
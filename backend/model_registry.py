@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class ModelInfo(NamedTuple):
+    name: str
+    provider: str
+    input_cost: float
+    output_cost: float
+    rpm: Optional[int]
+    tpm: Optional[int]
+
+class ModelRegistry:
+    """Configured models indexed by name, for O(1) provider, pricing and limit lookups.
+
+    Built from backend_config.json; watch() rebuilds it when the file changes.
+    """
+
+    def __init__(self):
+        self.models: Dict[str, ModelInfo] = {}
+        self.path: Optional[str] = None
+        self.config: Optional[dict] = None
+        self._mtime: Optional[float] = None
+
+    def load(self, config: dict):
+        models = {}
+        for provider, provider_models in config["models"].items():
+            for name, settings in provider_models.items():
+                models[name] = ModelInfo(
+                    name=name,
+                    provider=provider,
+                    input_cost=float(settings["input"]),
+                    output_cost=float(settings["output"]),
+                    rpm=settings.get("rpm"),
+                    tpm=settings.get("tpm")
+                )
+        # Swap in one step so lookups never see a half-built registry
+        self.models = models
+
+    def load_file(self, path: str) -> dict:
+        mtime = os.path.getmtime(path)
+        with open(path, "r") as config_file:
+            config = json.load(config_file)
+        self.load(config)
+        # A copy, since callers may update the returned dict in place
+        self.path, self.config, self._mtime = path, dict(config), mtime
+        return config
+
+    def get(self, model: str) -> ModelInfo:
+        info = self.models.get(model)
+        if info is None:
+            raise ValueError(f"Model {model} not found in configuration")
+        return info
+
+    def provider(self, model: str) -> str:
+        return self.get(model).provider
+
+    def cost(self, tokens: int, model: str, token_type: str) -> float:
+        info = self.get(model)
+        cost_per_million = info.input_cost if token_type == "input" else info.output_cost
+        return (tokens / 1_000_000) * cost_per_million
+
+    def costs(self, tokens: Sequence[int], model: str, token_type: str) -> List[float]:
+        """Price a whole array of token counts with a single model lookup."""
+        info = self.get(model)
+        rate = (info.input_cost if token_type == "input" else info.output_cost) / 1_000_000
+        return [count * rate for count in tokens]
+
+    async def watch(self, on_reload: Callable[[dict], None], interval: float = 2.0):
+        # Polls the file's mtime; a broken edit is logged and the previous config kept
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                logger.error(f"Cannot stat {self.path}: {e}")
+                continue
+            if mtime == self._mtime:
+                continue
+
+            previous_models, previous_config = self.models, self.config
+            try:
+                config = self.load_file(self.path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Ignoring invalid {os.path.basename(self.path)}: {e}")
+                self._mtime = mtime
+                continue
+
+            try:
+                on_reload(config)
+            except Exception as e:
+                logger.error(f"Ignoring {os.path.basename(self.path)}, which could not be applied: {e}", exc_info=True)
+                # on_reload may have applied part of the new config, so put the old one back everywhere
+                self.models, self.config = previous_models, previous_config
+                if previous_config is not None:
+                    on_reload(previous_config)
+                continue
+            logger.info(f"Reloaded {os.path.basename(self.path)} ({len(self.models)} models)")
+
+model_registry = ModelRegistry()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from database import get_async_session, Evaluation, EvaluationResult
+from evaluation_summary import SummaryDeltas, add_summary_delta, merge_summary_deltas, apply_summary_deltas
+
+logger = logging.getLogger(__name__)
+
+class ResultWriter:
+    """Write-behind buffer for one evaluation's EvaluationResult rows.
+
+    Rows are bulk-inserted once batch_size rows are buffered or flush_interval
+    seconds after the first buffered row, each batch in its own short
+    transaction together with the evaluation's running totals and its
+    per-criterion summary.
+    """
+
+    def __init__(
+        self,
+        evaluation_id: int,
+        total_tokens: int = 0,
+        total_cost: float = 0.0,
+        batch_size: int = 25,
+        flush_interval: float = 2.0
+    ):
+        self.evaluation_id = evaluation_id
+        self.total_tokens = total_tokens
+        self.total_cost = total_cost
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._summary: SummaryDeltas = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, row: Dict[str, Any], tokens: int = 0, cost: float = 0.0, criterion_id: Optional[int] = None):
+        self._rows.append({"evaluation_id": self.evaluation_id, **row})
+        if criterion_id is not None:
+            add_summary_delta(self._summary, criterion_id, row["result"], cost)
+        self.total_tokens += tokens
+        self.total_cost += cost
+
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None and self.flush_interval > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Scheduled flush for evaluation {self.evaluation_id} failed: {e}")
+
+    async def flush(self):
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._rows:
+                return
+
+            # add() updates rows and totals together, so this snapshot is consistent
+            rows, self._rows = self._rows, []
+            summary, self._summary = self._summary, {}
+            total_tokens, total_cost = self.total_tokens, self.total_cost
+            try:
+                async with get_async_session() as session:
+                    await session.execute(insert(EvaluationResult), rows)
+                    await apply_summary_deltas(session, self.evaluation_id, summary)
+                    await session.execute(
+                        update(Evaluation)
+                        .where(Evaluation.id == self.evaluation_id)
+                        .values(total_tokens=total_tokens, total_cost=total_cost)
+                    )
+            except Exception:
+                self._rows = rows + self._rows
+                merge_summary_deltas(summary, self._summary)
+                self._summary = summary
+                raise
+            self.rows_written += len(rows)
+
+    async def close(self):
+        await self.flush()
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Tests import the backend's flat modules the same way main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# The provider clients are created at import time and need some key
+for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(key, "test")
+
+# Tests that touch the database get a fresh schema in a throwaway file, never data/llm_eval.db
+os.environ.setdefault("LLM_EVAL_DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='llm_eval_tests_')}/llm_eval.db")
+
+@pytest.fixture
+def db():
+    """The database module, with empty tables and one running evaluation of five test cases.
+
+    Returns (database, evaluation_id, test_case_ids, criterion_id).
+    """
+    import database
+
+    async def reset():
+        async with database.engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.drop_all)
+            await conn.run_sync(database.Base.metadata.create_all)
+        async with database.async_session_maker() as session:
+            eval_type = database.EvaluationType(name="speech_to_text")
+            session.add(eval_type)
+            await session.flush()
+            criterion = database.Criterion(evaluation_type_id=eval_type.id, name="accuracy")
+            session.add(criterion)
+            await session.flush()
+            test_cases = [
+                database.TestCase(evaluation_type_id=eval_type.id, criterion_id=criterion.id, input=f"input {index}")
+                for index in range(5)
+            ]
+            evaluation = database.Evaluation(
+                evaluation_type_id=eval_type.id,
+                system_prompt="prompt",
+                model_name="model",
+                scoring_model="scorer",
+                status="running"
+            )
+            session.add_all(test_cases + [evaluation])
+            await session.commit()
+            ids = evaluation.id, [test_case.id for test_case in test_cases], criterion.id
+        # Pooled connections belong to this event loop, and every test runs its own
+        await database.engine.dispose()
+        return ids
+
+    evaluation_id, test_case_ids, criterion_id = asyncio.run(reset())
+    yield database, evaluation_id, test_case_ids, criterion_id
+    asyncio.run(database.engine.dispose())
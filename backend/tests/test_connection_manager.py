@@ -0,0 +1,107 @@
+import asyncio
+
+from connection_manager import ConnectionManager
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await self.unblocked.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        pass
+
+def progress(evaluation_id, test_case_id):
+    return {
+        "stage": "evaluation",
+        "evaluation_id": evaluation_id,
+        "current_result": {"evaluation_id": evaluation_id, "test_case_id": test_case_id}
+    }
+
+def completed(evaluation_id):
+    return {"stage": "completed", "evaluation_id": evaluation_id}
+
+async def drain():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def make_manager(**settings) -> ConnectionManager:
+    manager = ConnectionManager()
+    manager.configure({"max_progress_rate": 0, **settings})
+    return manager
+
+def test_replay_sends_missed_events_with_progress_coalesced():
+    async def scenario():
+        manager = make_manager()
+        for test_case_id in range(1, 4):
+            await manager.broadcast(progress(7, test_case_id))
+        await manager.broadcast(completed(7))
+
+        socket = FakeWebSocket()
+        await manager.connect(socket, ["job:unrelated"])
+        manager.replay(socket, 7, since=1)
+        await drain()
+        manager.disconnect(socket)
+        return socket.sent
+
+    sent = asyncio.run(scenario())
+
+    assert [message.get("seq") for message in sent] == [3, 4, 4]
+    assert [result["test_case_id"] for result in sent[0]["current_results"]] == [2, 3]
+    assert sent[1]["stage"] == "completed"
+    assert sent[2] == {"type": "replay", "evaluation_id": 7, "complete": True, "seq": 4}
+
+def test_replay_is_incomplete_when_the_events_are_no_longer_kept():
+    async def scenario():
+        manager = make_manager(replay_buffer_size=2)
+        for test_case_id in range(1, 4):
+            await manager.broadcast(progress(7, test_case_id))
+
+        socket = FakeWebSocket()
+        await manager.connect(socket, ["job:unrelated"])
+        manager.replay(socket, 7, since=0)
+        manager.replay(socket, 8, since=0)
+        # Seq 1 was evicted, but everything after seq 1 is still there
+        manager.replay(socket, 7, since=1)
+        await drain()
+        manager.disconnect(socket)
+        return socket.sent
+
+    sent = asyncio.run(scenario())
+
+    assert sent[0] == {"type": "replay", "evaluation_id": 7, "complete": False}
+    assert sent[1] == {"type": "replay", "evaluation_id": 8, "complete": False}
+    assert sent[-1] == {"type": "replay", "evaluation_id": 7, "complete": True, "seq": 3}
+
+def test_a_full_queue_coalesces_progress_and_keeps_lifecycle_events():
+    async def scenario():
+        manager = make_manager(queue_size=2)
+        socket = FakeWebSocket(blocked=True)
+        await manager.connect(socket)
+        # The writer takes the first message and waits on the socket; the queue fills behind it
+        for test_case_id in range(1, 6):
+            await manager.broadcast(progress(7, test_case_id))
+            await drain()
+        await manager.broadcast(completed(7))
+        stats = manager.stats()["clients"][0]
+        socket.unblocked.set()
+        await drain()
+        manager.disconnect(socket)
+        return stats, socket.sent
+
+    stats, sent = asyncio.run(scenario())
+
+    assert stats["dropped"] == 0
+    assert stats["coalesced"] == 3
+    assert sent[0]["current_result"]["test_case_id"] == 1
+    assert [result["test_case_id"] for result in sent[1]["current_results"]] == [2, 3, 4, 5]
+    assert sent[2]["stage"] == "completed"
+    assert len(sent) == 3
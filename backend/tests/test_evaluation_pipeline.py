@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from evaluation_pipeline import run_pipeline
+
+def test_every_item_is_generated_scored_and_persisted_once():
+    persisted, reported = [], []
+
+    async def generate(outcome):
+        await asyncio.sleep(0.001 * (outcome["item"] % 3))
+        return {"output": f"output {outcome['item']}"}
+
+    async def score(outcome):
+        return {"score": outcome["output"].endswith("0")}
+
+    async def persist(outcome):
+        persisted.append(outcome)
+
+    async def report(outcome):
+        reported.append(outcome["item"])
+
+    asyncio.run(run_pipeline(range(20), generate, score, persist, generation_workers=3, scoring_workers=2, report=report))
+
+    assert sorted(outcome["item"] for outcome in persisted) == list(range(20))
+    assert sorted(reported) == list(range(20))
+    for outcome in persisted:
+        assert outcome["output"] == f"output {outcome['item']}"
+        assert outcome["score"] == (outcome["item"] % 10 == 0)
+
+def test_a_failed_stage_skips_scoring_but_still_persists():
+    scored, persisted = [], []
+
+    async def generate(outcome):
+        if outcome["item"] == 2:
+            raise RuntimeError("provider unavailable")
+        return {"output": "ok"}
+
+    async def score(outcome):
+        scored.append(outcome["item"])
+        if outcome["item"] == 3:
+            raise ValueError("unparseable verdict")
+        return {"score": True}
+
+    async def persist(outcome):
+        persisted.append(outcome)
+
+    asyncio.run(run_pipeline(range(5), generate, score, persist))
+
+    by_item = {outcome["item"]: outcome for outcome in persisted}
+    assert sorted(by_item) == list(range(5))
+    assert sorted(scored) == [0, 1, 3, 4]
+    assert by_item[2]["error"] == "provider unavailable" and "score" not in by_item[2]
+    assert by_item[3]["error"] == "unparseable verdict"
+    assert all(by_item[item]["score"] is True for item in (0, 1, 4))
+
+def test_a_persist_failure_stops_the_pipeline():
+    async def generate(outcome):
+        return {}
+
+    async def score(outcome):
+        return {}
+
+    async def persist(outcome):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(asyncio.wait_for(run_pipeline(range(50), generate, score, persist), timeout=5))
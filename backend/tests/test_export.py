@@ -0,0 +1,78 @@
+import asyncio
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+
+from export import EXPORT_COLUMNS, append_parquet, export_results, results_query
+
+async def add_results(database, evaluation_id, test_case_ids):
+    async with database.async_session_maker() as session:
+        results = [
+            database.EvaluationResult(
+                evaluation_id=evaluation_id,
+                test_case_id=test_case_id,
+                output=f"output {test_case_id}",
+                result="pass",
+                prompt_tokens=10,
+                response_tokens=20
+            )
+            for test_case_id in test_case_ids
+        ]
+        session.add_all(results)
+        await session.commit()
+        return [result.id for result in results]
+
+async def exported(stmt, export_format):
+    return b"".join([chunk async for chunk in export_results(stmt, export_format)]).decode("utf-8")
+
+def test_text_exports_pick_up_only_newer_results(db):
+    database, evaluation_id, test_case_ids, _ = db
+
+    async def scenario():
+        first_ids = await add_results(database, evaluation_id, test_case_ids[:3])
+        first = await exported(results_query(), "ndjson")
+        # Results added to an evaluation that was already exported
+        second_ids = await add_results(database, evaluation_id, test_case_ids[3:])
+        ndjson = await exported(results_query(after_result_id=max(first_ids)), "ndjson")
+        csv_text = await exported(results_query(after_result_id=max(first_ids)), "csv")
+        return first_ids, second_ids, first, ndjson, csv_text
+
+    first_ids, second_ids, first, ndjson, csv_text = asyncio.run(scenario())
+
+    first_rows = [json.loads(line) for line in first.splitlines()]
+    assert [row["result_id"] for row in first_rows] == first_ids
+    assert list(first_rows[0]) == EXPORT_COLUMNS
+    assert first_rows[0]["criterion"] == "accuracy" and first_rows[0]["input"] == "input 0"
+
+    assert [json.loads(line)["result_id"] for line in ndjson.splitlines()] == second_ids
+    csv_rows = list(csv.DictReader(io.StringIO(csv_text)))
+    assert [int(row["result_id"]) for row in csv_rows] == second_ids
+    assert [int(row["test_case_id"]) for row in csv_rows] == test_case_ids[3:]
+
+def test_parquet_appends_each_result_once(db, tmp_path):
+    database, evaluation_id, test_case_ids, _ = db
+
+    async def scenario():
+        first_ids = await add_results(database, evaluation_id, test_case_ids[:3])
+        first = await append_parquet(tmp_path)
+        second_ids = await add_results(database, evaluation_id, test_case_ids[3:])
+        second = await append_parquet(tmp_path)
+        nothing_new = await append_parquet(tmp_path)
+        return first_ids, second_ids, first, second, nothing_new
+
+    first_ids, second_ids, first, second, nothing_new = asyncio.run(scenario())
+
+    assert (first["rows"], second["rows"], nothing_new["rows"]) == (3, 2, 0)
+    assert sorted(part.name for part in tmp_path.iterdir()) == [
+        f"part-{first_ids[0]:010d}-{first_ids[-1]:010d}.parquet",
+        f"part-{second_ids[0]:010d}-{second_ids[-1]:010d}.parquet"
+    ]
+    metadata = pq.read_metadata(second["path"]).metadata
+    assert int(metadata[b"first_result_id"]) == second_ids[0]
+    assert int(metadata[b"last_result_id"]) == second_ids[-1]
+
+    table = pq.read_table(tmp_path)
+    assert sorted(table.column("result_id").to_pylist()) == first_ids + second_ids
+    assert table.schema.names == EXPORT_COLUMNS
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from anthropic import AsyncAnthropic
+
+import llm_interaction
+
+REPLY_DELAY = 0.5
+
+@pytest.fixture
+def slow_messages_server():
+    """A stand-in for the Messages API that holds every reply for REPLY_DELAY seconds.
+
+    It runs on its own event loop in a thread, so it still answers if the
+    client under test blocks the test's loop.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        headers = await reader.readuntil(b"\r\n\r\n")
+        length = next(
+            int(line.split(b":", 1)[1])
+            for line in headers.split(b"\r\n")
+            if line.lower().startswith(b"content-length:")
+        )
+        await reader.readexactly(length)
+        await asyncio.sleep(REPLY_DELAY)
+        body = json.dumps({
+            "id": "msg_test",
+            "type": "message",
+            "role": "assistant",
+            "model": "claude-test",
+            "content": [{"type": "text", "text": "refined text"}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 2}
+        }).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(asyncio.start_server(handle, "127.0.0.1", 0), loop).result()
+    yield f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    server.close()
+    asyncio.run_coroutine_threadsafe(server.wait_closed(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+def test_slow_anthropic_call_does_not_block_the_event_loop(monkeypatch, slow_messages_server):
+    monkeypatch.setattr(
+        llm_interaction, "anthropic_client",
+        AsyncAnthropic(api_key="test", base_url=slow_messages_server, max_retries=0)
+    )
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        try:
+            reply = await llm_interaction.anthropic_completion(
+                "claude-test",
+                [{"role": "system", "content": "Refine the text."}, {"role": "user", "content": "um hello"}],
+                temperature=0
+            )
+        finally:
+            ticking.cancel()
+        return reply, time.perf_counter() - started, ticks
+
+    reply, elapsed, ticks = asyncio.run(scenario())
+
+    assert reply == "refined text"
+    assert elapsed >= REPLY_DELAY
+    # A blocking call would leave the ticker stuck at 0 until the reply arrived
+    assert ticks >= REPLY_DELAY / 0.01 * 0.5
+
+def test_rate_limit_exhaustion_raises_after_max_retries(monkeypatch):
+    calls = 0
+
+    async def always_rate_limited(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        raise llm_interaction.RateLimitError("slow down", retry_after=0)
+
+    monkeypatch.setattr(llm_interaction, "_provider_completion", always_rate_limited)
+    monkeypatch.setitem(llm_interaction.rate_limit_settings, "max_retries", 2)
+    monkeypatch.setitem(llm_interaction.rate_limit_settings, "base_delay", 0.001)
+
+    with pytest.raises(llm_interaction.RateLimitExhausted):
+        asyncio.run(llm_interaction.get_completion_for_provider(
+            "Anthropic", "claude-test", [{"role": "user", "content": "hi"}], temperature=0
+        ))
+    assert calls == 3
@@ -0,0 +1,33 @@
+import asyncio
+import json
+import os
+
+from model_registry import ModelRegistry
+
+def write_config(path, models, mtime):
+    path.write_text(json.dumps({"models": {"openai": models}}))
+    os.utime(path, (mtime, mtime))
+
+def test_watch_rolls_back_when_applying_the_reload_fails(tmp_path):
+    path = tmp_path / "backend_config.json"
+    write_config(path, {"old-model": {"input": 1, "output": 2}}, 1000)
+    registry = ModelRegistry()
+    applied = [registry.load_file(str(path))]
+
+    def on_reload(config):
+        applied.append(config)
+        if "new-model" in config["models"]["openai"]:
+            raise ValueError("bad jobs settings")
+
+    async def reload_once():
+        watcher = asyncio.create_task(registry.watch(on_reload, interval=0.01))
+        write_config(path, {"new-model": {"input": 3, "output": 4}}, 2000)
+        await asyncio.sleep(0.1)
+        watcher.cancel()
+
+    asyncio.run(reload_once())
+
+    assert list(registry.models) == ["old-model"]
+    assert registry.config == applied[0]
+    # The failed config is followed by the previous one, so nothing keeps a half-applied reload
+    assert [list(config["models"]["openai"]) for config in applied] == [["old-model"], ["new-model"], ["old-model"]]
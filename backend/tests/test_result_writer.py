@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import func, select
+
+import result_writer
+from result_writer import ResultWriter
+
+def result_row(test_case_id, index):
+    return {
+        "test_case_id": test_case_id,
+        "output": f"output {index}",
+        "result": "pass" if index % 2 else "fail",
+        "explanation": "explanation",
+        "prompt_tokens": 10,
+        "response_tokens": 20,
+        "evaluation_cost": 0.25,
+        "scoring_cost": 0.5
+    }
+
+async def stored_state(database, evaluation_id):
+    async with database.async_session_maker() as session:
+        results = await session.scalar(
+            select(func.count()).where(database.EvaluationResult.evaluation_id == evaluation_id)
+        )
+        evaluation = await session.get(database.Evaluation, evaluation_id)
+        summary = (await session.scalars(
+            select(database.EvaluationSummary).where(database.EvaluationSummary.evaluation_id == evaluation_id)
+        )).all()
+        return results, evaluation.total_tokens, evaluation.total_cost, [
+            (row.criterion_id, row.pass_count, row.total_count, row.total_cost) for row in summary
+        ]
+
+def test_rows_are_written_in_batches_with_totals_and_summary(db):
+    database, evaluation_id, test_case_ids, criterion_id = db
+
+    async def write():
+        writer = ResultWriter(evaluation_id, batch_size=2, flush_interval=0)
+        states = []
+        for index, test_case_id in enumerate(test_case_ids):
+            await writer.add(result_row(test_case_id, index), tokens=30, cost=0.75, criterion_id=criterion_id)
+            states.append((await stored_state(database, evaluation_id))[0])
+        await writer.close()
+        return writer.rows_written, states, await stored_state(database, evaluation_id)
+
+    rows_written, states, final = asyncio.run(write())
+
+    # Nothing reaches the database until a batch is full, then the whole batch does
+    assert states == [0, 2, 2, 4, 4]
+    assert rows_written == 5
+    assert final == (5, 150, 3.75, [(criterion_id, 2, 5, 3.75)])
+
+def test_a_failed_flush_keeps_its_rows_for_the_next_one(db, monkeypatch):
+    database, evaluation_id, test_case_ids, criterion_id = db
+    failures = [OSError("database is locked")]
+
+    @asynccontextmanager
+    async def flaky_session():
+        if failures:
+            raise failures.pop()
+        async with database.get_async_session() as session:
+            yield session
+
+    monkeypatch.setattr(result_writer, "get_async_session", flaky_session)
+
+    async def write():
+        writer = ResultWriter(evaluation_id, batch_size=10, flush_interval=0)
+        for index, test_case_id in enumerate(test_case_ids[:3]):
+            await writer.add(result_row(test_case_id, index), tokens=30, cost=0.75, criterion_id=criterion_id)
+        with pytest.raises(OSError):
+            await writer.flush()
+        after_failure = writer.rows_written, await stored_state(database, evaluation_id)
+
+        for index, test_case_id in enumerate(test_case_ids[3:], start=3):
+            await writer.add(result_row(test_case_id, index), tokens=30, cost=0.75, criterion_id=criterion_id)
+        await writer.close()
+        return after_failure, writer.rows_written, await stored_state(database, evaluation_id)
+
+    after_failure, rows_written, final = asyncio.run(write())
+
+    assert after_failure == (0, (0, 0, 0.0, []))
+    # The retried batch is written once, with the summary counted once
+    assert rows_written == 5
+    assert final == (5, 150, 3.75, [(criterion_id, 2, 5, 3.75)])
@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import EvaluationRun, parse_json_verdicts, parse_text_verdict
+
+@pytest.mark.parametrize("response, result", [
+    ("pass\nLooks fine.", "pass"),
+    ("FAIL\nDrops the date.", "fail"),
+    ("1. Pass\n2. Keeps every detail.", "pass"),
+    ("**Verdict:** fail\nAdds a greeting.", "fail"),
+    ("Pass/Fail: fail\nChanges the tone.", "fail"),
+    ("Pass: the output keeps every detail.", "pass"),
+    ("The output is clean.\nResult: pass", "pass"),
+    ("Explanation: this would pass a quick read\nVerdict: fail", "fail"),
+])
+def test_text_verdict_is_the_first_token_of_its_line(response, result):
+    assert parse_text_verdict(response)["result"] == result
+
+def test_text_verdict_keeps_the_other_lines_as_explanation():
+    assert parse_text_verdict("Verdict: pass\nKeeps every detail.\n") == {
+        "result": "pass", "explanation": "Keeps every detail."
+    }
+
+def test_text_verdict_ignores_words_that_only_contain_a_verdict():
+    with pytest.raises(ValueError):
+        parse_text_verdict("The model used a bypass and failed nothing.")
+
+CRITERIA = {"retaining_key_information": "Keep every fact", "removing_filler_text": "Drop filler words"}
+
+def test_json_verdicts_are_read_per_criterion():
+    response = json.dumps({"verdicts": [
+        {"criterion": "removing_filler_text", "result": "FAIL", "explanation": " Keeps 'um'. "},
+        {"criterion": "retaining_key_information", "result": "pass", "explanation": "All facts kept."},
+        {"criterion": "unrequested", "result": "pass", "explanation": "Ignored."}
+    ]})
+    assert parse_json_verdicts(response, CRITERIA) == {
+        "retaining_key_information": {"result": "pass", "explanation": "All facts kept."},
+        "removing_filler_text": {"result": "fail", "explanation": "Keeps 'um'."}
+    }
+
+def test_json_verdicts_tolerate_a_code_fence():
+    response = '```json\n{"verdicts": [{"criterion": "removing_filler_text", "result": "pass"}]}\n```'
+    assert parse_json_verdicts(response, {"removing_filler_text": ""})["removing_filler_text"]["result"] == "pass"
+
+def test_json_verdicts_need_every_criterion():
+    response = json.dumps({"verdicts": [
+        {"criterion": "retaining_key_information", "result": "pass", "explanation": ""},
+        {"criterion": "removing_filler_text", "result": "maybe", "explanation": ""}
+    ]})
+    with pytest.raises(ValueError, match="removing_filler_text"):
+        parse_json_verdicts(response, CRITERIA)
+
+def make_run(test_cases, stored_outputs=None):
+    evaluation = SimpleNamespace(id=1, model_name="gpt-4o-mini-2024-07-18", total_tokens=0, total_cost=0.0)
+    return EvaluationRun(evaluation, test_cases, {}, stored_outputs=stored_outputs)
+
+CASES = [SimpleNamespace(id=case_id, input=text) for case_id, text in ((1, "a"), (2, "b"), (3, "a"))]
+
+def test_json_mode_judges_cases_with_the_same_input_together(monkeypatch):
+    monkeypatch.setitem(main.config["evaluation_settings"], "judging_mode", "json")
+    assert [[case.id for case in group] for group in make_run(CASES).case_groups()] == [[1, 3], [2]]
+
+def test_rescores_group_only_identical_stored_outputs(monkeypatch):
+    monkeypatch.setitem(main.config["evaluation_settings"], "judging_mode", "json")
+    stored = {
+        1: SimpleNamespace(input="a", output="x"),
+        2: SimpleNamespace(input="b", output="x"),
+        3: SimpleNamespace(input="a", output="y")
+    }
+    assert [[case.id for case in group] for group in make_run(CASES, stored).case_groups()] == [[1], [2], [3]]
+
+def test_text_mode_judges_every_case_alone(monkeypatch):
+    monkeypatch.setitem(main.config["evaluation_settings"], "judging_mode", "text")
+    assert [[case.id for case in group] for group in make_run(CASES).case_groups()] == [[1], [2], [3]]
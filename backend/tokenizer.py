@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import tiktoken
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from database import chunked, TestCase, TestCaseTokenCount
+
+logger = logging.getLogger(__name__)
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class TokenizerRegistry:
+    """Resolves each model's tiktoken encoding once and memoizes token counts.
+
+    Only texts that repeat across calls (system prompts, test case inputs)
+    should be memoized; counts are kept in an LRU keyed by content hash.
+    """
+
+    def __init__(self, max_cached_counts: int = 50_000, batch_threads: int = 8):
+        self.max_cached_counts = max_cached_counts
+        self.batch_threads = batch_threads
+        self._encodings: Dict[str, tiktoken.Encoding] = {}
+        self._counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+    def configure(self, settings: dict):
+        self.max_cached_counts = settings.get("max_cached_counts", self.max_cached_counts)
+        self.batch_threads = max(1, settings.get("batch_threads", self.batch_threads))
+
+    def get_encoding(self, model: str) -> tiktoken.Encoding:
+        encoding = self._encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            self._encodings[model] = encoding
+        return encoding
+
+    def _remember(self, key: Tuple[str, str], count: int):
+        self._counts[key] = count
+        self._counts.move_to_end(key)
+        while len(self._counts) > self.max_cached_counts:
+            self._counts.popitem(last=False)
+
+    def count(self, text: str, model: str, memoize: bool = False) -> int:
+        encoding = self.get_encoding(model)
+        if not memoize:
+            return len(encoding.encode(text))
+
+        key = (encoding.name, content_hash(text))
+        count = self._counts.get(key)
+        if count is None:
+            count = len(encoding.encode(text))
+            self._remember(key, count)
+        else:
+            self._counts.move_to_end(key)
+        return count
+
+    async def count_batch(self, texts: List[str], model: str) -> List[int]:
+        """Count many texts at once, encoding only the ones not already memoized."""
+        encoding = self.get_encoding(model)
+        keys = [(encoding.name, content_hash(text)) for text in texts]
+        # Taken before encoding, since other callers can evict entries while it runs
+        counts = {key: self._counts[key] for key in keys if key in self._counts}
+        missing = {key: text for key, text in zip(keys, texts) if key not in counts}
+
+        if missing:
+            # encode_batch runs its own thread pool but waits for it, so keep it off the event loop
+            encoded = await asyncio.to_thread(
+                encoding.encode_batch, list(missing.values()), num_threads=self.batch_threads
+            )
+            for key, tokens in zip(missing.keys(), encoded):
+                counts[key] = len(tokens)
+                self._remember(key, len(tokens))
+
+        return [counts[key] for key in keys]
+
+    def stats(self) -> dict:
+        return {
+            "models": len(self._encodings),
+            "cached_counts": len(self._counts),
+            "max_cached_counts": self.max_cached_counts
+        }
+
+tokenizer = TokenizerRegistry()
+
+def count_tokens(text: str, model: str, memoize: bool = False) -> int:
+    return tokenizer.count(text, model, memoize)
+
+async def load_input_token_counts(session, test_cases: List[TestCase], model: str) -> Dict[int, int]:
+    """Return {test_case_id: input token count} for the model's encoding.
+
+    Counts are stored per encoding in test_case_token_counts; only cases
+    without a stored count, or whose input changed since, are encoded (in
+    one batch) and written back.
+    """
+    encoding_name = tokenizer.get_encoding(model).name
+    stored = await session.execute(
+        select(
+            TestCaseTokenCount.test_case_id,
+            TestCaseTokenCount.input_hash,
+            TestCaseTokenCount.token_count
+        ).where(TestCaseTokenCount.encoding == encoding_name)
+    )
+    stored = {row.test_case_id: row for row in stored}
+
+    counts: Dict[int, int] = {}
+    stale = []
+    for case in test_cases:
+        input_hash = content_hash(case.input)
+        row = stored.get(case.id)
+        if row is not None and row.input_hash == input_hash:
+            counts[case.id] = row.token_count
+        else:
+            stale.append((case, input_hash))
+
+    if not stale:
+        return counts
+
+    new_counts = await tokenizer.count_batch([case.input for case, _ in stale], model)
+    rows = [
+        {"test_case_id": case.id, "encoding": encoding_name, "input_hash": input_hash, "token_count": count}
+        for (case, input_hash), count in zip(stale, new_counts)
+    ]
+    for chunk in chunked(rows):
+        stmt = insert(TestCaseTokenCount).values(chunk)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=[TestCaseTokenCount.test_case_id, TestCaseTokenCount.encoding],
+            set_={"input_hash": stmt.excluded.input_hash, "token_count": stmt.excluded.token_count}
+        ))
+    await session.commit()
+    logger.info(f"Stored {len(rows)} input token counts for encoding {encoding_name}")
+
+    counts.update({row["test_case_id"]: row["token_count"] for row in rows})
+    return counts
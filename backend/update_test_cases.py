@@ -1,46 +1,335 @@
+"""Sync test cases from a JSON or JSONL file into the database.
+
+Cases are matched by id and compared by content hash, so only new or edited
+cases are written. An edited case gets a new version (the previous text is
+kept in test_case_versions for the results scored on it), a case missing from
+the file is retired rather than deleted, and unknown criteria are created.
+
+The file is read as a stream and written in chunks, so memory stays flat for
+suites of any size. JSON files use the {"test_cases": [...]} shape of
+evaluation_test_cases.json; .jsonl/.ndjson files hold one case per line.
+
+    python update_test_cases.py [--file suite.jsonl] [--evaluation-type speech_to_text]
+"""
+import argparse
+import hashlib
 import json
-import sqlite3
+import logging
 import os
+import re
+import sqlite3
+import time
+from datetime import datetime
 from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVALUATION_TYPE = "speech_to_text"
+# Cases diffed and committed per transaction; also the number of ids bound into one IN (...)
+CHUNK_SIZE = 5000
+READ_SIZE = 1 << 16
+MAX_RECORD_SIZE = 16 << 20
+MAX_REPORTED_ERRORS = 100
+
+ARRAY_START = re.compile(r'"test_cases"\s*:\s*\[')
+SEPARATORS = re.compile(r"[\s,]*")
+
+def default_database_path() -> Path:
+    url = os.getenv("LLM_EVAL_DATABASE_URL")
+    if url:
+        return Path(url.replace("sqlite+aiosqlite:///", ""))
+    return Path(__file__).parent.parent / "data" / "llm_eval.db"
+
+def content_hash(criterion: str, input: str, description: str) -> str:
+    # Fields are joined with the ASCII unit separator, which test case text never contains
+    payload = "\x1f".join((criterion, input, description or ""))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-def update_test_cases():
-    # Get absolute paths based on script location
-    script_dir = Path(__file__).parent
-    json_path = script_dir / "evaluation_test_cases.json"
-    db_path = script_dir.parent / "data" / "llm_eval.db"
-    
-    # Read JSON file
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    
-    # Connect to database
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    # Get criteria IDs
-    c.execute("SELECT id, name FROM criteria")
-    criteria_map = {name: id for id, name in c.fetchall()}
-    
+def file_format(path: Path) -> str:
+    return "jsonl" if Path(path).suffix.lower() in (".jsonl", ".ndjson") else "json"
+
+def _iter_jsonl(f: IO[str]) -> Iterator[Tuple[int, Any]]:
+    for line_number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+def _iter_json_array(f: IO[str]) -> Iterator[Tuple[int, Any]]:
+    # Decodes the "test_cases" array one element at a time instead of loading the whole file
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_SIZE)
+    match = ARRAY_START.search(buffer)
+    while match is None:
+        data = f.read(READ_SIZE)
+        if not data:
+            raise ValueError('Expected a JSON object with a "test_cases" array')
+        buffer += data
+        match = ARRAY_START.search(buffer)
+
+    position = match.end()
+    record = 0
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            if position == len(buffer):
+                raise ValueError("end of buffer")
+            value, position = decoder.raw_decode(buffer, position)
+        except ValueError as e:
+            # Usually the element continues past the buffer; read more and retry
+            buffer = buffer[position:]
+            position = 0
+            data = f.read(READ_SIZE)
+            if not data:
+                raise ValueError(f"Invalid JSON after test case {record}: {e}") from e
+            if len(buffer) > MAX_RECORD_SIZE:
+                raise ValueError(f"Test case {record + 1} is larger than {MAX_RECORD_SIZE} bytes or invalid JSON") from e
+            buffer += data
+            continue
+        record += 1
+        yield record, value
+
+def validate_test_case(value: Any) -> dict:
+    if isinstance(value, Exception):
+        raise ValueError(f"invalid JSON: {value}")
+    if not isinstance(value, dict):
+        raise ValueError("expected an object")
+    missing = {"id", "input", "criterion", "description"} - value.keys()
+    if missing:
+        raise ValueError(f"missing {', '.join(sorted(missing))}")
+    if not isinstance(value["id"], int) or isinstance(value["id"], bool) or value["id"] < 1:
+        raise ValueError("id must be a positive integer")
+    for field in ("input", "criterion"):
+        if not isinstance(value[field], str) or not value[field].strip():
+            raise ValueError(f"{field} must be a non-empty string")
+    if value["description"] is not None and not isinstance(value["description"], str):
+        raise ValueError("description must be a string")
+    return {key: value[key] for key in ("id", "input", "criterion", "description")}
+
+def read_test_cases(f: IO[str], format: str = "json") -> Iterator[Tuple[int, Any]]:
+    """Yield (record, test case) pairs, where record is the JSONL line or position in the JSON array.
+
+    Invalid cases are yielded as the ValueError describing them, so callers can
+    report every bad record instead of stopping at the first one.
+    """
+    records = _iter_jsonl(f) if format == "jsonl" else _iter_json_array(f)
+    for record, value in records:
+        try:
+            yield record, validate_test_case(value)
+        except ValueError as e:
+            yield record, e
+
+def sync_test_cases(
+    db_path: Path,
+    cases: Iterable,
+    evaluation_type: str = DEFAULT_EVALUATION_TYPE,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    retire_missing: bool = True
+) -> Dict[str, Any]:
+    """Bring the evaluation type's test cases in line with cases, one transaction per chunk.
+
+    cases may be test case dicts or the pairs yielded by read_test_cases().
+    Invalid and duplicate cases are skipped and listed in "errors". With
+    retire_missing, cases not in the file are retired, but only when every
+    record was valid and the sync ran to the end, since otherwise the missing
+    ids can't be told apart from unread ones.
+    progress is called with the running counts after each chunk.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
     try:
-        # Delete existing test cases
-        c.execute("DELETE FROM test_cases")
-        
-        # Insert new test cases
-        for case in data['test_cases']:
-            c.execute("""
-                INSERT INTO test_cases (id, evaluation_type_id, criterion_id, input, description)
-                VALUES (?, 1, ?, ?, ?)
-            """, (case['id'], criteria_map[case['criterion']], case['input'], case['description']))
-        
-        conn.commit()
-        print(f"Successfully updated {len(data['test_cases'])} test cases!")
-        
-    except Exception as e:
-        conn.rollback()
-        print(f"Error updating test cases: {e}")
-        
+        return _sync(conn, cases, evaluation_type, chunk_size, progress, should_stop, retire_missing)
     finally:
         conn.close()
 
+def _sync(conn: sqlite3.Connection, cases, evaluation_type, chunk_size, progress, should_stop, retire_missing) -> Dict[str, Any]:
+    now = datetime.utcnow().isoformat(sep=" ")
+    counts: Dict[str, Any] = {
+        "processed": 0, "added": 0, "updated": 0, "reactivated": 0, "retired": 0, "unchanged": 0,
+        "invalid": 0, "errors": [], "stopped": False
+    }
+
+    def reject(record, message):
+        counts["invalid"] += 1
+        if len(counts["errors"]) < MAX_REPORTED_ERRORS:
+            counts["errors"].append(f"Test case {record}: {message}")
+
+    with conn:
+        row = conn.execute("SELECT id FROM evaluation_types WHERE name = ?", (evaluation_type,)).fetchone()
+        if row is None:
+            type_id = conn.execute("INSERT INTO evaluation_types (name) VALUES (?)", (evaluation_type,)).lastrowid
+            logger.info(f"Created evaluation type: {evaluation_type}")
+        else:
+            type_id = row[0]
+    criteria = dict(conn.execute("SELECT name, id FROM criteria WHERE evaluation_type_id = ?", (type_id,)))
+
+    # Ids seen so far live in a temp table, so duplicate checks and retirement don't hold them all in memory
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS listed_test_cases (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM listed_test_cases")
+
+    def write_chunk(chunk: List[Tuple[Any, dict]]):
+        ids = [case["id"] for _, case in chunk]
+        placeholders = ", ".join("?" * len(ids))
+        listed = {row[0] for row in conn.execute(f"SELECT id FROM listed_test_cases WHERE id IN ({placeholders})", ids)}
+        existing = {
+            row[0]: row[1:] for row in conn.execute(
+                f"SELECT id, evaluation_type_id, content_hash, version, retired_at FROM test_cases WHERE id IN ({placeholders})",
+                ids
+            )
+        }
+
+        new_ids = []
+        upserts = []
+        versions = []
+        new_criteria = set()
+        for record, case in chunk:
+            current = existing.get(case["id"])
+            if case["id"] in listed:
+                reject(record, f"duplicate id {case['id']}")
+                continue
+            if current is not None and current[0] != type_id:
+                reject(record, f"id {case['id']} belongs to another evaluation type")
+                continue
+            listed.add(case["id"])
+            new_ids.append((case["id"],))
+            counts["processed"] += 1
+
+            case_hash = content_hash(case["criterion"], case["input"], case["description"])
+            if current is None:
+                version = 1
+                counts["added"] += 1
+            else:
+                _, stored_hash, version, retired_at = current
+                if stored_hash == case_hash and retired_at is None:
+                    counts["unchanged"] += 1
+                    continue
+                if stored_hash != case_hash:
+                    # Cases stored before hashing existed have no hash; their first sync records version 1
+                    if stored_hash is not None:
+                        version += 1
+                    counts["updated"] += 1
+                else:
+                    counts["reactivated"] += 1
+
+            if case["criterion"] not in criteria:
+                new_criteria.add(case["criterion"])
+            upserts.append([case["id"], type_id, case["criterion"], case["input"], case["description"], version, case_hash])
+            versions.append([case["id"], version, case["criterion"], case["input"], case["description"], case_hash, now])
+
+        with conn:
+            if new_criteria:
+                conn.executemany(
+                    "INSERT INTO criteria (evaluation_type_id, name, description) VALUES (?, ?, ?)",
+                    [(type_id, name, " ".join(word.capitalize() for word in name.split("_"))) for name in sorted(new_criteria)]
+                )
+                criteria.update(conn.execute("SELECT name, id FROM criteria WHERE evaluation_type_id = ?", (type_id,)))
+                logger.info(f"Created criteria: {', '.join(sorted(new_criteria))}")
+            for row in upserts:
+                row[2] = criteria[row[2]]
+            for row in versions:
+                row[2] = criteria[row[2]]
+
+            conn.executemany("INSERT INTO listed_test_cases (id) VALUES (?)", new_ids)
+            conn.executemany(
+                """
+                INSERT INTO test_cases (id, evaluation_type_id, criterion_id, input, description, version, content_hash, retired_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+                ON CONFLICT (id) DO UPDATE SET
+                    criterion_id = excluded.criterion_id,
+                    input = excluded.input,
+                    description = excluded.description,
+                    version = excluded.version,
+                    content_hash = excluded.content_hash,
+                    retired_at = NULL
+                """,
+                upserts
+            )
+            conn.executemany(
+                """
+                INSERT INTO test_case_versions (test_case_id, version, criterion_id, input, description, content_hash, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (test_case_id, version) DO NOTHING
+                """,
+                versions
+            )
+
+    chunk: List[Tuple[Any, dict]] = []
+    for record, case in enumerate(cases, start=1):
+        if isinstance(case, tuple):
+            record, case = case
+        if isinstance(case, Exception):
+            reject(record, case)
+            continue
+        chunk.append((record, case))
+        if len(chunk) >= chunk_size:
+            write_chunk(chunk)
+            chunk = []
+            if progress:
+                progress(counts)
+            if should_stop and should_stop():
+                counts["stopped"] = True
+                break
+    if chunk:
+        write_chunk(chunk)
+
+    if retire_missing and (counts["invalid"] or counts["stopped"]):
+        logger.warning("Skipping retirement of test cases missing from the file, as it wasn't synced in full")
+    elif retire_missing:
+        with conn:
+            counts["retired"] = conn.execute(
+                "UPDATE test_cases SET retired_at = ? "
+                "WHERE evaluation_type_id = ? AND retired_at IS NULL AND id NOT IN (SELECT id FROM listed_test_cases)",
+                (now, type_id)
+            ).rowcount
+    conn.execute("DELETE FROM listed_test_cases")
+
+    if progress:
+        progress(counts)
+    return counts
+
+def update_test_cases(
+    path: Path = None,
+    db_path: Path = None,
+    evaluation_type: str = DEFAULT_EVALUATION_TYPE,
+    format: Optional[str] = None
+):
+    path = path or Path(__file__).parent / "evaluation_test_cases.json"
+    db_path = db_path or default_database_path()
+    start = time.perf_counter()
+
+    def report(counts):
+        elapsed = time.perf_counter() - start
+        print(f"  {counts['processed']} test cases synced ({counts['processed'] / max(elapsed, 1e-6):.0f}/s)")
+
+    try:
+        with open(path, "r") as f:
+            counts = sync_test_cases(db_path, read_test_cases(f, format or file_format(path)), evaluation_type, progress=report)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error updating test cases: {e}")
+        return None
+
+    for message in counts["errors"]:
+        print(f"  {message}")
+    if counts["invalid"] > len(counts["errors"]):
+        print(f"  ... and {counts['invalid'] - len(counts['errors'])} more invalid test cases")
+    print(
+        f"Synced test cases in {time.perf_counter() - start:.3f}s: {counts['added']} added, {counts['updated']} updated, "
+        f"{counts['reactivated']} reactivated, {counts['retired']} retired, {counts['unchanged']} unchanged, "
+        f"{counts['invalid']} invalid"
+    )
+    return counts
+
 if __name__ == "__main__":
-    update_test_cases()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="test case file (default: evaluation_test_cases.json)")
+    parser.add_argument("--format", choices=("json", "jsonl"), help="file format (default: from the file extension)")
+    parser.add_argument("--database", type=Path, help="SQLite file (default: LLM_EVAL_DATABASE_URL or data/llm_eval.db)")
+    parser.add_argument("--evaluation-type", default=DEFAULT_EVALUATION_TYPE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    update_test_cases(args.file, args.database, args.evaluation_type, args.format)
@@ -5,7 +5,13 @@ import { SystemPromptInput } from './components/SystemPromptInput';
 import { EvaluationProgress } from './components/EvaluationProgress';
 import { PreviousEvaluations } from './components/PreviousEvaluations';
 import { TrendChart } from './components/TrendChart';
-import { TestCaseAnalysis, TestCaseResult, WebSocketMessage, Evaluation, TestCaseDetails } from './types';
+import { TestCaseAnalysis, TestCaseResult, WebSocketMessage, Evaluation, EvaluationTrendPoint, TestCaseDetails } from './types';
+
+const subscribeToJob = (socket: WebSocket, jobId: number) => {
+  // Follow this job's progress, plus every evaluation's completion for the trend chart
+  socket.send(JSON.stringify({ type: 'subscribe', channels: [`job:${jobId}`, 'evaluations'] }));
+  socket.send(JSON.stringify({ type: 'unsubscribe', channels: ['*'] }));
+};
 
 function App() {
   const [evaluationStarted, setEvaluationStarted] = useState(false);
@@ -17,6 +23,8 @@ function App() {
   const [scoringModel, setScoringModel] = useState('');
   const reconnectAttempts = useRef(0);
   const processedIds = useRef(new Set<number>());
+  const currentJobId = useRef<number | null>(null);
+  const lastSeq = useRef<{ evaluationId: number; seq: number } | null>(null);
   const [criteriaResults, setCriteriaResults] = useState<{[criterion: string]: {[id: number]: TestCaseResult}}>({});
   const [totalScore, setTotalScore] = useState(0);
   const [evaluationComplete, setEvaluationComplete] = useState(false);
@@ -25,7 +33,7 @@ function App() {
   const [testCaseAnalysis, setTestCaseAnalysis] = useState<TestCaseAnalysis | null>(null);
   const [currentEvaluationId, setCurrentEvaluationId] = useState<number>();
   const [selectedEvaluation, setSelectedEvaluation] = useState<Evaluation | null>(null);
-  const [allEvaluations, setAllEvaluations] = useState<Evaluation[]>([]);
+  const [allEvaluations, setAllEvaluations] = useState<EvaluationTrendPoint[]>([]);
   const [currentOffset, setCurrentOffset] = useState(0);
   const [snackbarState, setSnackbarState] = useState({ open: false, message: '', isError: false });
   const [detailedResults, setDetailedResults] = useState<{[key: number]: TestCaseDetails}>({});
@@ -33,50 +41,123 @@ function App() {
   const fetchAllEvaluations = useCallback(async () => {
     if (!backendPort) return;
     try {
-      const response = await fetch(`http://localhost:${backendPort}/evaluations?page=1&limit=1000`);
+      const response = await fetch(`http://localhost:${backendPort}/evaluations/trend?limit=1000`);
       if (!response.ok) throw new Error('Failed to fetch evaluations');
       const result = await response.json();
       const sortedEvals = [...result.evaluations].sort((a, b) => a.id - b.id);
       setAllEvaluations(sortedEvals);
-      setCurrentOffset(Math.max(0, sortedEvals.length - 20));
     } catch (err) {
       console.error('Failed to fetch evaluations:', err);
     }
   }, [backendPort]);
 
-  const handleEvaluationSelect = useCallback((evaluation: Evaluation) => {
+  // Completion events carry the finished evaluation, so the chart doesn't have to be reloaded
+  const applyEvaluation = useCallback((evaluation: Evaluation) => {
+    const point: EvaluationTrendPoint = {
+      id: evaluation.id,
+      timestamp: evaluation.timestamp,
+      model_name: evaluation.model_name,
+      scoring_model: evaluation.scoring_model,
+      status: evaluation.status ?? 'completed',
+      total_score: evaluation.total_score,
+      total_count: evaluation.total_count ?? 0,
+      total_cost: evaluation.total_cost,
+      scores_by_criteria: evaluation.scores_by_criteria
+    };
+    setAllEvaluations(prev => [...prev.filter(p => p.id !== point.id), point].sort((a, b) => a.id - b.id));
+  }, []);
+
+  useEffect(() => {
+    setCurrentOffset(Math.max(0, allEvaluations.length - 20));
+  }, [allEvaluations.length]);
+
+  const handleEvaluationSelect = useCallback(async (evaluation: Evaluation) => {
     setSelectedEvaluation(evaluation);
-    if (evaluation.test_case_results) {
+    let testCaseResults = evaluation.test_case_results;
+    if (!testCaseResults && backendPort) {
+      try {
+        const response = await fetch(`http://localhost:${backendPort}/evaluations/${evaluation.id}/results`);
+        if (!response.ok) throw new Error('Failed to fetch evaluation results');
+        testCaseResults = (await response.json()).test_case_results;
+      } catch (err) {
+        console.error('Failed to fetch evaluation results:', err);
+      }
+    }
+    if (testCaseResults) {
       setCriteriaResults({});
       const results: {[criterion: string]: {[id: number]: TestCaseResult}} = {};
-      Object.entries(evaluation.test_case_results).forEach(([id, details]) => {
+      Object.entries(testCaseResults).forEach(([id, details]) => {
         const criterion = details.criterion;
         if (!results[criterion]) results[criterion] = {};
         results[criterion][parseInt(id)] = details.result as TestCaseResult;
       });
       setCriteriaResults(results);
-      setDetailedResults(evaluation.test_case_results);
+      setDetailedResults(testCaseResults);
       setTotalScore(evaluation.total_score);
-      setProcessedTestCases(Object.keys(evaluation.test_case_results).length);
+      setProcessedTestCases(Object.keys(testCaseResults).length);
       setEvaluationComplete(true);
       setCurrentEvaluationId(evaluation.id);
       setModelName(evaluation.model_name);
       setScoringModel(evaluation.scoring_model);
     }
-  }, []);
+  }, [backendPort]);
 
   const setupWebSocket = useCallback((port: number) => {
     const socket = new WebSocket(`ws://localhost:${port}/ws`);
     wsRef.current = socket;
     setWs(socket);
 
+    const requestReplay = (evaluationId: number, since: number) =>
+      socket.send(JSON.stringify({ type: 'replay', evaluation_id: evaluationId, since }));
+
+    const reloadResults = async (evaluationId: number) => {
+      // The missed events are no longer kept by the backend, so rebuild from the stored results
+      const response = await fetch(`http://localhost:${port}/evaluations/${evaluationId}/results`);
+      if (!response.ok) return;
+      const testCaseResults: {[id: string]: TestCaseDetails} = (await response.json()).test_case_results;
+      const results: {[criterion: string]: {[id: number]: TestCaseResult}} = {};
+      Object.entries(testCaseResults).forEach(([id, details]) => {
+        if (!results[details.criterion]) results[details.criterion] = {};
+        results[details.criterion][parseInt(id)] = details.result as TestCaseResult;
+      });
+      processedIds.current = new Set(Object.keys(testCaseResults).map(id => parseInt(id)));
+      setCriteriaResults(results);
+      setProcessedTestCases(processedIds.current.size);
+      setTotalScore(Object.values(testCaseResults).filter(details => details.result === 'pass').length);
+    };
+
+    socket.onopen = () => {
+      if (currentJobId.current !== null) subscribeToJob(socket, currentJobId.current);
+      // Catch up on whatever happened while disconnected
+      if (lastSeq.current) requestReplay(lastSeq.current.evaluationId, lastSeq.current.seq);
+    };
+
     socket.onmessage = async (event) => {
       try {
         const data = JSON.parse(event.data) as WebSocketMessage;
         if (data.type === 'ping') return socket.send(JSON.stringify({ type: 'pong' }));
 
-        if (data.current_result) {
-          const { id, criterion, result, evaluation_id } = data.current_result;
+        // Other jobs' events (sent until the subscription narrows) only refresh the trend chart on completion
+        if (currentJobId.current !== null && data.job_id !== undefined && data.job_id !== currentJobId.current) {
+          if (data.stage === 'completed') data.evaluation ? applyEvaluation(data.evaluation) : await fetchAllEvaluations();
+          return;
+        }
+
+        if (data.type === 'replay') {
+          if (!data.complete && data.evaluation_id !== undefined) await reloadResults(data.evaluation_id);
+          return;
+        }
+
+        const results = data.current_results ?? (data.current_result ? [data.current_result] : []);
+        const evaluationId = data.evaluation_id ?? results[0]?.evaluation_id;
+        if (data.seq !== undefined && evaluationId !== undefined) {
+          // Results are applied by id, so replayed events that were already seen change nothing
+          const firstSeq = results[0]?.seq ?? data.seq;
+          const last = lastSeq.current;
+          if (last?.evaluationId === evaluationId && firstSeq > last.seq + 1) requestReplay(evaluationId, last.seq);
+          if (last?.evaluationId !== evaluationId || data.seq > last.seq) lastSeq.current = { evaluationId, seq: data.seq };
+        }
+        results.forEach(({ id, criterion, result, evaluation_id }) => {
           setCurrentEvaluationId(evaluation_id);
           setActiveCriterion(criterion);
           setCriteriaResults(prev => ({
@@ -89,7 +170,7 @@ function App() {
             setProcessedTestCases(p => p + 1);
             if (result === 'pass') setTotalScore(p => p + 1);
           }
-        }
+        });
 
         if (data.stage === 'completed') {
           setEvaluationStarted(false);
@@ -97,12 +178,17 @@ function App() {
           setActiveCriterion(undefined);
           setSnackbarState({ open: true, message: 'Evaluation completed', isError: false });
           setSelectedEvaluation(null);
-          await fetchAllEvaluations();
+          if (data.evaluation) applyEvaluation(data.evaluation);
+          else await fetchAllEvaluations();
         } else if (data.stage === 'error') {
           setError(data.error || 'Unknown error');
           setEvaluationStarted(false);
           setActiveCriterion(undefined);
           setSnackbarState({ open: true, message: 'Evaluation failed', isError: true });
+        } else if (data.stage === 'cancelled') {
+          setEvaluationStarted(false);
+          setActiveCriterion(undefined);
+          setSnackbarState({ open: true, message: 'Evaluation cancelled', isError: true });
         }
       } catch (error) {
         console.error('WebSocket error:', error);
@@ -113,7 +199,7 @@ function App() {
       setTimeout(() => { reconnectAttempts.current++; setupWebSocket(port); }, 3000);
 
     return socket;
-  }, [fetchAllEvaluations]);
+  }, [fetchAllEvaluations, applyEvaluation]);
 
   useEffect(() => {
     (async () => {
@@ -149,6 +235,8 @@ function App() {
     setSelectedEvaluation(null);
     setDetailedResults({});
     processedIds.current.clear();
+    currentJobId.current = null;
+    lastSeq.current = null;
     setModelName(evaluationModel);
     setScoringModel(scoringModel);
 
@@ -164,7 +252,9 @@ function App() {
         })
       });
       if (!response.ok) throw new Error(await response.text());
-      await response.json();
+      const { job_id } = await response.json();
+      currentJobId.current = job_id;
+      if (wsRef.current?.readyState === WebSocket.OPEN) subscribeToJob(wsRef.current, job_id);
     } catch (error) {
       setError(`Evaluation failed: ${error}`);
       setEvaluationStarted(false);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { 
   Paper, 
   Typography, 
@@ -14,7 +14,7 @@ import {
   Tooltip,
   Alert
 } from '@mui/material';
-import { Evaluation, WebSocketMessage } from '../types';
+import { Evaluation, EvaluationChanges, WebSocketMessage } from '../types';
 
 interface PreviousEvaluationsProps {
   backendPort?: number | null;
@@ -28,15 +28,27 @@ export const PreviousEvaluations: React.FC<PreviousEvaluationsProps> = ({
   const [page, setPage] = useState(0);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [data, setData] = useState<{
-    evaluations: Evaluation[];
-    total_count: number;
-  }>({
-    evaluations: [],
-    total_count: 0
-  });
   const [allEvaluations, setAllEvaluations] = useState<Evaluation[]>([]);
   const [ws, setWs] = useState<WebSocket | null>(null);
+  // Newest id and latest change seen, to ask the backend only for what changed since
+  const cursor = useRef<{ latestId?: number; asOf?: string }>({});
+
+  const applyChanges = (changed: Evaluation[]) => {
+    if (!changed.length) return;
+    setAllEvaluations(prev => {
+      const byId = new Map(prev.map(evaluation => [evaluation.id, evaluation]));
+      changed.forEach(evaluation => byId.set(evaluation.id, evaluation));
+      return Array.from(byId.values()).sort((a, b) => b.id - a.id);
+    });
+  };
+
+  // Only called with a complete set of changes, so nothing older than the cursor is left unseen
+  const advanceCursor = (seen: Evaluation[]) => {
+    seen.forEach(({ id, updated_at }) => {
+      if (cursor.current.latestId === undefined || id > cursor.current.latestId) cursor.current.latestId = id;
+      if (updated_at && (!cursor.current.asOf || updated_at > cursor.current.asOf)) cursor.current.asOf = updated_at;
+    });
+  };
 
   const fetchAllEvaluations = async () => {
     if (!backendPort) return;
@@ -53,12 +65,8 @@ export const PreviousEvaluations: React.FC<PreviousEvaluationsProps> = ({
       if (!response.ok) throw new Error('Failed to fetch evaluations');
       
       const result = await response.json();
-      const sortedEvals = [...result.evaluations].sort((a, b) => b.id - a.id);
-      setAllEvaluations(sortedEvals);
-      setData({
-        evaluations: sortedEvals.slice(0, 20),
-        total_count: result.total_count
-      });
+      applyChanges(result.evaluations);
+      advanceCursor(result.evaluations);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch evaluations');
     } finally {
@@ -66,16 +74,47 @@ export const PreviousEvaluations: React.FC<PreviousEvaluationsProps> = ({
     }
   };
 
+  const fetchChanges = async () => {
+    if (!backendPort) return;
+    if (cursor.current.latestId === undefined) return fetchAllEvaluations();
+
+    try {
+      // after_id and since stay fixed while paging; pages follow the server's (updated_at, id) cursor
+      const params = new URLSearchParams({ after_id: String(cursor.current.latestId) });
+      if (cursor.current.asOf) params.set('since', cursor.current.asOf);
+      const seen: Evaluation[] = [];
+      let hasMore = true;
+      while (hasMore) {
+        const response = await fetch(`http://localhost:${backendPort}/evaluations/changes?${params}`);
+        if (!response.ok) throw new Error('Failed to fetch evaluation changes');
+        const result: EvaluationChanges = await response.json();
+        applyChanges(result.evaluations);
+        seen.push(...result.evaluations);
+        hasMore = result.has_more;
+        if (result.next_cursor) {
+          params.set('cursor_updated_at', result.next_cursor.updated_at);
+          params.set('cursor_id', String(result.next_cursor.id));
+        }
+      }
+      advanceCursor(seen);
+    } catch (err) {
+      console.error('Failed to fetch evaluation changes:', err);
+    }
+  };
+
   const setupWebSocket = useCallback(() => {
     if (!backendPort) return;
 
-    const socket = new WebSocket(`ws://localhost:${backendPort}/ws`);
+    // Only lifecycle events; per-case progress isn't needed here
+    const socket = new WebSocket(`ws://localhost:${backendPort}/ws?channels=evaluations`);
     
     socket.onmessage = async (event) => {
       try {
         const data = JSON.parse(event.data) as WebSocketMessage;
-        if (data.stage === 'completed') {
-          await fetchAllEvaluations();
+        if (data.stage === 'completed' && data.evaluation) {
+          applyChanges([data.evaluation]);
+        } else if (data.stage === 'completed' || data.stage === 'cancelled' || data.status === 'error') {
+          await fetchChanges();
         }
       } catch (error) {
         console.error('WebSocket message error:', error);
@@ -103,14 +142,8 @@ export const PreviousEvaluations: React.FC<PreviousEvaluationsProps> = ({
     }
   }, [backendPort, setupWebSocket]);
 
-  const handleChangePage = (_: unknown, newPage: number) => {
-    const startIdx = newPage * 20;
-    setData(prev => ({
-      ...prev,
-      evaluations: allEvaluations.slice(startIdx, startIdx + 20)
-    }));
-    setPage(newPage);
-  };
+  const handleChangePage = (_: unknown, newPage: number) => setPage(newPage);
+  const pageEvaluations = allEvaluations.slice(page * 20, page * 20 + 20);
 
   if (loading) {
     return (
@@ -150,7 +183,7 @@ export const PreviousEvaluations: React.FC<PreviousEvaluationsProps> = ({
             </TableRow>
           </TableHead>
           <TableBody>
-            {data.evaluations.map((evaluation) => (
+            {pageEvaluations.map((evaluation) => (
               <TableRow 
                 key={evaluation.id}
                 hover
@@ -2,10 +2,10 @@ import React from 'react';
 import { Box, IconButton, Paper, Typography } from '@mui/material';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
-import { Evaluation } from '../types';
+import { EvaluationTrendPoint } from '../types';
 
 interface TrendChartProps {
-  evaluations: Evaluation[];
+  evaluations: EvaluationTrendPoint[];
   onNext: () => void;
   onPrev: () => void;
   hasNext: boolean;
@@ -11,6 +11,7 @@ export interface TestCaseDetails {
   id: number;
   input: string;
   description: string;
+  version?: number;
   output: string;
   result: TestCaseResult;
   explanation: string;
@@ -23,9 +24,28 @@ export interface TestCaseDetails {
   scoring_cost?: number;
 }
 
+export interface WebSocketResult {
+  id: number;
+  criterion: string;
+  result: TestCaseResult;
+  evaluation_id?: number;
+  cost?: number;
+  seq?: number;
+}
+
 export interface WebSocketMessage {
-  type?: 'ping' | 'pong';
-  stage?: 'evaluation' | 'completed' | 'error';
+  type?: 'ping' | 'pong' | 'subscribed' | 'replay';
+  channels?: string[];
+  stage?: 'started' | 'evaluation' | 'completed' | 'error' | 'cancelled';
+  // Position of the event in its evaluation's event stream
+  seq?: number;
+  // On a replay marker: false when missed events are gone and results must be reloaded
+  complete?: boolean;
+  // On completion: the finished evaluation as listed by /evaluations
+  evaluation?: Evaluation;
+  job_id?: number;
+  sweep_id?: string;
+  evaluation_id?: number;
   total_progress?: string;
   criteria_progress?: {
     [criterion: string]: {
@@ -33,13 +53,9 @@ export interface WebSocketMessage {
       processed: number;
     };
   };
-  current_result?: {
-    id: number;
-    criterion: string;
-    result: TestCaseResult;
-    evaluation_id?: number;
-    cost?: number;
-  };
+  current_result?: WebSocketResult;
+  // Present when several progress messages were coalesced into one
+  current_results?: WebSocketResult[];
   error?: string;
   status?: string;
   message?: string;
@@ -81,10 +97,15 @@ export interface Evaluation {
   system_prompt: string;
   model_name: string;
   scoring_model: string;
+  status?: string;
+  updated_at?: string | null;
+  parent_evaluation_id?: number | null;
+  sweep_id?: string | null;
   total_score: number;
+  total_count?: number;
   total_tokens: number;
   total_cost: number;
-  test_case_results: { [key: number]: TestCaseDetails };
+  test_case_results?: { [key: number]: TestCaseDetails };
   scores_by_criteria: {
     [criterion: string]: {
       pass_count: number;
@@ -94,9 +115,30 @@ export interface Evaluation {
   };
 }
 
+export interface EvaluationTrendPoint {
+  id: number;
+  timestamp: string;
+  model_name: string;
+  scoring_model: string;
+  status: string;
+  total_score: number;
+  total_count: number;
+  total_cost: number;
+  scores_by_criteria: Evaluation['scores_by_criteria'];
+}
+
+export interface EvaluationChanges {
+  evaluations: Evaluation[];
+  latest_id: number | null;
+  as_of: string | null;
+  has_more: boolean;
+  next_cursor: { updated_at: string; id: number } | null;
+}
+
 export interface PaginatedEvaluations {
   evaluations: Evaluation[];
   total_count: number;
   page: number;
   pages: number;
+  next_before_id?: number | null;
 }
\ No newline at end of file